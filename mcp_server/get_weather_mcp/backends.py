@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+"""Weather backends used by the get_weather MCP tool."""
+from abc import ABC, abstractmethod
+from urllib.parse import quote
+
+import httpx
+
+
+class WeatherBackend(ABC):
+    """Base class: fetch a one-line weather report for a city."""
+
+    @abstractmethod
+    async def fetch(self, city: str) -> str:
+        """Return a one-line weather report for ``city``."""
+
+    async def aclose(self):
+        pass
+
+
+class StubBackend(WeatherBackend):
+    """Offline backend with a fixed answer."""
+
+    async def fetch(self, city: str) -> str:
+        return f"It's always sunny in {city}!"
+
+
+class WttrBackend(WeatherBackend):
+    """wttr.in backend sharing one pooled async HTTP client.
+
+    ``base_url`` can point to a local fake service with the same
+    ``/{city}?format=3`` interface for testing.
+    """
+
+    def __init__(self, base_url: str = "https://wttr.in", timeout: float = 10.0,
+                 max_connections: int = 20, transport: httpx.AsyncBaseTransport | None = None):
+        self.base_url = base_url.rstrip("/")
+        self.client = httpx.AsyncClient(
+            timeout=timeout,
+            headers={"User-Agent": "Mozilla/5.0"},
+            limits=httpx.Limits(max_connections=max_connections,
+                                max_keepalive_connections=max_connections),
+            transport=transport,
+        )
+
+    async def fetch(self, city: str) -> str:
+        response = await self.client.get(f"{self.base_url}/{quote(city)}", params={"format": "3"})
+        response.raise_for_status()
+        return response.text.strip()
+
+    async def aclose(self):
+        await self.client.aclose()
+
+
+BACKENDS = {
+    "stub": StubBackend,
+    "wttr": WttrBackend,
+}
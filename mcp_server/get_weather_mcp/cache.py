@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+"""Per-city TTL cache with stale-while-revalidate and request coalescing."""
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+
+try:
+    from .backends import WeatherBackend
+except ImportError:
+    from backends import WeatherBackend
+
+
+logger = logging.getLogger(__name__)
+
+
+class WeatherCache:
+    """Cache weather reports per city in front of a backend.
+
+    - fresh for ``ttl`` seconds: served from memory;
+    - then stale for another ``stale_ttl`` seconds: served immediately while a
+      single background refresh runs;
+    - concurrent misses for the same city share one backend request.
+    """
+
+    def __init__(self, backend: WeatherBackend, ttl: float = 600.0, stale_ttl: float = 1800.0,
+                 max_entries: int = 1024, clock=time.monotonic):
+        self.backend = backend
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self.clock = clock
+        self._entries: OrderedDict[str, tuple[str, float]] = OrderedDict()
+        self._inflight: dict[str, asyncio.Task] = {}
+        self.stats = {"hits": 0, "stale_hits": 0, "misses": 0, "coalesced": 0, "fetches": 0}
+
+    @staticmethod
+    def _key(city: str) -> str:
+        return " ".join(city.split()).lower()
+
+    async def get(self, city: str) -> str:
+        key = self._key(city)
+        entry = self._entries.get(key)
+        if entry is not None:
+            value, fetched_at = entry
+            age = self.clock() - fetched_at
+            if age < self.ttl:
+                self.stats["hits"] += 1
+                self._entries.move_to_end(key)
+                return value
+            if age < self.ttl + self.stale_ttl:
+                self.stats["stale_hits"] += 1
+                self._entries.move_to_end(key)
+                if key not in self._inflight:
+                    self._refresh(key, city).add_done_callback(self._log_refresh_error)
+                return value
+
+        self.stats["misses"] += 1
+        if key in self._inflight:
+            self.stats["coalesced"] += 1
+        # shield: a cancelled caller must not cancel the shared request
+        return await asyncio.shield(self._refresh(key, city))
+
+    def _refresh(self, key: str, city: str) -> asyncio.Task:
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch(key, city))
+            self._inflight[key] = task
+        return task
+
+    async def _fetch(self, key: str, city: str) -> str:
+        try:
+            self.stats["fetches"] += 1
+            value = await self.backend.fetch(city)
+            self._entries[key] = (value, self.clock())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            return value
+        finally:
+            self._inflight.pop(key, None)
+
+    @staticmethod
+    def _log_refresh_error(task: asyncio.Task):
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning("Background weather refresh failed: %s", task.exception())
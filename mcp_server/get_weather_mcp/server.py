@@ -1,14 +1,50 @@
 # -*- coding: utf-8 -*-
+import os
+import sys
+
 from fastmcp import FastMCP
 
+try:
+    from .backends import BACKENDS, WttrBackend
+    from .cache import WeatherCache
+except ImportError:
+    # Started as a script (e.g. stdio transport running server.py directly)
+    from backends import BACKENDS, WttrBackend
+    from cache import WeatherCache
+
+try:
+    from ..metrics import install_metrics
+except ImportError:
+    # Imported as a top-level package (cd mcp_server && python -m get_weather_mcp) or run as a script
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from metrics import install_metrics
+
 
 mcp = FastMCP("get_weather_mcp")
+metrics = install_metrics(mcp)
+
+
+def _create_backend():
+    """Select the backend from WEATHER_BACKEND (stub | wttr)."""
+    name = os.getenv("WEATHER_BACKEND", "stub")
+    if name == "wttr":
+        return WttrBackend(base_url=os.getenv("WEATHER_BASE_URL", "https://wttr.in"))
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown WEATHER_BACKEND {name!r}, expected one of: {', '.join(sorted(BACKENDS))}")
+    return BACKENDS[name]()
+
+
+cache = WeatherCache(
+    _create_backend(),
+    ttl=float(os.getenv("WEATHER_TTL", 600)),
+    stale_ttl=float(os.getenv("WEATHER_STALE_TTL", 1800)),
+)
 
 
 @mcp.tool
-def get_weather(city: str) -> str:
+async def get_weather(city: str) -> str:
     """Get weather for a given city."""
-    return f"It's always sunny in {city}!"
+    return await cache.get(city)
 
 
 if __name__ == "__main__":
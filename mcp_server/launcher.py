@@ -0,0 +1,211 @@
+# -*- coding: utf-8 -*-
+"""Multi-worker streamable-HTTP launcher for the MCP servers.
+
+    python -m mcp_server.launcher math_mcp --workers 4
+    python -m mcp_server.launcher get_weather_mcp --workers 4 --reuse-port
+
+Workers either share one listening socket bound by the parent (default) or each
+bind their own socket with SO_REUSEPORT so the kernel balances connections.
+The apps run in stateless HTTP mode: every request carries its full context, so
+any worker can serve any request and no session affinity is required.
+
+Signals: SIGHUP performs a rolling reload (start a new worker, then gracefully
+stop an old one), SIGTERM/SIGINT stop all workers gracefully. Crashed workers
+are restarted automatically with exponential backoff; a worker that keeps
+crashing right after start (e.g. an import error) makes the launcher give up
+after ``max_restarts`` consecutive failures and exit non-zero.
+"""
+import argparse
+import importlib
+import multiprocessing
+import os
+import signal
+import socket
+import sys
+import time
+
+import uvicorn
+
+
+SERVERS = {
+    "get_weather_mcp": ("mcp_server.get_weather_mcp.server", 8000),
+    "math_mcp": ("mcp_server.math_mcp.server", 8001),
+}
+
+# fork keeps the inherited listening socket usable in the workers
+_mp = multiprocessing.get_context("fork")
+
+
+def create_app(name: str):
+    """Build the ASGI app for a server, mounted at /mcp."""
+    module = importlib.import_module(SERVERS[name][0])
+    return module.mcp.http_app(path="/mcp", stateless_http=True)
+
+
+def _bind(host: str, port: int, reuse_port: bool) -> socket.socket:
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    if reuse_port:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+def _serve(name: str, host: str, port: int, sock, graceful_timeout: int):
+    """Worker entry point: run one uvicorn server on the given or a new socket."""
+    # The parent handles SIGHUP; workers only react to SIGTERM/SIGINT
+    signal.signal(signal.SIGHUP, signal.SIG_IGN)
+    if sock is None:
+        sock = _bind(host, port, reuse_port=True)
+    config = uvicorn.Config(
+        create_app(name),
+        log_level="info",
+        timeout_graceful_shutdown=graceful_timeout,
+    )
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+class Launcher:
+    """Supervise a fixed number of worker processes for one MCP server."""
+
+    def __init__(self, name: str, host: str, port: int, workers: int,
+                 reuse_port: bool = False, graceful_timeout: int = 10,
+                 startup_delay: float = 1.0, max_restarts: int = 5,
+                 backoff_base: float = 0.5, backoff_max: float = 30.0,
+                 min_uptime: float = 10.0):
+        self.name = name
+        self.host = host
+        self.port = port
+        self.num_workers = workers
+        self.reuse_port = reuse_port
+        self.graceful_timeout = graceful_timeout
+        self.startup_delay = startup_delay
+        self.max_restarts = max_restarts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.min_uptime = min_uptime
+        self.sock = None
+        self.workers = []
+        self._started = {}          # process -> monotonic start time
+        self._restart_at = []       # due times of pending restarts
+        self._crashes = 0           # consecutive workers that died before min_uptime
+        self._stopping = False
+        self._reload_requested = False
+
+    def _spawn(self):
+        process = _mp.Process(
+            target=_serve,
+            args=(self.name, self.host, self.port, self.sock, self.graceful_timeout),
+            daemon=False,
+        )
+        process.start()
+        self.workers.append(process)
+        self._started[process] = time.monotonic()
+        return process
+
+    def _stop_worker(self, process):
+        process.terminate()  # SIGTERM: uvicorn drains in-flight requests
+        process.join(self.graceful_timeout + 5)
+        if process.is_alive():
+            process.kill()
+            process.join()
+        if process in self.workers:
+            self.workers.remove(process)
+        self._started.pop(process, None)
+
+    def reload(self):
+        """Rolling reload: bring up each replacement before retiring an old worker."""
+        for old in list(self.workers):
+            self._spawn()
+            time.sleep(self.startup_delay)
+            self._stop_worker(old)
+
+    def stop(self):
+        for process in list(self.workers):
+            process.terminate()
+        for process in list(self.workers):
+            self._stop_worker(process)
+        if self.sock is not None:
+            self.sock.close()
+
+    def _handle_exit(self, process) -> bool:
+        """Schedule a restart for a dead worker; False once the restart cap is hit."""
+        self.workers.remove(process)
+        uptime = time.monotonic() - self._started.pop(process)
+        self._crashes = self._crashes + 1 if uptime < self.min_uptime else 0
+        if self._crashes > self.max_restarts:
+            print(f"[launcher] worker crashed {self._crashes} times in a row, giving up")
+            return False
+        delay = min(self.backoff_base * 2 ** max(self._crashes - 1, 0), self.backoff_max)
+        print(f"[launcher] worker {process.pid} exited ({process.exitcode}) after {uptime:.1f}s, "
+              f"restarting in {delay:.1f}s")
+        self._restart_at.append(time.monotonic() + delay)
+        return True
+
+    def _on_hup(self, signum, frame):
+        self._reload_requested = True
+
+    def _on_term(self, signum, frame):
+        self._stopping = True
+
+    def run(self) -> int:
+        """Supervise workers until stopped; returns the process exit code."""
+        if not self.reuse_port:
+            self.sock = _bind(self.host, self.port, reuse_port=False)
+        signal.signal(signal.SIGHUP, self._on_hup)
+        signal.signal(signal.SIGTERM, self._on_term)
+        signal.signal(signal.SIGINT, self._on_term)
+
+        for _ in range(self.num_workers):
+            self._spawn()
+        mode = "SO_REUSEPORT" if self.reuse_port else "shared socket"
+        print(f"[launcher] {self.name} on http://{self.host}:{self.port}/mcp "
+              f"with {self.num_workers} workers ({mode}), pid {os.getpid()}")
+
+        exit_code = 0
+        while not self._stopping:
+            if self._reload_requested:
+                self._reload_requested = False
+                print("[launcher] reloading workers")
+                self.reload()
+            for process in list(self.workers):
+                if not process.is_alive() and not self._handle_exit(process):
+                    self._stopping = True
+                    exit_code = 1
+            now = time.monotonic()
+            for due in [due for due in self._restart_at if due <= now]:
+                self._restart_at.remove(due)
+                if not self._stopping:
+                    self._spawn()
+            time.sleep(0.5)
+
+        print("[launcher] shutting down")
+        self.stop()
+        return exit_code
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run an MCP server with multiple workers")
+    parser.add_argument("server", choices=sorted(SERVERS))
+    parser.add_argument("--host", default=os.getenv("HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=None)
+    parser.add_argument("--workers", type=int, default=int(os.getenv("WORKERS", os.cpu_count() or 1)))
+    parser.add_argument("--reuse-port", action="store_true",
+                        help="let each worker bind its own SO_REUSEPORT socket")
+    parser.add_argument("--graceful-timeout", type=int, default=10)
+    parser.add_argument("--max-restarts", type=int, default=5,
+                        help="give up after this many consecutive worker crashes")
+    args = parser.parse_args()
+
+    port = args.port or int(os.getenv("PORT", SERVERS[args.server][1]))
+    launcher = Launcher(args.server, args.host, port, args.workers,
+                        reuse_port=args.reuse_port,
+                        graceful_timeout=args.graceful_timeout,
+                        max_restarts=args.max_restarts)
+    sys.exit(launcher.run())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+"""Safe arithmetic expression engine shared by the math MCP tool and the graph demos.
+
+Expressions are compiled once into a flat postfix program (cached in an LRU) and
+evaluated iteratively on a value stack, so evaluation never recurses, exponent
+sizes are bounded before any power is computed and every intermediate integer
+result is size-checked.
+"""
+import ast
+import math
+from decimal import Decimal, InvalidOperation, localcontext
+from fractions import Fraction
+from functools import lru_cache
+
+
+MODES = ("float", "decimal", "fraction")
+
+# Largest exponent accepted by ``**`` and largest integer (in bits) any operation
+# may produce. Kept below Python's 4300-digit int -> str limit (~14_000 bits) so
+# every accepted result can still be formatted.
+MAX_EXPONENT = 10_000
+MAX_RESULT_BITS = 13_000
+DECIMAL_PRECISION = 28
+
+_BINOPS = {
+    ast.Add: "+",
+    ast.Sub: "-",
+    ast.Mult: "*",
+    ast.Div: "/",
+    ast.Mod: "%",
+    ast.Pow: "**",
+    ast.FloorDiv: "//",
+}
+_UNARYOPS = {ast.UAdd: "u+", ast.USub: "u-"}
+
+
+def _check_power(base, exponent):
+    """Reject powers whose exponent or result size would stall a worker."""
+    if abs(exponent) > MAX_EXPONENT:
+        raise ValueError(f"Exponent too large (limit {MAX_EXPONENT})")
+    magnitude = abs(base)
+    if magnitude and math.log2(magnitude) * float(exponent) > MAX_RESULT_BITS:
+        raise ValueError("Result too large")
+
+
+def _check_result(value):
+    """Reject integer / fraction results too large to format."""
+    if isinstance(value, int):
+        bits = value.bit_length()
+    elif isinstance(value, Fraction):
+        bits = max(value.numerator.bit_length(), value.denominator.bit_length())
+    else:
+        return value
+    if bits > MAX_RESULT_BITS:
+        raise ValueError("Result too large")
+    return value
+
+
+def _power(base, exponent):
+    _check_power(base, exponent)
+    if isinstance(base, Fraction) and isinstance(exponent, Fraction):
+        if exponent.denominator == 1:
+            return base ** exponent.numerator
+        # Irrational in general: fall back to float
+        return Fraction(_power(float(base), float(exponent)))
+    result = base ** exponent
+    if isinstance(result, complex):
+        raise ValueError("Complex result is not supported")
+    return result
+
+
+_APPLY = {
+    "+": lambda a, b: a + b,
+    "-": lambda a, b: a - b,
+    "*": lambda a, b: a * b,
+    "/": lambda a, b: a / b,
+    "%": lambda a, b: a % b,
+    "//": lambda a, b: a // b,
+    "**": _power,
+}
+
+
+def normalize_operators(text: str) -> str:
+    """Map common typographic operators to Python arithmetic operators."""
+    return text.replace("×", "*").replace("÷", "/")
+
+
+@lru_cache(maxsize=1024)
+def compile_expression(expr: str) -> tuple:
+    """Compile an arithmetic expression into a flat postfix program.
+
+    The program is a tuple of ``("const", value)``, ``("unary", op)`` and
+    ``("binop", op)`` instructions. Results are cached per expression string.
+    """
+    tree = ast.parse(normalize_operators(expr), mode="eval")
+
+    program = []
+    # Iterative post-order walk: (node, children_done)
+    stack = [(tree.body, False)]
+    while stack:
+        node, done = stack.pop()
+        if isinstance(node, ast.BinOp):
+            op = _BINOPS.get(type(node.op))
+            if op is None:
+                raise ValueError("Unsupported operation")
+            if done:
+                program.append(("binop", op))
+            else:
+                stack.append((node, True))
+                stack.append((node.right, False))
+                stack.append((node.left, False))
+        elif isinstance(node, ast.UnaryOp):
+            op = _UNARYOPS.get(type(node.op))
+            if op is None:
+                raise ValueError("Unsupported unary operation")
+            if done:
+                program.append(("unary", op))
+            else:
+                stack.append((node, True))
+                stack.append((node.operand, False))
+        elif isinstance(node, ast.Constant):
+            if isinstance(node.value, bool) or not isinstance(node.value, (int, float)):
+                raise ValueError("Unsupported constant type")
+            program.append(("const", node.value))
+        else:
+            raise ValueError("Unsupported expression element")
+    return tuple(program)
+
+
+def _convert(value, mode: str):
+    if mode == "decimal":
+        return Decimal(str(value))
+    if mode == "fraction":
+        return Fraction(str(value))
+    return value
+
+
+def evaluate(program: tuple, mode: str = "float"):
+    """Evaluate a compiled program on a value stack.
+
+    ``mode`` selects the number type: ``float`` (Python int/float),
+    ``decimal`` (``Decimal`` with ``DECIMAL_PRECISION`` digits) or
+    ``fraction`` (exact ``Fraction``).
+    """
+    if mode not in MODES:
+        raise ValueError(f"Unsupported mode: {mode}")
+
+    with localcontext() as ctx:
+        ctx.prec = DECIMAL_PRECISION
+        values = []
+        for kind, arg in program:
+            if kind == "const":
+                values.append(_convert(arg, mode))
+            elif kind == "unary":
+                operand = values.pop()
+                values.append(-operand if arg == "u-" else +operand)
+            else:
+                right = values.pop()
+                left = values.pop()
+                try:
+                    values.append(_check_result(_APPLY[arg](left, right)))
+                except InvalidOperation as e:
+                    raise ValueError("Invalid decimal operation") from e
+        if len(values) != 1:
+            raise ValueError("Malformed expression")
+        return values[0]
+
+
+def evaluate_expression(expr: str, mode: str = "float"):
+    """Compile (cached) and evaluate an arithmetic expression."""
+    return evaluate(compile_expression(expr), mode)
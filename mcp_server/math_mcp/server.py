@@ -1,50 +1,26 @@
 # -*- coding: utf-8 -*-
 from fastmcp import FastMCP
-import ast
+from typing import Literal
+import os
 import re
+import sys
 
+try:
+    from .engine import MODES, evaluate_expression
+except ImportError:
+    # Started as a script (e.g. stdio transport running server.py directly)
+    from engine import MODES, evaluate_expression
 
-mcp = FastMCP("math_mcp")
+try:
+    from ..metrics import install_metrics
+except ImportError:
+    # Imported as a top-level package (cd mcp_server && python -m math_mcp) or run as a script
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from metrics import install_metrics
 
 
-def _eval_ast(node):
-    """Safely evaluate a restricted arithmetic AST node."""
-    if isinstance(node, ast.Expression):
-        return _eval_ast(node.body)
-    if isinstance(node, ast.BinOp):
-        left = _eval_ast(node.left)
-        right = _eval_ast(node.right)
-        op = node.op
-        if isinstance(op, ast.Add):
-            return left + right
-        if isinstance(op, ast.Sub):
-            return left - right
-        if isinstance(op, ast.Mult):
-            return left * right
-        if isinstance(op, ast.Div):
-            return left / right
-        if isinstance(op, ast.Mod):
-            return left % right
-        if isinstance(op, ast.Pow):
-            return left ** right
-        if isinstance(op, ast.FloorDiv):
-            return left // right
-        raise ValueError("Unsupported operation")
-    if isinstance(node, ast.UnaryOp):
-        operand = _eval_ast(node.operand)
-        if isinstance(node.op, ast.UAdd):
-            return +operand
-        if isinstance(node.op, ast.USub):
-            return -operand
-        raise ValueError("Unsupported unary operation")
-    if isinstance(node, ast.Constant):
-        if isinstance(node.value, (int, float)):
-            return node.value
-        raise ValueError("Unsupported constant type")
-    # For compatibility if ast.Num appears (older Python)
-    if isinstance(node, ast.Num):
-        return node.n
-    raise ValueError("Unsupported expression element")
+mcp = FastMCP("math_mcp")
+metrics = install_metrics(mcp)
 
 
 def _normalize_expression(text: str) -> str:
@@ -63,11 +39,16 @@ def _normalize_expression(text: str) -> str:
     return expr
 
 
-@mcp.tool
-def math(question: str) -> int | float:
-    """Solve a natural-language arithmetic question, e.g. "what's (3 + 5) x 12?".
-    Returns a number; integers are returned without a decimal.
-    """
+MAX_BATCH_SIZE = 1000
+
+Mode = Literal["float", "decimal", "fraction"]
+
+
+def _solve(question: str, mode: str = "float") -> int | float | str:
+    """Normalize and evaluate one question; raises ValueError on bad input."""
+    if mode not in MODES:
+        raise ValueError(f"Unsupported mode: {mode}")
+
     # Security: Limit input length to prevent DoS attacks
     if len(question) > 1000:
         raise ValueError("Input too long. Maximum 1000 characters allowed.")
@@ -81,12 +62,15 @@ def math(question: str) -> int | float:
         raise ValueError("Expression too complex after normalization")
     
     try:
-        parsed = ast.parse(expr, mode="eval")
-        result = _eval_ast(parsed)
+        result = evaluate_expression(expr, mode)
+        if mode != "float":
+            return str(result)
     except ZeroDivisionError:
         raise ValueError("Division by zero is not allowed")
     except RecursionError:
         raise ValueError("Expression too complex - recursion depth exceeded")
+    except ValueError:
+        raise
     except Exception as e:
         raise ValueError(f"Failed to evaluate expression: {expr}") from e
 
@@ -96,5 +80,36 @@ def math(question: str) -> int | float:
     return result
 
 
+@mcp.tool
+def math(question: str, mode: Mode = "float") -> int | float | str:
+    """Solve a natural-language arithmetic question, e.g. "what's (3 + 5) x 12?".
+    Returns a number; integers are returned without a decimal.
+    With mode "decimal" or "fraction" the exact result is returned as a string.
+    """
+    return _solve(question, mode)
+
+
+@mcp.tool
+def math_batch(questions: list[str], mode: Mode = "float") -> list[dict]:
+    """Solve many arithmetic questions in one call, e.g. to check a table of figures.
+    Returns one item per question, in order: {"result": number} or {"error": message}.
+    """
+    if len(questions) > MAX_BATCH_SIZE:
+        raise ValueError(f"Too many questions. Maximum {MAX_BATCH_SIZE} per batch.")
+
+    # Identical questions are evaluated once; compiled programs are shared
+    # across questions through the engine's expression cache.
+    solved: dict[str, dict] = {}
+    results = []
+    for question in questions:
+        if question not in solved:
+            try:
+                solved[question] = {"result": _solve(question, mode)}
+            except ValueError as e:
+                solved[question] = {"error": str(e)}
+        results.append(solved[question])
+    return results
+
+
 if __name__ == "__main__":
     mcp.run()
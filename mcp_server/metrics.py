@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+"""Tool-call instrumentation for the FastMCP servers.
+
+``install_metrics(mcp)`` adds a middleware that records, per tool, call counts,
+error counts, latency and payload-size histograms, and serves them in
+Prometheus text format on ``/metrics`` next to ``/mcp``.
+
+Metrics are kept in process memory. Under the multi-worker launcher each
+scrape of ``/metrics`` reaches whichever worker accepts the connection, so
+every series carries a ``worker`` label (``MCP_WORKER_ID`` or the pid) and
+``mcp_worker_start_time_seconds`` exposes when that worker started. Aggregate
+across workers in the query, e.g. ``sum without (worker) (rate(...))``; a
+restarted worker shows up as a new series instead of a counter reset.
+"""
+import json
+import os
+import time
+from bisect import bisect_left
+
+from fastmcp.server.middleware import Middleware, MiddlewareContext
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse
+
+
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (64, 256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+
+class Histogram:
+    """Fixed-bucket histogram; bucket counts are made cumulative on render."""
+
+    __slots__ = ("buckets", "counts", "total", "count")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+
+    def render(self, name: str, labels: str) -> list[str]:
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {self.count}')
+        lines.append(f"{name}_sum{{{labels}}} {self.total}")
+        lines.append(f"{name}_count{{{labels}}} {self.count}")
+        return lines
+
+
+class ToolStats:
+    __slots__ = ("calls", "errors", "latency", "request_bytes", "response_bytes")
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.request_bytes = Histogram(SIZE_BUCKETS)
+        self.response_bytes = Histogram(SIZE_BUCKETS)
+
+
+class ToolMetrics:
+    """Per-tool metrics registry."""
+
+    def __init__(self, server: str, worker: str | None = None):
+        self.server = server
+        self.worker = worker
+        self.started = time.time()
+        self.tools: dict[str, ToolStats] = {}
+
+    def worker_id(self) -> str:
+        # Resolved at render time: the registry may be created before a fork
+        return self.worker or os.getenv("MCP_WORKER_ID") or str(os.getpid())
+
+    def observe(self, tool: str, seconds: float, request_bytes: int, response_bytes: int, error: bool):
+        stats = self.tools.get(tool)
+        if stats is None:
+            stats = self.tools[tool] = ToolStats()
+        stats.calls += 1
+        if error:
+            stats.errors += 1
+        stats.latency.observe(seconds)
+        stats.request_bytes.observe(request_bytes)
+        stats.response_bytes.observe(response_bytes)
+
+    def render(self) -> str:
+        base = f'server="{self.server}",worker="{self.worker_id()}"'
+        lines = [
+            "# HELP mcp_worker_start_time_seconds Start time of the worker process serving this scrape.",
+            "# TYPE mcp_worker_start_time_seconds gauge",
+            f"mcp_worker_start_time_seconds{{{base}}} {self.started}",
+            "# HELP mcp_tool_calls_total Tool calls handled.",
+            "# TYPE mcp_tool_calls_total counter",
+        ]
+        labelled = [(f'{base},tool="{tool}"', stats) for tool, stats in sorted(self.tools.items())]
+        lines += [f"mcp_tool_calls_total{{{labels}}} {stats.calls}" for labels, stats in labelled]
+        lines += [
+            "# HELP mcp_tool_errors_total Tool calls that raised an error.",
+            "# TYPE mcp_tool_errors_total counter",
+        ]
+        lines += [f"mcp_tool_errors_total{{{labels}}} {stats.errors}" for labels, stats in labelled]
+        for name, attr, help_text in (
+            ("mcp_tool_duration_seconds", "latency", "Tool call latency in seconds."),
+            ("mcp_tool_request_bytes", "request_bytes", "Size of tool call arguments in bytes."),
+            ("mcp_tool_response_bytes", "response_bytes", "Size of tool call results in bytes."),
+        ):
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+            for labels, stats in labelled:
+                lines += getattr(stats, attr).render(name, labels)
+        return "\n".join(lines) + "\n"
+
+
+def _result_size(result) -> int:
+    content = getattr(result, "content", None)
+    if content is None:
+        return len(str(result))
+    return sum(len(getattr(block, "text", None) or "") for block in content)
+
+
+class MetricsMiddleware(Middleware):
+    """Record latency, payload sizes and errors of every tools/call."""
+
+    def __init__(self, metrics: ToolMetrics):
+        self.metrics = metrics
+
+    async def on_call_tool(self, context: MiddlewareContext, call_next):
+        message = context.message
+        arguments = message.arguments or {}
+        request_bytes = len(json.dumps(arguments, ensure_ascii=False, default=str)) if arguments else 0
+        start = time.perf_counter()
+        try:
+            result = await call_next(context)
+        except Exception:
+            self.metrics.observe(message.name, time.perf_counter() - start, request_bytes, 0, error=True)
+            raise
+        self.metrics.observe(message.name, time.perf_counter() - start, request_bytes,
+                             _result_size(result), error=bool(getattr(result, "isError", False)))
+        return result
+
+
+def install_metrics(mcp, path: str = "/metrics") -> ToolMetrics:
+    """Attach the metrics middleware and a Prometheus route to a FastMCP server."""
+    metrics = ToolMetrics(mcp.name)
+    mcp.add_middleware(MetricsMiddleware(metrics))
+
+    @mcp.custom_route(path, methods=["GET"])
+    async def metrics_endpoint(request: Request) -> PlainTextResponse:
+        return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+    return metrics
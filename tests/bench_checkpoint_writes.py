@@ -0,0 +1,89 @@
+"""
+Checkpoint 写入基准：用 order_graph（规则抽取覆盖全部字段，不调用大模型）连续处理订单，
+对比 SqliteSaver 与 BatchedSqliteSaver（sync / async）的每秒 checkpoint 写入数、事务数和单次调用延迟。
+
+运行：python tests/bench_checkpoint_writes.py [订单数]
+"""
+
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+# order_graph 在导入时会创建 ChatOpenAI，基准中不会真正发出请求
+os.environ.setdefault("DASHSCOPE_API_KEY", "bench")
+os.environ.setdefault("DASHSCOPE_BASE_URL", "http://127.0.0.1:9/v1")
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from langchain_core.messages import HumanMessage
+from langgraph.checkpoint.sqlite import SqliteSaver
+
+import order_graph
+from checkpoint_saver import BatchedSqliteSaver
+
+QUERY = "客户张三要10条红色A001款"
+
+
+def count_transactions(path: str) -> tuple[int, int]:
+    """(checkpoint 数, SqliteSaver 的提交次数 = checkpoint 数 + put_writes 调用数)"""
+    with sqlite3.connect(path) as conn:
+        checkpoints = conn.execute("SELECT COUNT(*) FROM checkpoints").fetchone()[0]
+        put_writes = conn.execute(
+            "SELECT COUNT(*) FROM (SELECT DISTINCT thread_id, checkpoint_id, task_id FROM writes)"
+        ).fetchone()[0]
+    return checkpoints, checkpoints + put_writes
+
+
+def run(name: str, make_saver, orders: int) -> dict:
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "checkpoints.db")
+        conn = sqlite3.connect(path, check_same_thread=False)
+        saver = make_saver(conn)
+        graph = order_graph.build_order_graph(checkpointer=saver)
+        latencies = []
+        started = time.perf_counter()
+        for i in range(orders):
+            call_started = time.perf_counter()
+            graph.invoke(
+                {"messages": [HumanMessage(content=QUERY)], "extracted_fields": {}, "missing_fields": []},
+                {"configurable": {"thread_id": f"order-{i}"}},
+            )
+            latencies.append((time.perf_counter() - call_started) * 1000)
+        if isinstance(saver, BatchedSqliteSaver):
+            saver.close()
+        elapsed = time.perf_counter() - started
+        conn.close()
+        checkpoints, transactions = count_transactions(path)
+        if isinstance(saver, BatchedSqliteSaver):
+            transactions = saver.stats["transactions"]
+    latencies.sort()
+    return {
+        "name": name,
+        "checkpoints": checkpoints,
+        "transactions": transactions,
+        "writes_per_s": checkpoints / elapsed,
+        "p50_ms": latencies[len(latencies) // 2],
+        "p99_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))],
+    }
+
+
+def main():
+    orders = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    savers = [
+        ("SqliteSaver", lambda conn: SqliteSaver(conn)),
+        ("batched sync", lambda conn: BatchedSqliteSaver(conn, durability="sync")),
+        ("batched async", lambda conn: BatchedSqliteSaver(conn, durability="async")),
+    ]
+    print(f"订单数: {orders}")
+    print(f"{'saver':<16}{'checkpoints':>12}{'txns':>8}{'writes/s':>12}{'p50 ms':>10}{'p99 ms':>10}")
+    for name, make_saver in savers:
+        report = run(name, make_saver, orders)
+        print(
+            f"{report['name']:<16}{report['checkpoints']:>12}{report['transactions']:>8}"
+            f"{report['writes_per_s']:>12.0f}{report['p50_ms']:>10.2f}{report['p99_ms']:>10.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+增量 checkpoint 基准：不调用大模型的 MessagesState 对话图连续对话 100 / 1000 轮，
+对比 SqliteSaver 与 DeltaSqliteSaver 的库文件大小、写入耗时、get_state 延迟和完整 get_state_history 耗时。
+
+运行：python tests/bench_delta_checkpoint.py [轮数 ...]
+"""
+
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.checkpoint.sqlite import SqliteSaver
+from langgraph.graph import START, MessagesState, StateGraph
+
+from checkpoint_saver import BatchedSqliteSaver
+from delta_checkpoint import DeltaSqliteSaver
+
+QUESTION = "客户张三要{turn}条红色A001款，请确认库存、交期和价格，并给出替代款建议。"
+ANSWER = "第{turn}轮：A001 红色现货 {turn} 条，预计 3 天发货，单价 25 元；如需替代可选 A002 深红色，库存充足。"
+
+
+def reply(state: MessagesState):
+    turn = sum(isinstance(message, HumanMessage) for message in state["messages"])
+    return {"messages": [AIMessage(content=ANSWER.format(turn=turn))]}
+
+
+def build_chat_graph(checkpointer):
+    builder = StateGraph(MessagesState)
+    builder.add_node("reply", reply)
+    builder.add_edge(START, "reply")
+    return builder.compile(checkpointer=checkpointer)
+
+
+def database_bytes(path: str) -> int:
+    with sqlite3.connect(path) as conn:
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        conn.execute("VACUUM")
+    return os.path.getsize(path)
+
+
+def run(name: str, make_saver, turns: int) -> dict:
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "checkpoints.db")
+        conn = sqlite3.connect(path, check_same_thread=False)
+        saver = make_saver(conn)
+        graph = build_chat_graph(saver)
+        config = {"configurable": {"thread_id": "chat"}}
+        started = time.perf_counter()
+        for turn in range(1, turns + 1):
+            graph.invoke({"messages": [HumanMessage(content=QUESTION.format(turn=turn))]}, config)
+        write_s = time.perf_counter() - started
+        if isinstance(saver, BatchedSqliteSaver):
+            saver.close()
+        conn.close()
+        size = database_bytes(path)
+
+        # 重新打开，读取走冷缓存
+        conn = sqlite3.connect(path, check_same_thread=False)
+        graph = build_chat_graph(make_saver(conn))
+        started = time.perf_counter()
+        state = graph.get_state(config)
+        get_state_ms = (time.perf_counter() - started) * 1000
+        started = time.perf_counter()
+        history = list(graph.get_state_history(config))
+        history_ms = (time.perf_counter() - started) * 1000
+        conn.close()
+    assert len(state.values["messages"]) == turns * 2
+    return {
+        "name": name,
+        "checkpoints": len(history),
+        "bytes": size,
+        "write_s": write_s,
+        "get_state_ms": get_state_ms,
+        "history_ms": history_ms,
+    }
+
+
+def main():
+    rounds = [int(arg) for arg in sys.argv[1:]] or [100, 1000]
+    savers = [
+        ("SqliteSaver", lambda conn: SqliteSaver(conn)),
+        ("DeltaSqliteSaver", lambda conn: DeltaSqliteSaver(conn)),
+    ]
+    for turns in rounds:
+        print(f"对话轮数: {turns}")
+        print(f"{'saver':<18}{'checkpoints':>12}{'DB KiB':>10}{'写入 s':>10}{'get_state ms':>14}{'history ms':>12}")
+        for name, make_saver in savers:
+            report = run(name, make_saver, turns)
+            print(
+                f"{report['name']:<18}{report['checkpoints']:>12}{report['bytes'] / 1024:>10.0f}"
+                f"{report['write_s']:>10.2f}{report['get_state_ms']:>14.2f}{report['history_ms']:>12.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
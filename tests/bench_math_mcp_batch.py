@@ -0,0 +1,70 @@
+"""
+math_mcp 批量计算基准：N 次 math 调用 vs 一次 math_batch 调用（streamable-http）。
+
+先在仓库根目录启动服务：
+    python -m mcp_server.math_mcp
+
+再运行：
+    python tests/bench_math_mcp_batch.py [N]
+
+可用环境变量 MATH_MCP_URL 指定服务地址，默认 http://127.0.0.1:8001/mcp
+"""
+
+import asyncio
+import os
+import random
+import sys
+import time
+
+from fastmcp import Client
+
+MATH_MCP_URL = os.getenv("MATH_MCP_URL", "http://127.0.0.1:8001/mcp")
+
+
+def make_questions(n: int) -> list[str]:
+    """生成一张表格式的算式，如 "(12 + 5) × 4 是多少"
+
+    问题里不能带行号等其他数字，math 会把它们当作算式的一部分。
+    """
+    rng = random.Random(0)
+    return [
+        f"({rng.randint(1, 999)} + {rng.randint(1, 999)}) × {rng.randint(1, 99)} 是多少"
+        for _ in range(n)
+    ]
+
+
+async def run_single(client: Client, questions: list[str]) -> float:
+    start = time.perf_counter()
+    for question in questions:
+        await client.call_tool("math", {"question": question})
+    return time.perf_counter() - start
+
+
+async def run_batch(client: Client, questions: list[str]) -> float:
+    start = time.perf_counter()
+    result = await client.call_tool("math_batch", {"questions": questions})
+    elapsed = time.perf_counter() - start
+    errors = [item for item in result.structured_content["result"] if "error" in item]
+    if errors:
+        raise SystemExit(f"math_batch 有 {len(errors)} 条失败，例如: {errors[0]['error']}")
+    return elapsed
+
+
+async def main(n: int):
+    questions = make_questions(n)
+    async with Client(MATH_MCP_URL) as client:
+        # 预热连接与服务端缓存
+        await client.call_tool("math", {"question": "1 + 1"})
+
+        single = await run_single(client, questions)
+        batch = await run_batch(client, questions)
+
+    print(f"服务地址: {MATH_MCP_URL}，算式数: {n}")
+    print(f"{'mode':<12}{'total ms':>12}{'per item ms':>14}")
+    print(f"{'single':<12}{single * 1000:>12.1f}{single * 1000 / n:>14.3f}")
+    print(f"{'batch':<12}{batch * 1000:>12.1f}{batch * 1000 / n:>14.3f}")
+    print(f"加速比: {single / batch:.1f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 200))
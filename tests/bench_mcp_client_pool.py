@@ -0,0 +1,63 @@
+"""
+MCP 工具调用延迟基准：langchain-mcp-adapters 默认工具（每次调用新建会话） vs MCPClientPool（常驻会话）。
+
+先在仓库根目录启动服务：
+    python -m mcp_server.math_mcp
+
+再运行：
+    python tests/bench_mcp_client_pool.py [N]
+"""
+
+import asyncio
+import os
+import sys
+import time
+
+from langchain_mcp_adapters.client import MultiServerMCPClient
+
+from mcp_client_pool import MCPClientPool
+
+CONNECTIONS = {
+    "math": {
+        "url": os.getenv("MATH_MCP_URL", "http://127.0.0.1:8001/mcp"),
+        "transport": "streamable_http",
+    },
+}
+ARGS = {"question": "(3 + 5) * 12"}
+
+
+def summarize(name: str, latencies: list[float]):
+    ordered = sorted(latencies)
+    p50 = ordered[len(ordered) // 2] * 1000
+    p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))] * 1000
+    mean = sum(ordered) / len(ordered) * 1000
+    print(f"{name:<10}{mean:>10.2f}{p50:>10.2f}{p99:>10.2f}")
+
+
+async def measure(tool, n: int) -> list[float]:
+    await tool.ainvoke(ARGS)  # 预热
+    latencies = []
+    for _ in range(n):
+        start = time.perf_counter()
+        await tool.ainvoke(ARGS)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+async def main(n: int):
+    client = MultiServerMCPClient(CONNECTIONS)
+    default_tool = next(t for t in await client.get_tools() if t.name == "math")
+    default = await measure(default_tool, n)
+
+    async with MCPClientPool(CONNECTIONS) as pool:
+        pooled_tool = next(t for t in await pool.get_tools() if t.name == "math")
+        pooled = await measure(pooled_tool, n)
+
+    print(f"calls per mode: {n}")
+    print(f"{'mode':<10}{'mean ms':>10}{'p50 ms':>10}{'p99 ms':>10}")
+    summarize("default", default)
+    summarize("pooled", pooled)
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 200))
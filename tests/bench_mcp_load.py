@@ -0,0 +1,112 @@
+"""
+MCP 服务压测脚本：并发调用工具，输出每秒请求数与 p50 / p99 延迟。
+
+先启动服务（单进程或多 worker）：
+    python -m mcp_server.math_mcp
+    python -m mcp_server.launcher math_mcp --workers 4
+
+再运行：
+    python tests/bench_mcp_load.py --url http://127.0.0.1:8001/mcp --concurrency 32 --requests 5000
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+
+import httpx
+
+HEADERS = {
+    "Content-Type": "application/json",
+    "Accept": "application/json, text/event-stream",
+}
+
+
+async def open_session(client: httpx.AsyncClient, url: str) -> dict:
+    """完成 initialize 握手；有状态服务会返回 mcp-session-id，无状态服务则不需要"""
+    payload = {
+        "jsonrpc": "2.0",
+        "id": 0,
+        "method": "initialize",
+        "params": {
+            "protocolVersion": "2025-06-18",
+            "capabilities": {},
+            "clientInfo": {"name": "bench_mcp_load", "version": "0.1"},
+        },
+    }
+    response = await client.post(url, headers=HEADERS, json=payload)
+    response.raise_for_status()
+    headers = dict(HEADERS)
+    session_id = response.headers.get("mcp-session-id")
+    if session_id:
+        headers["mcp-session-id"] = session_id
+    await client.post(url, headers=headers, json={"jsonrpc": "2.0", "method": "notifications/initialized"})
+    return headers
+
+
+async def worker(client, url, tool, arguments, counter, latencies, errors):
+    headers = await open_session(client, url)
+    while True:
+        request_id = counter[0]
+        if request_id <= 0:
+            return
+        counter[0] -= 1
+        payload = {
+            "jsonrpc": "2.0",
+            "id": request_id,
+            "method": "tools/call",
+            "params": {"name": tool, "arguments": arguments},
+        }
+        start = time.perf_counter()
+        try:
+            response = await client.post(url, headers=headers, json=payload)
+            if response.status_code != 200 or '"isError":true' in response.text.replace(" ", ""):
+                errors.append(response.status_code)
+        except httpx.HTTPError as e:
+            errors.append(type(e).__name__)
+        latencies.append(time.perf_counter() - start)
+
+
+def percentile(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+
+async def main(args):
+    arguments = json.loads(args.arguments)
+    latencies: list[float] = []
+    errors: list = []
+    counter = [args.requests]
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=30) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*[
+            worker(client, args.url, args.tool, arguments, counter, latencies, errors)
+            for _ in range(args.concurrency)
+        ])
+        elapsed = time.perf_counter() - start
+
+    print(f"url: {args.url}  tool: {args.tool}  concurrency: {args.concurrency}")
+    print(f"requests: {len(latencies)}  errors: {len(errors)}  elapsed: {elapsed:.2f}s")
+    print(f"throughput: {len(latencies) / elapsed:.1f} req/s")
+    print(f"latency p50: {percentile(latencies, 0.50) * 1000:.2f} ms  "
+          f"p99: {percentile(latencies, 0.99) * 1000:.2f} ms")
+    # 错误响应也很快，失败过多时吞吐量没有意义
+    if errors and (len(errors) == len(latencies) or len(errors) > args.max_error_rate * len(latencies)):
+        print(f"error rate {len(errors) / len(latencies):.1%} exceeds {args.max_error_rate:.1%}, "
+              f"first error: {errors[0]}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="MCP streamable-http load generator")
+    parser.add_argument("--url", default="http://127.0.0.1:8001/mcp")
+    parser.add_argument("--tool", default="math")
+    parser.add_argument("--arguments", default='{"question": "(3 + 5) * 12"}')
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--max-error-rate", type=float, default=0.01,
+                        help="exit non-zero when more than this fraction of requests fail")
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,46 @@
+"""
+MCP 指标中间件开销微基准：对比直接调用工具与经过 MetricsMiddleware 调用的单次耗时。
+
+运行：python tests/bench_mcp_metrics.py [N]
+"""
+
+import asyncio
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mcp_server.metrics import MetricsMiddleware, ToolMetrics
+
+
+async def call_next(context):
+    """模拟一个立即返回的工具"""
+    return SimpleNamespace(content=[SimpleNamespace(text="96")], isError=False)
+
+
+async def run(n: int):
+    context = SimpleNamespace(message=SimpleNamespace(name="math", arguments={"question": "(3 + 5) * 12"}))
+    middleware = MetricsMiddleware(ToolMetrics("bench"))
+
+    start = time.perf_counter()
+    for _ in range(n):
+        await call_next(context)
+    bare = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(n):
+        await middleware.on_call_tool(context, call_next)
+    instrumented = time.perf_counter() - start
+
+    print(f"calls: {n}")
+    print(f"bare:         {bare / n * 1e6:.2f} us/call")
+    print(f"instrumented: {instrumented / n * 1e6:.2f} us/call")
+    print(f"overhead:     {(instrumented - bare) / n * 1e6:.2f} us/call")
+    print()
+    print(middleware.metrics.render())
+
+
+if __name__ == "__main__":
+    asyncio.run(run(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000))
@@ -0,0 +1,128 @@
+"""
+订单字段抽取回放基准：对比旧的 ```json 文本解析与 OrderFields 结构化抽取。
+
+用一组录制好的模型输出（含尾逗号、截断、类型错误等格式问题）回放对话，
+统计每完成一单需要的用户轮数（含最后一轮 "确认"），不需要真实的大模型服务。
+
+运行：python tests/bench_order_extraction.py
+"""
+
+import json
+import os
+import sys
+
+# order_graph 在导入时会创建 ChatOpenAI，回放时不会真正发出请求
+os.environ.setdefault("DASHSCOPE_API_KEY", "replay")
+os.environ.setdefault("DASHSCOPE_BASE_URL", "http://127.0.0.1:9/v1")
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from langchain_core.messages import AIMessageChunk, HumanMessage
+
+import order_graph
+
+MAX_TURNS = 5
+
+# 每个用例：用户输入 + 模型依次给出的原始参数（最后一条在后续调用中重复使用）
+REPLAY_CASES = [
+    {
+        "text": "李四那边要5条蓝色的A002",
+        "outputs": ['{"product_code": "A002", "color": "蓝色", "quantity": 5, "customer": "李四"}'],
+    },
+    {
+        "text": "张三订十条红的A001",
+        "outputs": [
+            '{"product_code": "A001", "color": "红色", "quantity": 10, "customer": "张三",}',
+            '{"product_code": "A001", "color": "红色", "quantity": 10, "customer": "张三"}',
+        ],
+    },
+    {
+        "text": "王五想要二十条黑色A003",
+        "outputs": [
+            '{"product_code": "A003", "color": "黑色", "quantity": "二十条", "customer": "王五"}',
+            '{"product_code": "A003", "color": "黑色", "quantity": 20, "customer": "王五"}',
+        ],
+    },
+    {
+        "text": "赵六拿3条白色A001",
+        "outputs": [
+            '{"product_code": "A001", "color": "白色", "quantity": 3, "cust',
+            '{"product_code": "A001", "color": "白色", "quantity": 3, "customer": "赵六"}',
+        ],
+    },
+    {
+        "text": "给孙七下8条灰色A002",
+        "outputs": [
+            '{"product_code": "A002", "color": "灰色" "quantity": 8, "customer": "孙七"}',
+            '{"product_code": "A002", "color": "灰色" "quantity": 8, "customer": "孙七"}',
+            '{"product_code": "A002", "color": "灰色", "quantity": 8, "customer": "孙七"}',
+        ],
+    },
+]
+
+
+class ReplayModel:
+    """按顺序回放录制的模型输出，stream 以工具调用参数分片的形式吐出"""
+
+    def __init__(self, outputs):
+        self.outputs = list(outputs)
+        self.calls = 0
+
+    def _next(self) -> str:
+        self.calls += 1
+        return self.outputs.pop(0) if len(self.outputs) > 1 else self.outputs[0]
+
+    def stream(self, messages):
+        raw = self._next()
+        for i in range(0, len(raw), 8):
+            yield AIMessageChunk(
+                content="",
+                tool_call_chunks=[{"name": None, "args": raw[i:i + 8], "id": None, "index": 0}],
+            )
+
+    def invoke(self, messages):
+        return AIMessageChunk(content=f'```json\n{{"extracted_fields": {self._next()}}}\n```')
+
+
+def legacy_extract(model: ReplayModel, messages) -> dict:
+    """旧实现：拆分 ```json 代码块后 json.loads，失败时视为全部缺失"""
+    content = model.invoke(messages).content
+    try:
+        if "```json" in content:
+            content = content.split("```json")[1].split("```")[0].strip()
+        elif "```" in content:
+            content = content.split("```")[1].split("```")[0].strip()
+        return json.loads(content).get("extracted_fields", {})
+    except json.JSONDecodeError:
+        return {}
+
+
+def structured_extract(model: ReplayModel, messages) -> dict:
+    order_graph.extraction_llm = model
+    return order_graph.structured_extract(messages)
+
+
+def replay(extract, case) -> tuple:
+    """返回 (完成订单所需用户轮数, 模型调用次数)；字段缺失时用户重发一轮"""
+    model = ReplayModel(case["outputs"])
+    messages = [HumanMessage(content=case["text"])]
+    fields = {}
+    for turn in range(1, MAX_TURNS + 1):
+        fields.update(extract(model, messages))
+        if all(fields.get(key) not in (None, "") for key in order_graph.FIELD_NAMES):
+            return turn + 1, model.calls
+        messages = messages + [HumanMessage(content=case["text"])]
+    return MAX_TURNS + 1, model.calls
+
+
+def main():
+    print(f"{'strategy':<12}{'orders':>8}{'turns':>8}{'turns/order':>14}{'llm calls':>12}")
+    for name, extract in [("legacy", legacy_extract), ("structured", structured_extract)]:
+        results = [replay(extract, case) for case in REPLAY_CASES]
+        turns = sum(r[0] for r in results)
+        calls = sum(r[1] for r in results)
+        print(f"{name:<12}{len(results):>8}{turns:>8}{turns / len(results):>14.2f}{calls:>12}")
+    print(f"\n结构化抽取统计: {order_graph.get_extract_stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+"""
+增量编码的 checkpoint：messages 只保存相对父 checkpoint 新增的消息，读取时沿父链还原，blob 压缩存储。
+
+SqliteSaver 每个 checkpoint 都序列化完整的 messages，n 轮对话累计写入 O(n²) 字节，
+get_state_history 也要把每个 checkpoint 的完整副本各反序列化一遍。DeltaSqliteSaver：
+- 父 checkpoint 的消息是当前消息的前缀时，只保存 {父 ID, 前缀长度, 新增消息}；
+  前缀用 == 比较，按 ID 替换或删除过消息时自动退回完整保存；
+- 每隔 keyframe_interval 个 checkpoint 保存一次完整消息（关键帧），还原时最多回溯这么多步；
+- 最近用到的 checkpoint 消息列表放在 LRU 缓存里，写入时直接取父节点；
+  list 从最旧的一项开始还原，读取完整历史时不再额外查询父节点；
+- 新 checkpoint 所在事务提交成功后才进入缓存，增量只会指向已落库的父节点；
+  durability="async" 时父节点还在后台队列里就保存完整消息，提交失败也不会留下找不到父节点的增量；
+- blob 由 CompressedSerializer 用 zlib 压缩，type 加 "+zlib" 后缀，未压缩的旧数据照常读取。
+
+继承 BatchedSqliteSaver，WAL、批量提交和 durability 参数照常可用。
+
+用法：
+    with DeltaSqliteSaver.from_conn_string("short-memory.db") as checkpointer:
+        graph = builder.compile(checkpointer=checkpointer)
+
+运行 `python tests/bench_delta_checkpoint.py` 对比 100 / 1000 轮对话的存储字节数和读取延迟。
+"""
+
+import threading
+import zlib
+from collections import OrderedDict
+from collections.abc import Iterator
+from typing import Any, Optional
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    SerializerProtocol,
+)
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+from checkpoint_saver import _CHECKPOINT_SQL, Batch, BatchedSqliteSaver
+
+DELTA_KEY = "__delta_parent__"
+COMPRESSED_SUFFIX = "+zlib"
+
+
+class CompressedSerializer:
+    """包装任意 SerializerProtocol：不小于 min_size 的 blob 用 zlib 压缩"""
+
+    def __init__(self, inner: Optional[SerializerProtocol] = None, level: int = 6, min_size: int = 256):
+        self.inner = inner or JsonPlusSerializer()
+        self.level = level
+        self.min_size = min_size
+
+    def dumps_typed(self, obj: Any) -> tuple[str, bytes]:
+        type_, data = self.inner.dumps_typed(obj)
+        if len(data) < self.min_size:
+            return type_, data
+        return type_ + COMPRESSED_SUFFIX, zlib.compress(data, self.level)
+
+    def loads_typed(self, data: tuple[str, bytes]) -> Any:
+        type_, blob = data
+        if type_.endswith(COMPRESSED_SUFFIX):
+            return self.inner.loads_typed((type_[: -len(COMPRESSED_SUFFIX)], zlib.decompress(blob)))
+        return self.inner.loads_typed(data)
+
+
+def _is_delta(value) -> bool:
+    return isinstance(value, dict) and DELTA_KEY in value
+
+
+class DeltaSqliteSaver(BatchedSqliteSaver):
+    def __init__(
+        self,
+        conn,
+        *,
+        channel: str = "messages",
+        keyframe_interval: int = 50,
+        cache_size: int = 256,
+        serde: Optional[SerializerProtocol] = None,
+        **kwargs,
+    ) -> None:
+        super().__init__(conn, serde=serde or CompressedSerializer(), **kwargs)
+        self.channel = channel
+        self.keyframe_interval = keyframe_interval
+        self.cache_size = cache_size
+        # (thread_id, checkpoint_ns, checkpoint_id) -> (消息元组, 距最近关键帧的步数)
+        self._cache: "OrderedDict[tuple[str, str, str], tuple[tuple, int]]" = OrderedDict()
+        # 已写入但尚未提交的 checkpoint，提交成功后移入 _cache
+        self._uncommitted: dict[tuple[str, str, str], tuple[tuple, int]] = {}
+        # async 模式下后台写线程提交后会更新缓存
+        self._cache_lock = threading.Lock()
+        self.stats.update({"keyframes": 0, "deltas": 0, "cache_hits": 0, "parent_loads": 0})
+
+    # ---- 写入：只保存新增消息 ----
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        messages = checkpoint["channel_values"].get(self.channel)
+        if not isinstance(messages, list):
+            return super().put(config, checkpoint, metadata, new_versions)
+
+        configurable = config["configurable"]
+        thread_id, checkpoint_ns = str(configurable["thread_id"]), configurable.get("checkpoint_ns", "")
+        parent_id = configurable.get("checkpoint_id")
+        # 写入路径不查库：父节点不在缓存里（例如进程重启后）就保存完整消息
+        parent = self._cache_get((thread_id, checkpoint_ns, parent_id)) if parent_id else None
+        encoded, depth = messages, 0
+        if parent is not None:
+            parent_messages, parent_depth = parent
+            prefix = len(parent_messages)
+            if (
+                parent_depth + 1 < self.keyframe_interval
+                and prefix <= len(messages)
+                and tuple(messages[:prefix]) == parent_messages
+            ):
+                encoded = {DELTA_KEY: parent_id, "prefix": prefix, "tail": messages[prefix:]}
+                depth = parent_depth + 1
+        self.stats["deltas" if depth else "keyframes"] += 1
+        with self._cache_lock:
+            self._uncommitted[(thread_id, checkpoint_ns, checkpoint["id"])] = (tuple(messages), depth)
+        checkpoint = {**checkpoint, "channel_values": {**checkpoint["channel_values"], self.channel: encoded}}
+        return super().put(config, checkpoint, metadata, new_versions)
+
+    def _commit(self, batches: list[Batch]):
+        keys = [
+            (row[0], row[1], row[2])
+            for batch in batches
+            for sql, rows in batch
+            if sql == _CHECKPOINT_SQL
+            for row in rows
+        ]
+        try:
+            super()._commit(batches)
+        finally:
+            with self._cache_lock:
+                entries = [(key, self._uncommitted.pop(key, None)) for key in keys]
+        for key, entry in entries:
+            if entry is not None:
+                self._cache_put(key, *entry)
+
+    # ---- 读取：沿父链还原 ----
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        checkpoint_tuple = super().get_tuple(config)
+        return self._decode(checkpoint_tuple) if checkpoint_tuple is not None else None
+
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        # SqliteSaver.list 迭代期间持有连接锁，先取完再还原（还原时可能要查父节点）
+        items = [*super().list(config, filter=filter, before=before, limit=limit)]
+        # 结果按新到旧排列，从最旧的开始还原，后面每一项的父节点都已在缓存里
+        for item in reversed(items):
+            self._decode(item)
+        return iter(items)
+
+    def delete_thread(self, thread_id: str) -> None:
+        super().delete_thread(thread_id)
+        with self._cache_lock:
+            for key in [key for key in self._cache if key[0] == str(thread_id)]:
+                del self._cache[key]
+
+    def _decode(self, checkpoint_tuple: CheckpointTuple) -> CheckpointTuple:
+        values = checkpoint_tuple.checkpoint["channel_values"]
+        encoded = values.get(self.channel)
+        configurable = checkpoint_tuple.config["configurable"]
+        key = (str(configurable["thread_id"]), configurable.get("checkpoint_ns", ""), configurable["checkpoint_id"])
+        if isinstance(encoded, list):
+            self._cache_put(key, tuple(encoded), 0)
+        elif _is_delta(encoded):
+            # 刚反序列化出的对象，可以直接替换
+            values[self.channel] = list(self._resolve(key, encoded))
+        return checkpoint_tuple
+
+    def _resolve(self, key: tuple[str, str, str], encoded: dict) -> tuple:
+        thread_id, checkpoint_ns, _ = key
+        chain = [(key, encoded)]
+        while True:
+            parent_key = (thread_id, checkpoint_ns, chain[-1][1][DELTA_KEY])
+            cached = self._cache_get(parent_key)
+            if cached is not None:
+                messages, depth = cached
+                break
+            parent = self._load_encoded(parent_key)
+            if not _is_delta(parent):
+                messages, depth = tuple(parent), 0
+                self._cache_put(parent_key, messages, depth)
+                break
+            chain.append((parent_key, parent))
+        for chain_key, delta in reversed(chain):
+            messages = messages[: delta["prefix"]] + tuple(delta["tail"])
+            depth += 1
+            self._cache_put(chain_key, messages, depth)
+        return messages
+
+    def _load_encoded(self, key: tuple[str, str, str]):
+        self.stats["parent_loads"] += 1
+        with self.cursor(transaction=False) as cur:
+            cur.execute(
+                "SELECT type, checkpoint FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+                key,
+            )
+            row = cur.fetchone()
+        if row is None:
+            raise ValueError(f"增量 checkpoint 的父节点不存在: {key[2]}")
+        return self.serde.loads_typed(row)["channel_values"].get(self.channel, [])
+
+    def _cache_get(self, key: tuple[str, str, str]) -> Optional[tuple[tuple, int]]:
+        with self._cache_lock:
+            entry = self._cache.get(key)
+            if entry is not None:
+                self._cache.move_to_end(key)
+                self.stats["cache_hits"] += 1
+        return entry
+
+    def _cache_put(self, key: tuple[str, str, str], messages: tuple, depth: int):
+        with self._cache_lock:
+            self._cache[key] = (messages, depth)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
@@ -8,6 +8,7 @@ from langchain_openai import ChatOpenAI
 NEO4J_URI = "bolt://120.-.-.-:7687"
 NEO4J_USERNAME = "neo4j"
 NEO4J_PASSWORD = "neo4j@-"  # 替换为你的密码
+NEO4J_POOL_SIZE = 20  # 连接池大小；异步场景可改用 neo4j_pool.shared_driver 共享连接池和查询缓存
 
 # 2. 硅基流动 API 配置
 SILICONFLOW_API_KEY = 'sk-kodzewuwqkxlypmg-'
@@ -24,7 +25,8 @@ def query_existing_graph():
         url=NEO4J_URI,
         username=NEO4J_USERNAME,
         password=NEO4J_PASSWORD,
-        enhanced_schema=False
+        enhanced_schema=False,
+        driver_config={"max_connection_pool_size": NEO4J_POOL_SIZE},
     )
 
     # 【重要】刷新 Schema
@@ -0,0 +1,79 @@
+"""
+属性节点驻留表：同一个 (group_id, field, value) 始终复用同一个节点 UUID。
+
+ingest_products_with_entities 每个产品都会新建 EntityNode(name=f"{field}:{value}")，
+同一个属性值在图里变成成千上万个重复节点。这里用一张查找表把属性值映射到固定的 UUID：
+- 同一次导入中，不同产品的相同属性值指向同一个节点；
+- UUID 由 (group_id, field, value) 经 uuid5 推导，没有查找表时重复导入也得到同一个 UUID；
+- 查找表保存为 JSON 文件（默认在用户缓存目录，可用环境变量 ATTR_TABLE_PATH 指定），下次导入继续复用，节点写入统一用 MERGE (uuid)，图被清空后也会按原 UUID 重建；
+- stats() 给出复用次数，即少建的节点数。
+"""
+
+import json
+import os
+import uuid
+from pathlib import Path
+from typing import Optional
+
+# 查找表是运行时数据，不写进源码目录
+DEFAULT_TABLE_PATH = Path(os.getenv("ATTR_TABLE_PATH") or Path(
+    os.getenv("XDG_CACHE_HOME") or Path.home() / ".cache", "dive-into-langgraph", "attr_nodes.json",
+))
+
+# 导入时确定性 UUID 的命名空间（product_ingest 的产品、关系、Episode 也用它）
+NODE_UUID_NAMESPACE = uuid.UUID("eaf02198-a454-438f-85cb-755bd13e17b3")
+
+
+def node_uuid(group_id: str, kind: str, *parts) -> str:
+    """按内容推导节点/关系 UUID：同一 group 下相同的 kind 和 parts 总是得到同一个 UUID"""
+    return str(uuid.uuid5(NODE_UUID_NAMESPACE, ":".join([group_id, kind, *map(str, parts)])))
+
+
+class AttributeInterner:
+    def __init__(self, path: Optional[str | Path] = DEFAULT_TABLE_PATH):
+        self.path = Path(path) if path else None
+        self._table: dict[tuple[str, str, str], str] = {}
+        self.created = 0
+        self.reused = 0
+        self._dirty = False
+        self._load()
+
+    def _load(self):
+        if self.path is None or not self.path.exists():
+            return
+        with open(self.path, encoding="utf-8") as file:
+            for entry in json.load(file):
+                self._table[(entry["group_id"], entry["field"], str(entry["value"]))] = entry["uuid"]
+
+    def intern(self, group_id: str, field: str, value) -> tuple[str, bool]:
+        """返回 (节点 UUID, 是否新建)"""
+        key = (group_id, field, str(value))
+        attr_uuid = self._table.get(key)
+        if attr_uuid is not None:
+            self.reused += 1
+            return attr_uuid, False
+        attr_uuid = self._table[key] = node_uuid(group_id, "attr", field, value)
+        self.created += 1
+        self._dirty = True
+        return attr_uuid, True
+
+    def __len__(self) -> int:
+        return len(self._table)
+
+    def save(self):
+        """原子写入查找表（先写临时文件再替换）"""
+        if self.path is None or not self._dirty:
+            return
+        entries = [
+            {"group_id": group_id, "field": field, "value": value, "uuid": node_uuid}
+            for (group_id, field, value), node_uuid in sorted(self._table.items())
+        ]
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump(entries, file, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, self.path)
+        self._dirty = False
+
+    def stats(self) -> dict:
+        return {"entries": len(self._table), "created": self.created, "nodes_saved": self.reused}
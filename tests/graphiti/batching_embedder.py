@@ -0,0 +1,110 @@
+"""
+批量 + 缓存的 Embedder 包装：把并发导入任务里零散的 create(text) 合并成批量请求。
+
+graphiti 导入产品时，每个节点名、每条关系 fact 都会单独调用一次 embedder.create，
+4096 维的 Qwen3-Embedding-8B 每次都是一个 HTTP 往返。BatchingEmbedder：
+- 收集所有并发任务提交的文本，攒满 max_batch_size 条或等待 max_wait_ms 后合并为一次 create_batch；
+- 同一文本在排队或请求中时只发送一次，所有调用方共享结果；
+- 已经算过的文本走 LRU 缓存，不再请求。
+
+用法与 graphiti 的 EmbedderClient 相同（create / create_batch），可直接传给 Graphiti(embedder=...)：
+    embedder = BatchingEmbedder(OpenAIEmbedder(embed_config))
+"""
+
+import asyncio
+from collections import OrderedDict
+from typing import Optional
+
+
+class BatchingEmbedder:
+    def __init__(self, inner, max_batch_size: int = 64, max_wait_ms: float = 20.0, cache_size: int = 2000):
+        self.inner = inner
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, list[float]]" = OrderedDict()
+        self._pending: "OrderedDict[str, asyncio.Future]" = OrderedDict()  # 等待发送
+        self._inflight: dict[str, asyncio.Future] = {}  # 已发送未返回
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: set[asyncio.Task] = set()
+        self.stats = {"requests": 0, "cache_hits": 0, "deduped": 0, "batches": 0, "texts_sent": 0}
+
+    async def create(self, input_data) -> list[float]:
+        # graphiti 调用 create(input_data=[text])；EmbedderClient 对文本列表只返回第一条的向量
+        if isinstance(input_data, list) and input_data and all(isinstance(text, str) for text in input_data):
+            input_data = input_data[0]
+        if not isinstance(input_data, str):
+            # token 序列等非文本输入不做合并，直接交给底层 embedder
+            return await self.inner.create(input_data)
+        return await self._submit(input_data)
+
+    async def create_batch(self, input_data_list: list[str]) -> list[list[float]]:
+        return list(await asyncio.gather(*[self._submit(text) for text in input_data_list]))
+
+    async def _submit(self, text: str) -> list[float]:
+        self.stats["requests"] += 1
+        cached = self._cache.get(text)
+        if cached is not None:
+            self._cache.move_to_end(text)
+            self.stats["cache_hits"] += 1
+            return cached
+        future = self._pending.get(text) or self._inflight.get(text)
+        if future is not None:
+            self.stats["deduped"] += 1
+            return await asyncio.shield(future)
+
+        future = asyncio.get_running_loop().create_future()
+        self._pending[text] = future
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.max_wait, self._flush)
+        return await asyncio.shield(future)
+
+    def _flush(self):
+        """把排队的文本按 max_batch_size 切分后发送"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        while self._pending:
+            texts = []
+            while self._pending and len(texts) < self.max_batch_size:
+                text, future = self._pending.popitem(last=False)
+                self._inflight[text] = future
+                texts.append(text)
+            task = asyncio.create_task(self._send(texts))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _send(self, texts: list[str]):
+        self.stats["batches"] += 1
+        self.stats["texts_sent"] += len(texts)
+        try:
+            vectors = await self.inner.create_batch(texts)
+            if len(vectors) != len(texts):
+                raise ValueError(f"embedder 返回 {len(vectors)} 个向量，期望 {len(texts)} 个")
+        except BaseException as e:
+            # 发送任务被取消（如事件循环关闭）时也要了结等待者并清理 _inflight，否则同一文本会永远挂起
+            for text in texts:
+                future = self._inflight.pop(text)
+                if future.done():
+                    continue
+                if isinstance(e, asyncio.CancelledError):
+                    future.cancel()
+                else:
+                    future.set_exception(e)
+                    future.exception()  # 调用方可能已取消，避免 "never retrieved" 警告
+            if not isinstance(e, Exception):
+                raise
+            return
+        for text, vector in zip(texts, vectors):
+            self._remember(text, vector)
+            future = self._inflight.pop(text)
+            if not future.done():
+                future.set_result(vector)
+
+    def _remember(self, text: str, vector: list[float]):
+        self._cache[text] = vector
+        self._cache.move_to_end(text)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
@@ -0,0 +1,82 @@
+"""
+产品批量导入基准：逐个产品逐条写入（与 ingest_products_with_entities 的 add_triplet 一样每个属性一次往返，
+属性节点不去重） vs BulkProductIngestor（属性去重 + UNWIND 批量写入 + 流水线）。
+
+默认使用内存图驱动并模拟每次往返 2ms 的网络延迟，不需要 Neo4j：
+    python tests/graphiti/bench_product_ingest.py [产品数] [往返延迟ms]
+"""
+
+import asyncio
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+
+from memory_driver import InMemoryGraphDriver
+from product_ingest import (
+    ATTR_NODES_CYPHER,
+    HAS_ATTR_CYPHER,
+    LEGACY_SCHEMA,
+    PRODUCT_NODES_CYPHER,
+    BulkProductIngestor,
+    load_products,
+)
+
+CATALOG = Path(__file__).resolve().parent / "1218_json.json"
+
+
+def make_catalog(n: int) -> list[dict]:
+    """把 1218_json.json 复制扩充到 n 个产品，编码加后缀保证唯一"""
+    base = load_products(CATALOG)
+    return [{**base[i % len(base)], "code": f"{base[i % len(base)]['code']}-{i}"} for i in range(n)]
+
+
+async def ingest_one_by_one(driver, products: list[dict], group_id: str = "product_demo") -> float:
+    started = time.perf_counter()
+    for i, product in enumerate(products):
+        created_at = datetime.now(timezone.utc).isoformat()
+        name = LEGACY_SCHEMA.product_name(product, i)
+        product_uuid = str(uuid.uuid4())
+        attributes = LEGACY_SCHEMA.properties(product)
+        await driver.execute_query(PRODUCT_NODES_CYPHER, rows=[{
+            "uuid": product_uuid, "name": name, "group_id": group_id, "attributes": attributes, "created_at": created_at,
+        }])
+        for relation in LEGACY_SCHEMA.relations:
+            field = relation.field
+            for value in relation.values(product.get(field)):
+                attr_uuid = str(uuid.uuid4())
+                await driver.execute_query(ATTR_NODES_CYPHER, rows=[{
+                    "uuid": attr_uuid, "name": f"{field}:{value}", "group_id": group_id,
+                    "field": field, "value": value, "created_at": created_at,
+                }])
+                await driver.execute_query(HAS_ATTR_CYPHER, rows=[{
+                    "uuid": str(uuid.uuid4()), "name": relation.name, "source_uuid": product_uuid, "target_uuid": attr_uuid,
+                    "fact": f"{name} {field} {value}", "group_id": group_id, "created_at": created_at,
+                }])
+    return time.perf_counter() - started
+
+
+async def main(n: int, latency_ms: float):
+    products = make_catalog(n)
+    latency = latency_ms / 1000
+
+    legacy_driver = InMemoryGraphDriver(latency=latency)
+    legacy_seconds = await ingest_one_by_one(legacy_driver, products)
+
+    bulk_driver = InMemoryGraphDriver(latency=latency)
+    report = await BulkProductIngestor(bulk_driver, batch_size=500).ingest(products)
+
+    print(f"products: {n}, simulated round trip: {latency_ms}ms")
+    print(f"{'mode':<10}{'products/s':>12}{'queries':>10}{'attr nodes':>12}{'edges':>10}")
+    print(f"{'one-by-one':<10}{n / legacy_seconds:>12.1f}{legacy_driver.queries:>10}"
+          f"{len(legacy_driver.nodes_with_label('ProductAttr')):>12}{len(legacy_driver.edges):>10}")
+    print(f"{'bulk':<10}{report.products_per_second:>12.1f}{bulk_driver.queries:>10}"
+          f"{len(bulk_driver.nodes_with_label('ProductAttr')):>12}{len(bulk_driver.edges):>10}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 2000,
+        float(sys.argv[2]) if len(sys.argv) > 2 else 2.0,
+    ))
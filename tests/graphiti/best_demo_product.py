@@ -15,6 +15,18 @@ from graphiti_core.nodes import EpisodeType, EntityNode
 from graphiti_core.edges import EntityEdge
 from graphiti_core.utils.maintenance.graph_data_operations import clear_data
 
+from attr_interner import AttributeInterner
+from batching_embedder import BatchingEmbedder
+from graph_search import GraphSearcher
+from neo4j_pool import close_shared_drivers, shared_driver
+from product_ingest import (
+    CATALOG_1218_SCHEMA,
+    PRODUCTS_JSON_SCHEMA,
+    BulkProductIngestor,
+    ingest_catalog,
+    load_products,
+)
+
 OPENAI_API_KEY = "sk-kodzewuwqkxlypmgegdjdgvhwntqf-"
 OPENAI_API_BASE = "https://api.siliconflow.cn/v1"
 OPENAI_API_MODEL = "zai-org/GLM-4.6"
@@ -22,7 +34,12 @@ OPENAI_API_SMALL_MODEL = "zai-org/GLM-4.6"
 OPENAI_API_EMBEDDING_MODEL = "Qwen/Qwen3-Embedding-8B"
 OPENAI_API_EMBEDDING_DIM = 4096
 
+NEO4J_URI = "bolt://139.-.-.-:7687"
+NEO4J_USER = "neo4j"
+NEO4J_PASSWORD = "neo4j@-"
+
 
+# add_episode 路径下让 LLM 抽取直接返回空结果；产品目录推荐使用 ingest_catalog_structured，完全不调用 LLM
 class SiliconFlowGenericClient(OpenAIGenericClient):
     async def _create_structured_completion(
         self,
@@ -74,19 +91,27 @@ embed_config = OpenAIEmbedderConfig(
     embedding_dim=OPENAI_API_EMBEDDING_DIM,
     base_url=OPENAI_API_BASE,
 )
-embedder = OpenAIEmbedder(embed_config)
+# 并发导入时把零散的 create 合并为批量请求，相同 fact 只嵌入一次
+embedder = BatchingEmbedder(OpenAIEmbedder(embed_config), max_batch_size=64, max_wait_ms=20)
 
 cross_encoder = OpenAIRerankerClient(client=llm_client.client, config=llm_config)
 
 graphiti = Graphiti(
-    uri="bolt://139.-.-.-:7687",
-    user="neo4j",
-    password="neo4j@-",
+    uri=NEO4J_URI,
+    user=NEO4J_USER,
+    password=NEO4J_PASSWORD,
     llm_client=llm_client,
     embedder=embedder,
     cross_encoder=cross_encoder,
 )
 
+# 批量导入和结构化检索共用的连接池；读查询缓存 30 秒，经它执行的导入写入会清空缓存
+graph_driver = shared_driver(NEO4J_URI, NEO4J_USER, NEO4J_PASSWORD, pool_size=20, cache_ttl=30)
+
+
+# 属性节点驻留表：相同 (group_id, field, value) 复用同一个节点 UUID，查找表持久化到 attr_interner.DEFAULT_TABLE_PATH
+attr_interner = AttributeInterner()
+
 
 class Product(BaseModel):
     code: Optional[str] = Field(None, description="Product code")
@@ -198,7 +223,9 @@ async def ingest_products_with_entities(max_count: int | None = None) -> None:
             else:
                 values = [raw_value]
             for value in values:
+                attr_uuid, _ = attr_interner.intern(group_id, field, value)
                 attr_node = EntityNode(
+                    uuid=attr_uuid,
                     name=f"{field}:{value}",
                     group_id=group_id,
                     labels=["ProductAttr"],
@@ -214,7 +241,8 @@ async def ingest_products_with_entities(max_count: int | None = None) -> None:
                 )
                 await graphiti.add_triplet(product_node, edge, attr_node)
         print(f"已写入产品节点及属性关系：code={product_model.code}")
-    print("产品数据导入完成")
+    attr_interner.save()
+    print(f"产品数据导入完成，属性节点复用统计: {attr_interner.stats()}")
 
 
 async def ingest_products_with_entities_concurrent(
@@ -285,7 +313,9 @@ async def ingest_products_with_entities_concurrent(
                 else:
                     values = [raw_value]
                 for value in values:
+                    attr_uuid, _ = attr_interner.intern(group_id, field, value)
                     attr_node = EntityNode(
+                        uuid=attr_uuid,
                         name=f"{field}:{value}",
                         group_id=group_id,
                         labels=["ProductAttr"],
@@ -307,11 +337,62 @@ async def ingest_products_with_entities_concurrent(
         for i, product in enumerate(products)
     ]
     await asyncio.gather(*tasks)
-    print("并发产品数据导入完成")
+    attr_interner.save()
+    print(f"并发产品数据导入完成，属性节点复用统计: {attr_interner.stats()}")
+
+
+async def ingest_products_bulk(
+    max_count: int | None = None,
+    batch_size: int = 500,
+) -> None:
+    """批量导入：属性节点去重后按批 UNWIND 写入，不经过 add_episode / add_triplet"""
+    products = load_products(Path(__file__).resolve().parent / "1218_json.json")
+    if max_count is not None:
+        products = products[: max_count]
+    print(f"批量导入产品数据，共 {len(products)} 条，批大小: {batch_size}")
+    ingestor = BulkProductIngestor(
+        graph_driver, group_id="product_demo", batch_size=batch_size, interner=attr_interner,
+    )
+    report = await ingestor.ingest(
+        products,
+        on_batch=lambda r: print(f"[批量] 已写入 {r.products}/{len(products)} 个产品"),
+    )
+    print(report)
+
+
+async def ingest_catalog_structured(max_count: int | None = None) -> None:
+    """结构化 Episode 模式：按声明的 schema 确定性映射节点和关系，只嵌入检索字段，不调用 LLM"""
+    script_dir = Path(__file__).resolve().parent
+    catalogs = [
+        (script_dir / "1218_json.json", CATALOG_1218_SCHEMA),
+        (script_dir.parent.parent / "data" / "products.json", PRODUCTS_JSON_SCHEMA),
+    ]
+    for path, schema in catalogs:
+        print(f"结构化导入 {path.name}")
+        report = await ingest_catalog(
+            graph_driver,
+            path,
+            schema,
+            embedder=graphiti.embedder,
+            group_id="product_demo",
+            interner=attr_interner,
+            max_count=max_count,
+        )
+        print(report)
+
+
+async def search_products(question: str, deadline_ms: float = 800.0) -> None:
+    """多路并行检索：关系检索、节点检索、编码/属性结构化查找同时进行，超过截止时间只返回已到达的结果"""
+    searcher = GraphSearcher(graphiti, group_ids=["product_demo"], deadline_ms=deadline_ms, driver=graph_driver)
+    report = await searcher.search(question)
+    print(f"检索耗时 {report.elapsed_ms:.0f}ms，完成: {report.completed}，超时: {report.timed_out}，错误: {report.errors}")
+    print(report.to_text())
+    print(f"查询缓存: {graph_driver.report()}")
 
 
 async def clear_graph_data() -> None:
     await clear_data(graphiti.driver)
+    graph_driver.invalidate()
     print("图数据已清空")
 
 
@@ -323,9 +404,13 @@ async def main() -> None:
         # await graphiti.build_indices_and_constraints()
         # print("索引与约束创建完成，开始并发导入产品与实体")
         # await ingest_products_with_entities_concurrent(max_count=20, concurrency=5)
+        # await ingest_products_bulk()
+        # await ingest_catalog_structured()
+        # await search_products("6220A 和其他棉涤面料有什么区别")
         # print("导入流程执行完成")
     finally:
         await graphiti.close()
+        await close_shared_drivers()
         print("Graphiti 连接已关闭")
 
 
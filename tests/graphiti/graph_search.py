@@ -0,0 +1,248 @@
+"""
+图谱多路并行检索：同一个问题同时走三条检索路径，融合排序，并在截止时间内返回已到达的结果。
+
+- edges：graphiti.search，关系 fact 的混合检索（向量 + BM25）；
+- nodes：graphiti.search_ + NODE_HYBRID_SEARCH_RRF，实体节点检索；
+- attributes：从问题中识别图中已有的产品编码（如 6220A）和属性值（如 棉涤、T恤），直接用 Cypher 查产品节点。
+  形似编码的词（克重 1200g、年份 2024）只有出现在图中的产品编码表里才算编码。
+  编码表和属性值表由 warm() 在截止时间之外加载，驱动（CachedGraphDriver）执行写入后自动重新加载。
+
+各路结果按加权倒数排名（RRF）融合，同一节点被多路命中时得分累加；
+超过 deadline_ms 仍未返回的路径会被取消，结果里记为 timed_out，不影响已到达的结果。
+
+用法：
+    searcher = GraphSearcher(graphiti, group_ids=["product_demo"])
+    await searcher.warm()  # 可选：提前加载编码表和属性值表，search 也会在截止时间之外先加载
+    report = await searcher.search("6220A 适合做什么衣服")
+    tool = searcher.as_tool()  # 交给 create_agent 使用
+"""
+
+import asyncio
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Optional
+
+from langchain_core.tools import StructuredTool
+
+from product_ingest import RESERVED_PROPERTIES
+
+# 候选编码：含数字的字母数字串（6220A、6323B1）；是否真是编码由图中的产品编码表决定
+PRODUCT_CODE_RE = re.compile(r"(?<![0-9A-Za-z])[0-9A-Za-z]*\d[0-9A-Za-z]*(?![0-9A-Za-z])")
+
+PRODUCT_CODES_CYPHER = """
+MATCH (p:Product) WHERE p.group_id IN $group_ids
+RETURN p.name AS name, p.code AS code
+"""
+
+ATTR_VOCAB_CYPHER = """
+MATCH (a:ProductAttr) WHERE a.group_id IN $group_ids
+RETURN DISTINCT a.name AS name, a.value AS value
+"""
+
+ATTR_LOOKUP_CYPHER = """
+MATCH (p:Product)
+WHERE p.group_id IN $group_ids
+  AND (p.name IN $codes OR p.code IN $codes OR EXISTS {
+        MATCH (p)-[:RELATES_TO]->(a:ProductAttr) WHERE a.name IN $attr_names })
+OPTIONAL MATCH (p)-[:RELATES_TO]->(hit:ProductAttr) WHERE hit.name IN $attr_names
+WITH p, count(hit) AS matched
+RETURN p.uuid AS uuid, p.name AS name, matched, p {.*, name_embedding: null} AS properties
+ORDER BY (p.name IN $codes OR p.code IN $codes) DESC, matched DESC, p.name
+LIMIT $limit
+"""
+
+
+@dataclass
+class SearchHit:
+    key: str  # 节点或关系的 uuid，多路命中同一对象时据此合并
+    kind: str  # edge / node / product
+    text: str
+    score: float = 0.0
+    sources: list[str] = field(default_factory=list)
+
+
+@dataclass
+class SearchReport:
+    question: str
+    hits: list[SearchHit]
+    completed: list[str]
+    timed_out: list[str]
+    errors: dict[str, str]
+    elapsed_ms: float
+
+    def to_text(self) -> str:
+        if not self.hits:
+            return "图谱中没有找到相关信息。"
+        lines = [f"{i}. [{hit.kind}/{'+'.join(hit.sources)}] {hit.text}" for i, hit in enumerate(self.hits, 1)]
+        if self.timed_out:
+            lines.append(f"（{'、'.join(self.timed_out)} 检索超时，结果可能不完整）")
+        return "\n".join(lines)
+
+
+def fuse(results: dict[str, list[SearchHit]], weights: dict[str, float], k: int = 60) -> list[SearchHit]:
+    """加权 RRF：score = Σ weight / (k + rank)"""
+    fused: dict[str, SearchHit] = {}
+    for source, hits in results.items():
+        weight = weights.get(source, 1.0)
+        for rank, hit in enumerate(hits, 1):
+            merged = fused.get(hit.key)
+            if merged is None:
+                merged = fused[hit.key] = SearchHit(key=hit.key, kind=hit.kind, text=hit.text)
+            elif hit.kind == "product":
+                # 结构化查询的文本包含完整属性，优先展示
+                merged.kind, merged.text = hit.kind, hit.text
+            merged.score += weight / (k + rank)
+            merged.sources.append(source)
+    return sorted(fused.values(), key=lambda hit: hit.score, reverse=True)
+
+
+def _records(result) -> list:
+    """兼容 neo4j EagerResult（records, summary, keys）和直接返回记录列表的驱动"""
+    if isinstance(result, tuple):
+        return list(result[0])
+    return list(result or [])
+
+
+class GraphSearcher:
+    def __init__(
+        self,
+        graphiti,
+        group_ids: Optional[list[str]] = None,
+        limit: int = 10,
+        deadline_ms: float = 800.0,
+        weights: Optional[dict[str, float]] = None,
+        driver=None,
+    ):
+        self.graphiti = graphiti
+        # 结构化查找走的驱动，默认 graphiti.driver；可传入 neo4j_pool.CachedGraphDriver 复用连接池和查询缓存
+        self.driver = driver if driver is not None else graphiti.driver
+        self.group_ids = group_ids or ["product_demo"]
+        self.limit = limit
+        self.deadline = deadline_ms / 1000
+        # 编码/属性精确命中比语义检索更可信
+        self.weights = weights or {"attributes": 2.0, "edges": 1.0, "nodes": 1.0}
+        self.strategies: dict[str, Callable[[str], Awaitable[list[SearchHit]]]] = {
+            "edges": self._search_edges,
+            "nodes": self._search_nodes,
+            "attributes": self._lookup_attributes,
+        }
+        self._vocabulary: Optional[dict[str, list[str]]] = None  # 属性值 -> 属性节点名（同一值可能属于多个字段）
+        self._codes: Optional[dict[str, list[str]]] = None  # 大写编码 -> 图中的产品名/编码
+        self._tables_generation: Optional[int] = None  # 加载两张表时驱动的写入代数
+
+    async def warm(self):
+        """加载产品编码表和属性值表；驱动执行过写入（generation 变化）时重新加载"""
+        generation = getattr(self.driver, "generation", None)
+        if generation != self._tables_generation:
+            self.refresh_vocabulary()
+            self._tables_generation = generation
+        await asyncio.gather(self._load_codes(), self._load_vocabulary())
+
+    async def search(self, question: str, deadline_ms: Optional[float] = None) -> SearchReport:
+        started = time.perf_counter()
+        # 整表加载不计入截止时间，否则首次检索的结构化查找可能在表加载完之前被取消
+        await self.warm()
+        deadline = self.deadline if deadline_ms is None else deadline_ms / 1000
+        tasks = {
+            name: asyncio.create_task(strategy(question), name=f"graph-search-{name}")
+            for name, strategy in self.strategies.items()
+        }
+        await asyncio.wait(tasks.values(), timeout=deadline)
+
+        results, errors, timed_out = {}, {}, []
+        for name, task in tasks.items():
+            if not task.done():
+                task.cancel()
+                timed_out.append(name)
+            elif task.exception() is not None:
+                errors[name] = f"{type(task.exception()).__name__}: {task.exception()}"
+            else:
+                results[name] = task.result()
+        hits = fuse(results, self.weights)[: self.limit]
+        return SearchReport(
+            question=question,
+            hits=hits,
+            completed=list(results),
+            timed_out=timed_out,
+            errors=errors,
+            elapsed_ms=(time.perf_counter() - started) * 1000,
+        )
+
+    async def _search_edges(self, question: str) -> list[SearchHit]:
+        edges = await self.graphiti.search(question, group_ids=self.group_ids, num_results=self.limit)
+        return [SearchHit(key=edge.uuid, kind="edge", text=edge.fact) for edge in edges]
+
+    async def _search_nodes(self, question: str) -> list[SearchHit]:
+        # graphiti 不在 requirements.txt 中，检索配置在用到时再导入
+        from graphiti_core.search.search_config_recipes import NODE_HYBRID_SEARCH_RRF
+
+        config = NODE_HYBRID_SEARCH_RRF.model_copy(deep=True)
+        config.limit = self.limit
+        results = await self.graphiti.search_(question, config=config, group_ids=self.group_ids)
+        return [
+            SearchHit(key=node.uuid, kind="node", text=f"{node.name}: {node.summary}" if node.summary else node.name)
+            for node in results.nodes
+        ]
+
+    async def _load_vocabulary(self) -> dict[str, list[str]]:
+        if self._vocabulary is None:
+            result = await self.driver.execute_query(ATTR_VOCAB_CYPHER, group_ids=self.group_ids)
+            vocabulary: dict[str, list[str]] = {}
+            for record in _records(result):
+                value = str(record["value"])
+                # 单字属性值（如“冬”）太容易误命中；纯数字（克重、价格）交给编码识别
+                if len(value) >= 2 and not value.isdigit():
+                    vocabulary.setdefault(value, []).append(record["name"])
+            self._vocabulary = vocabulary
+        return self._vocabulary
+
+    async def _load_codes(self) -> dict[str, list[str]]:
+        if self._codes is None:
+            result = await self.driver.execute_query(PRODUCT_CODES_CYPHER, group_ids=self.group_ids)
+            codes: dict[str, list[str]] = {}
+            for record in _records(result):
+                for value in {record["name"], record["code"]} - {None}:
+                    codes.setdefault(str(value).upper(), []).append(str(value))
+            self._codes = codes
+        return self._codes
+
+    async def _lookup_attributes(self, question: str) -> list[SearchHit]:
+        known_codes, vocabulary = await asyncio.gather(self._load_codes(), self._load_vocabulary())
+        codes = [code for candidate in PRODUCT_CODE_RE.findall(question) for code in known_codes.get(candidate.upper(), [])]
+        attr_names = [name for value, names in vocabulary.items() if value in question for name in names]
+        if not codes and not attr_names:
+            return []
+        result = await self.driver.execute_query(
+            ATTR_LOOKUP_CYPHER,
+            group_ids=self.group_ids,
+            codes=codes,
+            attr_names=attr_names,
+            limit=self.limit,
+        )
+        hits = []
+        for record in _records(result):
+            properties = {k: v for k, v in (record["properties"] or {}).items()
+                          if k not in RESERVED_PROPERTIES and v is not None}
+            detail = "，".join(f"{k}={v}" for k, v in properties.items())
+            hits.append(SearchHit(key=record["uuid"], kind="product", text=f"{record['name']}（{detail}）"))
+        return hits
+
+    def refresh_vocabulary(self):
+        """驱动不是 CachedGraphDriver（没有 generation）时，导入新产品后手动调用，下次检索重新加载两张表"""
+        self._vocabulary = None
+        self._codes = None
+
+    def as_tool(self, name: str = "graph_search") -> StructuredTool:
+        async def graph_search(question: str) -> str:
+            report = await self.search(question)
+            return report.to_text()
+
+        return StructuredTool.from_function(
+            coroutine=graph_search,
+            name=name,
+            description=(
+                "在产品知识图谱中检索与问题相关的产品、属性和关系。"
+                "支持按产品编码（如 6220A）、系列、品类、适用场景等精确查找，也支持语义检索。"
+            ),
+        )
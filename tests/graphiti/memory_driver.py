@@ -0,0 +1,113 @@
+"""
+内存图驱动：在没有 Neo4j 的环境下替代 graphiti.driver，用于批量导入的基准和测试。
+
+只识别 product_ingest 中的几条 UNWIND 语句（按行写入内存中的节点表和关系表）
+和 graph_search 中的属性查询语句；读语句返回 (records, summary, keys)，与 neo4j 的 EagerResult 一致；
+latency 模拟每次往返的网络延迟，queries 记录往返次数。
+"""
+
+import asyncio
+
+from graph_search import ATTR_LOOKUP_CYPHER, ATTR_VOCAB_CYPHER, PRODUCT_CODES_CYPHER
+from neo4j_pool import normalize_cypher
+from product_ingest import ATTR_NODES_CYPHER, EPISODES_CYPHER, HAS_ATTR_CYPHER, PRODUCT_NODES_CYPHER
+
+
+class InMemoryGraphDriver:
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.nodes: dict[str, dict] = {}
+        self.edges: dict[str, dict] = {}
+        self.episodes: dict[str, dict] = {}
+        self.mentions: dict[str, tuple[str, str]] = {}
+        self.queries = 0
+        # 按规范化后的语句匹配，经过 CachedGraphDriver 压缩空白后仍能识别
+        self._handlers = {
+            normalize_cypher(ATTR_NODES_CYPHER): self._merge_attr_nodes,
+            normalize_cypher(PRODUCT_NODES_CYPHER): self._merge_product_nodes,
+            normalize_cypher(HAS_ATTR_CYPHER): self._merge_edges,
+            normalize_cypher(EPISODES_CYPHER): self._merge_episodes,
+        }
+        self._readers = {
+            normalize_cypher(ATTR_VOCAB_CYPHER): self._attr_vocabulary,
+            normalize_cypher(ATTR_LOOKUP_CYPHER): self._lookup_products,
+            normalize_cypher(PRODUCT_CODES_CYPHER): self._product_codes,
+        }
+
+    async def execute_query(self, cypher: str, **params):
+        self.queries += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        cypher = normalize_cypher(cypher)
+        reader = self._readers.get(cypher)
+        if reader is not None:
+            records = reader(**params)
+            return records, None, list(records[0]) if records else []
+        handler = self._handlers.get(cypher)
+        if handler is None:
+            raise NotImplementedError(f"内存驱动不支持该语句: {cypher[:60]}")
+        return handler(params.get("rows", []))
+
+    def _merge_node(self, row: dict, label: str, properties: dict):
+        node = self.nodes.setdefault(row["uuid"], {"uuid": row["uuid"], "labels": {"Entity"}, "created_at": row["created_at"]})
+        node["labels"].add(label)
+        if row.get("name_embedding") is not None:
+            node["name_embedding"] = row["name_embedding"]
+        node.update(properties)
+
+    def _merge_attr_nodes(self, rows: list[dict]):
+        for row in rows:
+            self._merge_node(row, "ProductAttr", {
+                "name": row["name"], "group_id": row["group_id"], "field": row["field"], "value": row["value"],
+            })
+
+    def _merge_product_nodes(self, rows: list[dict]):
+        for row in rows:
+            self._merge_node(row, "Product", {"name": row["name"], "group_id": row["group_id"], **row["attributes"]})
+
+    def _merge_edges(self, rows: list[dict]):
+        for row in rows:
+            # 与 MATCH 语义一致：任一端节点不存在时不写入
+            if row["source_uuid"] in self.nodes and row["target_uuid"] in self.nodes:
+                self.edges[row["uuid"]] = {**self.edges.get(row["uuid"], {}), **{k: v for k, v in row.items() if v is not None}}
+
+    def _merge_episodes(self, rows: list[dict]):
+        for row in rows:
+            self.episodes[row["uuid"]] = {k: v for k, v in row.items() if k not in ("product_uuid", "mention_uuid")}
+            if row["product_uuid"] in self.nodes:
+                self.mentions[row["mention_uuid"]] = (row["uuid"], row["product_uuid"])
+
+    def _attr_vocabulary(self, group_ids: list[str]) -> list[dict]:
+        return [
+            {"name": node["name"], "value": node["value"]}
+            for node in self.nodes_with_label("ProductAttr")
+            if node["group_id"] in group_ids
+        ]
+
+    def _product_codes(self, group_ids: list[str]) -> list[dict]:
+        return [
+            {"name": node["name"], "code": node.get("code")}
+            for node in self.nodes_with_label("Product")
+            if node["group_id"] in group_ids
+        ]
+
+    def _lookup_products(self, group_ids: list[str], codes: list[str], attr_names: list[str], limit: int) -> list[dict]:
+        attr_uuids = {node["uuid"] for node in self.nodes_with_label("ProductAttr") if node["name"] in attr_names}
+        matched: dict[str, int] = {}
+        for edge in self.edges.values():
+            if edge["target_uuid"] in attr_uuids:
+                matched[edge["source_uuid"]] = matched.get(edge["source_uuid"], 0) + 1
+        records = []
+        for node in self.nodes_with_label("Product"):
+            by_code = node["name"] in codes or node.get("code") in codes
+            if node["group_id"] not in group_ids or not (by_code or node["uuid"] in matched):
+                continue
+            properties = {k: v for k, v in node.items() if k not in ("labels", "name_embedding")}
+            records.append((by_code, {
+                "uuid": node["uuid"], "name": node["name"], "matched": matched.get(node["uuid"], 0), "properties": properties,
+            }))
+        records.sort(key=lambda item: (not item[0], -item[1]["matched"], item[1]["name"]))
+        return [record for _, record in records[:limit]]
+
+    def nodes_with_label(self, label: str) -> list[dict]:
+        return [node for node in self.nodes.values() if label in node["labels"]]
@@ -0,0 +1,224 @@
+"""
+共享的异步 Neo4j 连接池 + 热点读查询 TTL 缓存。
+
+各个 demo 脚本各自创建驱动，每个问题都直接查库。这里提供两层，都只依赖
+`await driver.execute_query(cypher, **params)` 这一接口（与 graphiti.driver、memory_driver 一致）：
+
+- Neo4jSessionPool：同一 (uri, user, database) 在进程内只建一个 AsyncDriver，
+  max_connection_pool_size 可配置；用信号量把并发会话数限制在池大小以内，超出的请求排队而不是等待获取连接超时。
+  读语句按 READ 路由（集群下走从库），写语句按 WRITE 路由；识别不准时可用 write_=True/False 显式指定。
+- CachedGraphDriver：读语句按“规范化 Cypher + 参数”缓存 ttl 秒，并发的相同读查询只发一次；
+  经过它执行的任何写语句（导入）都会使缓存整体失效，写入前已发出的读结果也不会再写进缓存。
+
+Neo4j 没有客户端预编译语句，执行计划按查询文本缓存在服务端。发送前统一压缩空白，
+同一语句的不同写法共享一个执行计划；取值一律走 $参数，不要拼进 Cypher 文本。
+
+用法：
+    driver = shared_driver(uri, user, password, pool_size=20, cache_ttl=30)
+    result = await driver.execute_query(ATTR_LOOKUP_CYPHER, group_ids=["product_demo"], ...)
+    await close_shared_drivers()
+"""
+
+import asyncio
+import hashlib
+import json
+import re
+import time
+from collections import OrderedDict
+from typing import Optional
+
+# 写子句关键字；前面是 . : $ 或 AS 的是属性、标签、参数名或别名（n.set、:Merge、$create、AS merge），
+# 后面跟冒号的是 map 的键
+_WRITE_CLAUSE_RE = re.compile(
+    r"(?<![.:$])(?<!\bAS\s)\b(CREATE|MERGE|SET|DELETE|DETACH|REMOVE|DROP|LOAD\s+CSV|FOREACH)\b(?!\s*:)", re.IGNORECASE,
+)
+# 字符串字面量、反引号标识符和注释里的关键字不算
+_LITERAL_RE = re.compile(r"'(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\"|`[^`]*`|//[^\n]*|/\*.*?\*/", re.DOTALL)
+
+
+def normalize_cypher(cypher: str) -> str:
+    """压缩空白作为执行计划和缓存的键（参数化查询中不应有包含连续空格的字符串字面量）"""
+    return " ".join(cypher.split())
+
+
+def is_write_query(cypher: str) -> bool:
+    return _WRITE_CLAUSE_RE.search(_LITERAL_RE.sub(" ", cypher)) is not None
+
+
+class Neo4jSessionPool:
+    def __init__(
+        self,
+        uri: str,
+        user: str,
+        password: str,
+        database: Optional[str] = None,
+        pool_size: int = 20,
+        acquisition_timeout: float = 60.0,
+    ):
+        # neo4j 是 graphiti 的依赖，不在 requirements.txt 中，用到时再导入
+        from neo4j import AsyncGraphDatabase
+
+        self.database = database
+        self.pool_size = pool_size
+        self.driver = AsyncGraphDatabase.driver(
+            uri,
+            auth=(user, password),
+            max_connection_pool_size=pool_size,
+            connection_acquisition_timeout=acquisition_timeout,
+        )
+        self._slots = asyncio.Semaphore(pool_size)
+        self._active = 0
+        self.stats = {"queries": 0, "queued": 0, "peak_active": 0}
+
+    async def execute_query(self, cypher: str, write_: Optional[bool] = None, **params):
+        """write_ 为 None 时按语句内容判断读写路由"""
+        from neo4j import RoutingControl
+
+        write = is_write_query(cypher) if write_ is None else write_
+        self.stats["queries"] += 1
+        if self._slots.locked():
+            self.stats["queued"] += 1
+        async with self._slots:
+            self._active += 1
+            self.stats["peak_active"] = max(self.stats["peak_active"], self._active)
+            try:
+                return await self.driver.execute_query(
+                    cypher,
+                    params,
+                    database_=self.database,
+                    routing_=RoutingControl.WRITE if write else RoutingControl.READ,
+                )
+            finally:
+                self._active -= 1
+
+    async def close(self):
+        await self.driver.close()
+
+
+class CachedGraphDriver:
+    def __init__(self, inner, cache_ttl: float = 30.0, cache_size: int = 1024):
+        self.inner = inner
+        self.cache_ttl = cache_ttl
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, tuple[float, object]]" = OrderedDict()  # key -> (过期时间, 结果)
+        self._inflight: dict[str, asyncio.Future] = {}
+        self._generation = 0  # 每次写入加一，写入前发出的读结果不再缓存
+        self._statements: set[str] = set()
+        self.stats = {"hits": 0, "misses": 0, "coalesced": 0, "writes": 0, "invalidations": 0}
+
+    async def execute_query(self, cypher: str, cache_: Optional[bool] = None, **params):
+        """cache_=False 强制直连（例如需要读到最新数据），cache_=True 强制按读语句缓存"""
+        statement = normalize_cypher(cypher)
+        self._statements.add(statement)
+        write = is_write_query(cypher) if cache_ is None else not cache_
+        if write:
+            self.stats["writes"] += 1
+            try:
+                return await self.inner.execute_query(statement, **params)
+            finally:
+                self.invalidate()
+        if cache_ is False:
+            return await self.inner.execute_query(statement, **params)
+
+        key = self._key(statement, params)
+        while True:
+            entry = self._cache.get(key)
+            if entry is not None:
+                if entry[0] > time.monotonic():
+                    self._cache.move_to_end(key)
+                    self.stats["hits"] += 1
+                    return entry[1]
+                del self._cache[key]
+            future = self._inflight.get(key)
+            if future is None:
+                break
+            self.stats["coalesced"] += 1
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise
+                # 发起查询的调用方被取消，重新检查缓存或由自己发起
+
+        self.stats["misses"] += 1
+        future = self._inflight[key] = asyncio.get_running_loop().create_future()
+        generation = self._generation
+        try:
+            result = await self.inner.execute_query(statement, **params)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # 没有并发等待者时避免 "never retrieved" 警告
+            raise
+        finally:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+        future.set_result(result)
+        if generation == self._generation:
+            self._store(key, result)
+        return result
+
+    @property
+    def generation(self) -> int:
+        """写入 / invalidate 的次数；依赖图数据的派生缓存（如 GraphSearcher 的编码表）据此判断是否过期"""
+        return self._generation
+
+    def invalidate(self):
+        """清空读缓存；经过本驱动的写语句会自动调用，直接写库的导入脚本结束后应手动调用"""
+        self._generation += 1
+        self._inflight.clear()  # 正在进行的读不再被后来者复用
+        if self._cache:
+            self.stats["invalidations"] += 1
+            self._cache.clear()
+
+    def _key(self, statement: str, params: dict) -> str:
+        payload = json.dumps([statement, params], sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _store(self, key: str, result):
+        self._cache[key] = (time.monotonic() + self.cache_ttl, result)
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def report(self) -> dict:
+        reads = self.stats["hits"] + self.stats["misses"] + self.stats["coalesced"]
+        return {
+            **self.stats,
+            "hit_rate": (self.stats["hits"] + self.stats["coalesced"]) / reads if reads else 0.0,
+            "cached": len(self._cache),
+            "statements": len(self._statements),
+        }
+
+    async def close(self):
+        close = getattr(self.inner, "close", None)
+        if close is not None:
+            await close()
+
+
+_shared: dict[tuple, CachedGraphDriver] = {}
+
+
+def shared_driver(
+    uri: str,
+    user: str,
+    password: str,
+    database: Optional[str] = None,
+    pool_size: int = 20,
+    cache_ttl: float = 30.0,
+) -> CachedGraphDriver:
+    """同一 (uri, user, database) 在进程内复用一个连接池和缓存；池大小和 TTL 以第一次创建时为准"""
+    key = (uri, user, database)
+    driver = _shared.get(key)
+    if driver is None:
+        pool = Neo4jSessionPool(uri, user, password, database=database, pool_size=pool_size)
+        driver = _shared[key] = CachedGraphDriver(pool, cache_ttl=cache_ttl)
+    return driver
+
+
+async def close_shared_drivers():
+    while _shared:
+        _, driver = _shared.popitem()
+        await driver.close()
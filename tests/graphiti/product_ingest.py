@@ -0,0 +1,410 @@
+"""
+产品目录批量导入：属性节点先在内存中去重，再用 UNWIND 批量写入 Neo4j。
+
+ingest_products_with_entities 每个产品都要 await 一次 add_episode，每个属性再 await 一次 add_triplet，
+一个产品十几次往返；同一个属性值（例如 series:棉涤）在每个产品下都会新建一个节点。
+这里改为：
+- 同一个 (group_id, field, value) 只对应一个 ProductAttr 节点，UUID 由 AttributeInterner 分配，可跨多次导入复用；
+- 产品、关系、Episode 的 UUID 由 (group_id, 产品名/款号, ...) 经 uuid5 推导，重复导入同一目录是幂等的，
+  MERGE 命中已有节点和关系，不会产生重复数据；
+- 每批产品只发 3 条 Cypher（属性节点、产品节点、HAS_ATTR 关系），每条用 UNWIND 写入整批数据；
+- 准备下一批数据与写入当前批次流水线并行；
+- 返回 IngestReport，包含 products/s。
+
+节点和关系沿用 graphiti 的存储结构（:Entity 节点、RELATES_TO 关系，name="HAS_ATTR"），
+写入后仍可被 graphiti 的检索和 Cypher 查询使用。driver 只需提供
+`await driver.execute_query(cypher, **params)`，graphiti.driver 和测试用的内存驱动都满足。
+"""
+
+import asyncio
+import json
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Iterable, Optional
+
+from attr_interner import AttributeInterner, node_uuid
+
+# 与 best_demo_product.Product 的字段一致
+PRODUCT_FIELDS = (
+    "code",
+    "weight",
+    "elem",
+    "inelem",
+    "mprice",
+    "season_marking",
+    "series",
+    "dressing_category",
+    "fun",
+    "fabric_erp",
+    "className",
+)
+
+# 与 graphiti 节点自身属性同名的字段，写入时加 product_ 前缀，避免覆盖（data/products.json 里有 name 字段）
+RESERVED_PROPERTIES = {"uuid", "name", "group_id", "labels", "created_at", "summary", "name_embedding"}
+
+
+@dataclass(frozen=True)
+class RelationSpec:
+    """一个字段映射为 ProductAttr 节点 + 关系；separators 非空时按分隔符拆成多个值"""
+
+    field: str
+    separators: tuple[str, ...] = ()
+    name: str = "HAS_ATTR"
+
+    def values(self, raw_value: Any) -> list:
+        if raw_value is None or raw_value == "":
+            return []
+        if isinstance(raw_value, str) and self.separators:
+            text = raw_value
+            for separator in self.separators[1:]:
+                text = text.replace(separator, self.separators[0])
+            values = [v.strip() for v in text.split(self.separators[0]) if v.strip()]
+            return values or [raw_value]
+        return [raw_value]
+
+
+@dataclass(frozen=True)
+class CatalogSchema:
+    """
+    产品目录到图结构的声明式映射：
+    - name_fields：按顺序取第一个非空字段作为产品节点名；
+    - property_fields：写到产品节点上的属性；
+    - relations：拆成 ProductAttr 节点的字段；
+    - embed_fields：拼成产品节点 name_embedding 文本的字段（只为要做语义检索的字段生成向量，为空则不生成）；
+    - embed_attr_names / embed_facts：是否为属性节点名、关系 fact 生成向量。
+    """
+
+    name_fields: tuple[str, ...] = ("code", "title")
+    property_fields: tuple[str, ...] = PRODUCT_FIELDS
+    relations: tuple[RelationSpec, ...] = ()
+    embed_fields: tuple[str, ...] = ()
+    embed_attr_names: bool = False
+    embed_facts: bool = False
+    source_description: str = "ManyBirds products"
+
+    def product_name(self, product: dict, index: int) -> str:
+        for field in self.name_fields:
+            if product.get(field):
+                return str(product[field])
+        return f"Product {index}"
+
+    def properties(self, product: dict) -> dict:
+        return {
+            (f"product_{field}" if field in RESERVED_PROPERTIES else field): product[field]
+            for field in self.property_fields
+            if product.get(field) is not None
+        }
+
+    def embed_text(self, product: dict, name: str) -> str:
+        parts = [f"{field}: {product[field]}" for field in self.embed_fields if product.get(field)]
+        return f"{name}；" + "；".join(parts)
+
+
+# 与 ingest_products_with_entities 一致：6 个属性字段，只有 series 按逗号拆分，不生成向量
+LEGACY_SCHEMA = CatalogSchema(
+    relations=(
+        RelationSpec("series", (",", "，")),
+        RelationSpec("season_marking"),
+        RelationSpec("dressing_category"),
+        RelationSpec("fabric_erp"),
+        RelationSpec("fun"),
+        RelationSpec("className"),
+    ),
+)
+
+# tests/graphiti/1218_json.json：适用场景、功能按顿号拆成独立属性，便于按单个场景/功能检索
+CATALOG_1218_SCHEMA = CatalogSchema(
+    relations=(
+        RelationSpec("series", (",", "，")),
+        RelationSpec("season_marking"),
+        RelationSpec("dressing_category", ("、", ",", "，")),
+        RelationSpec("fabric_erp"),
+        RelationSpec("fun", ("、", ",", "，")),
+        RelationSpec("className"),
+    ),
+    embed_fields=("series", "className", "fabric_erp", "elem", "dressing_category", "fun"),
+    embed_attr_names=True,
+)
+
+# data/products.json：字段更全，价格类字段只作为节点属性，不参与向量
+PRODUCTS_JSON_SCHEMA = CatalogSchema(
+    name_fields=("code", "name"),
+    property_fields=(
+        "code", "name", "elem", "inelem", "className", "fabric_structure_two", "production_process",
+        "fiber_type", "yarn_type", "series", "quality_level", "dressing_category", "devtype", "introduce",
+        "customizable_grade", "mprice", "price", "yprice", "kgprice", "taxmprice", "taxyprice", "taxkgprice",
+        "sale_num_year", "dnumber", "weight", "width", "swzoomin", "shzoomin",
+    ),
+    relations=(
+        RelationSpec("series", (",", "，")),
+        RelationSpec("className"),
+        RelationSpec("quality_level"),
+        RelationSpec("dressing_category", ("、", ",", "，")),
+        RelationSpec("production_process", ("、", ",", "，")),
+        RelationSpec("fiber_type"),
+        RelationSpec("yarn_type"),
+    ),
+    embed_fields=("name", "series", "className", "fabric_structure_two", "elem", "dressing_category", "introduce"),
+    embed_attr_names=True,
+    source_description="Fabric catalog",
+)
+
+ATTR_NODES_CYPHER = """
+UNWIND $rows AS row
+MERGE (n:Entity {uuid: row.uuid})
+ON CREATE SET n.created_at = row.created_at, n.summary = ''
+SET n:ProductAttr, n.name = row.name, n.group_id = row.group_id, n.field = row.field, n.value = row.value,
+    n.name_embedding = coalesce(row.name_embedding, n.name_embedding)
+"""
+
+PRODUCT_NODES_CYPHER = """
+UNWIND $rows AS row
+MERGE (n:Entity {uuid: row.uuid})
+ON CREATE SET n.created_at = row.created_at, n.summary = ''
+SET n:Product, n.name = row.name, n.group_id = row.group_id,
+    n.name_embedding = coalesce(row.name_embedding, n.name_embedding)
+SET n += row.attributes
+"""
+
+HAS_ATTR_CYPHER = """
+UNWIND $rows AS row
+MATCH (p:Entity {uuid: row.source_uuid})
+MATCH (a:Entity {uuid: row.target_uuid})
+MERGE (p)-[e:RELATES_TO {uuid: row.uuid}]->(a)
+SET e.name = row.name, e.fact = row.fact, e.group_id = row.group_id,
+    e.created_at = row.created_at, e.episodes = row.episodes,
+    e.fact_embedding = coalesce(row.fact_embedding, e.fact_embedding)
+"""
+
+# graphiti 的 Episode 结构：每个产品一条 Episodic 节点，MENTIONS 指向产品节点
+EPISODES_CYPHER = """
+UNWIND $rows AS row
+MERGE (e:Episodic {uuid: row.uuid})
+SET e.name = row.name, e.group_id = row.group_id, e.source = 'json',
+    e.source_description = row.source_description, e.content = row.content,
+    e.created_at = row.created_at, e.valid_at = row.created_at, e.entity_edges = row.entity_edges
+WITH e, row
+MATCH (n:Entity {uuid: row.product_uuid})
+MERGE (e)-[m:MENTIONS {uuid: row.mention_uuid}]->(n)
+SET m.group_id = row.group_id, m.created_at = row.created_at
+"""
+
+
+def load_products(path: str | Path) -> list[dict]:
+    """读取产品目录，兼容 {"products": [...]}（1218_json.json）和顶层数组（data/products.json）"""
+    with open(path, encoding="utf-8") as file:
+        data = json.load(file)
+    return data.get("products", []) if isinstance(data, dict) else data
+
+
+@dataclass
+class IngestReport:
+    products: int = 0
+    attr_nodes: int = 0  # 本次写入的属性节点
+    nodes_saved: int = 0  # 复用已有 UUID 而少建的属性节点
+    edges: int = 0
+    episodes: int = 0
+    embedded: int = 0  # 生成向量的文本数
+    batches: int = 0
+    queries: int = 0
+    seconds: float = 0.0
+
+    @property
+    def products_per_second(self) -> float:
+        return self.products / self.seconds if self.seconds else 0.0
+
+    def __str__(self) -> str:
+        return (
+            f"导入 {self.products} 个产品，用时 {self.seconds:.2f}s（{self.products_per_second:.1f} products/s）；"
+            f"属性节点 {self.attr_nodes} 个（复用节省 {self.nodes_saved} 个），HAS_ATTR 关系 {self.edges} 条，"
+            f"Episode {self.episodes} 条，向量 {self.embedded} 个，{self.batches} 批 / {self.queries} 条 Cypher"
+        )
+
+
+@dataclass
+class _Batch:
+    attr_rows: list[dict] = field(default_factory=list)
+    product_rows: list[dict] = field(default_factory=list)
+    edge_rows: list[dict] = field(default_factory=list)
+    episode_rows: list[dict] = field(default_factory=list)
+    # (行, 向量字段名, 文本)：写入前统一调用一次 embedder.create_batch
+    embed_requests: list[tuple[dict, str, str]] = field(default_factory=list)
+    nodes_saved: int = 0
+
+
+class BulkProductIngestor:
+    """
+    按 CatalogSchema 把产品目录确定性地映射为节点和关系，全程不调用 LLM。
+    episodes=True 时为每个产品写一条 Episodic 节点（即“结构化 Episode”）；
+    传入 embedder（graphiti 的 EmbedderClient）时只为 schema 声明的检索字段生成向量。
+    """
+
+    def __init__(self, driver, group_id: str = "product_demo", batch_size: int = 500,
+                 interner: Optional[AttributeInterner] = None, schema: CatalogSchema = LEGACY_SCHEMA,
+                 embedder=None, episodes: bool = False):
+        self.driver = driver
+        self.group_id = group_id
+        self.batch_size = batch_size
+        # 默认只在内存中去重；传入带文件路径的 AttributeInterner 可跨多次导入复用 UUID
+        self.interner = interner if interner is not None else AttributeInterner(path=None)
+        self.schema = schema
+        self.embedder = embedder
+        self.episodes = episodes
+        self._written: set[str] = set()  # 本次导入已 MERGE 过的属性节点
+
+    def _embed_later(self, batch: _Batch, row: dict, key: str, text: str, enabled: bool):
+        row[key] = None
+        if enabled and self.embedder is not None:
+            batch.embed_requests.append((row, key, text))
+
+    def _attr_uuid(self, field: str, value, batch: _Batch, created_at: str) -> str:
+        attr_uuid, created = self.interner.intern(self.group_id, field, value)
+        if not created:
+            batch.nodes_saved += 1
+        if attr_uuid not in self._written:
+            # 查找表里已有的 UUID 也要在本次导入中 MERGE 一次，图被清空后按原 UUID 重建
+            self._written.add(attr_uuid)
+            row = {
+                "uuid": attr_uuid,
+                "name": f"{field}:{value}",
+                "group_id": self.group_id,
+                "field": field,
+                "value": value,
+                "created_at": created_at,
+            }
+            self._embed_later(batch, row, "name_embedding", row["name"], self.schema.embed_attr_names)
+            batch.attr_rows.append(row)
+        return attr_uuid
+
+    def build_batch(self, products: list[dict], offset: int = 0) -> _Batch:
+        """把一批产品转换为 UNWIND 参数；属性节点在本次导入中首次用到时才写入"""
+        schema = self.schema
+        created_at = datetime.now(timezone.utc).isoformat()
+        batch = _Batch()
+        for i, product in enumerate(products, start=offset):
+            name = schema.product_name(product, i)
+            attributes = schema.properties(product)
+            product_row = {
+                "uuid": node_uuid(self.group_id, "product", name),
+                "name": name,
+                "group_id": self.group_id,
+                "attributes": attributes,
+                "created_at": created_at,
+            }
+            self._embed_later(batch, product_row, "name_embedding", schema.embed_text(product, name),
+                              bool(schema.embed_fields))
+            batch.product_rows.append(product_row)
+            episode_uuid = node_uuid(self.group_id, "episode", name) if self.episodes else None
+            edge_uuids = []
+            for relation in schema.relations:
+                for value in relation.values(product.get(relation.field)):
+                    edge_row = {
+                        "uuid": node_uuid(self.group_id, "edge", name, relation.name, relation.field, value),
+                        "name": relation.name,
+                        "source_uuid": product_row["uuid"],
+                        "target_uuid": self._attr_uuid(relation.field, value, batch, created_at),
+                        "fact": f"{name} {relation.field} {value}",
+                        "group_id": self.group_id,
+                        "created_at": created_at,
+                        "episodes": [episode_uuid] if episode_uuid else [],
+                    }
+                    self._embed_later(batch, edge_row, "fact_embedding", edge_row["fact"], schema.embed_facts)
+                    batch.edge_rows.append(edge_row)
+                    edge_uuids.append(edge_row["uuid"])
+            if self.episodes:
+                batch.episode_rows.append({
+                    "uuid": episode_uuid,
+                    "name": name,
+                    "group_id": self.group_id,
+                    "source_description": schema.source_description,
+                    "content": json.dumps(attributes, ensure_ascii=False),
+                    "created_at": created_at,
+                    "entity_edges": edge_uuids,
+                    "product_uuid": product_row["uuid"],
+                    "mention_uuid": node_uuid(self.group_id, "mention", name),
+                })
+        return batch
+
+    async def _embed(self, batch: _Batch) -> int:
+        if not batch.embed_requests:
+            return 0
+        vectors = await self.embedder.create_batch([text for _, _, text in batch.embed_requests])
+        for (row, key, _), vector in zip(batch.embed_requests, vectors):
+            row[key] = list(vector)
+        return len(batch.embed_requests)
+
+    async def _write(self, batch: _Batch, report: IngestReport):
+        embedded = await self._embed(batch)
+        # 属性节点和产品节点互不依赖，可以并发写入；关系和 Episode 必须在节点写入之后
+        writes = [self.driver.execute_query(PRODUCT_NODES_CYPHER, rows=batch.product_rows)]
+        if batch.attr_rows:
+            writes.append(self.driver.execute_query(ATTR_NODES_CYPHER, rows=batch.attr_rows))
+        await asyncio.gather(*writes)
+        links = []
+        if batch.edge_rows:
+            links.append(self.driver.execute_query(HAS_ATTR_CYPHER, rows=batch.edge_rows))
+        if batch.episode_rows:
+            links.append(self.driver.execute_query(EPISODES_CYPHER, rows=batch.episode_rows))
+        await asyncio.gather(*links)
+        report.queries += len(writes) + len(links)
+        report.batches += 1
+        report.products += len(batch.product_rows)
+        report.attr_nodes += len(batch.attr_rows)
+        report.nodes_saved += batch.nodes_saved
+        report.edges += len(batch.edge_rows)
+        report.episodes += len(batch.episode_rows)
+        report.embedded += embedded
+
+    async def ingest(self, products: Iterable[dict], on_batch=None) -> IngestReport:
+        """分批导入产品；准备下一批与写入当前批流水线执行"""
+        products = list(products)
+        report = IngestReport()
+        started = time.perf_counter()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=2)
+        errors: list[Exception] = []
+
+        async def writer():
+            # 写入失败后继续取走剩余批次（不再写入），避免生产方阻塞在 queue.put 上
+            while (batch := await queue.get()) is not None:
+                if errors:
+                    continue
+                try:
+                    await self._write(batch, report)
+                except Exception as e:
+                    errors.append(e)
+                    continue
+                if on_batch:
+                    on_batch(report)
+
+        writer_task = asyncio.create_task(writer())
+        try:
+            for offset in range(0, len(products), self.batch_size):
+                if errors:
+                    break
+                await queue.put(self.build_batch(products[offset:offset + self.batch_size], offset))
+            await queue.put(None)
+            await writer_task
+        finally:
+            writer_task.cancel()
+        if errors:
+            raise errors[0]
+        self.interner.save()
+        report.seconds = time.perf_counter() - started
+        return report
+
+
+async def ingest_catalog(driver, path: str | Path, schema: CatalogSchema, embedder=None,
+                         group_id: str = "product_demo", batch_size: int = 500,
+                         interner: Optional[AttributeInterner] = None,
+                         max_count: Optional[int] = None) -> IngestReport:
+    """结构化 Episode 模式导入整个目录：确定性映射 + 只嵌入检索字段，不调用 LLM"""
+    products = load_products(path)
+    if max_count is not None:
+        products = products[:max_count]
+    ingestor = BulkProductIngestor(
+        driver, group_id=group_id, batch_size=batch_size, interner=interner,
+        schema=schema, embedder=embedder, episodes=True,
+    )
+    return await ingestor.ingest(products)
@@ -0,0 +1,212 @@
+"""
+本地意图预分类器：关键词规则 + 最近质心向量分类。
+
+多意图图原本每轮都要先调用一次 LLM 输出 weather/math/chat，再由处理节点调用第二次。
+这里先用关键词规则（同 test_router.py 中的 route）和基于标注样例训练的最近质心分类器
+在本地判定意图，只有不够确定的问题才交给 LLM 分类。
+
+默认使用字符 n-gram 哈希向量，无需调用向量服务；也可以传入任意 Embeddings，
+例如 test_agent_rag.py 中的 DashScopeEmbeddings。
+
+运行 `python tests/intent_classifier.py` 输出离线准确率 / 覆盖率 / 延迟报告。
+"""
+
+from __future__ import annotations
+
+import math
+import re
+import time
+import zlib
+from typing import Optional
+
+from langchain_core.embeddings import Embeddings
+
+INTENTS = ("weather", "math", "chat")
+
+# 关键词规则：只有恰好命中一类时才直接判定
+KEYWORD_RULES = {
+    "weather": re.compile(r"天气|气温|温度|下雨|下雪|刮风|晴天|阴天|雾霾|湿度|weather|forecast|\b(?:rain|snow)(?:s|y|ing|ed)?\b", re.I),
+    "math": re.compile(
+        r"计算|算一下|算算|等于几|平方根|开方|\bcalculat\w*\b"
+        r"|[\d.]+\s*(?:[+\-*/×÷^%]|加|减|乘以?|除以|plus|minus|times|divided by)\s*[\d.]+",
+        re.I,
+    ),
+}
+
+# 标注样例，用于训练质心
+LABELED_EXAMPLES = {
+    "weather": [
+        "北京今天天气怎么样？",
+        "上海明天会下雨吗",
+        "广州这周气温多少度",
+        "出门要不要带伞",
+        "杭州现在冷不冷",
+        "深圳周末适合出去玩吗，会不会刮台风",
+        "成都空气质量怎么样",
+        "What's the weather like in Tokyo?",
+    ],
+    "math": [
+        "帮我计算一下 123 + 456 等于多少？",
+        "12 乘以 8 是多少",
+        "100 除以 4 等于几",
+        "2 的 10 次方是多少",
+        "求 144 的平方根",
+        "3.5 加 4.2 的和",
+        "一个数减去 25 后等于 75，这个数是多少",
+        "what is 15 times 7",
+    ],
+    "chat": [
+        "你好，介绍一下你自己",
+        "给我讲个笑话",
+        "推荐几本好看的书",
+        "LangGraph 是什么",
+        "今天心情不太好",
+        "帮我写一首关于春天的诗",
+        "谢谢你的帮助",
+        "how are you doing",
+        "你叫什么名字",
+        "周末做点什么好",
+        "如何学习编程",
+        "晚上吃什么",
+    ],
+}
+
+
+class HashingEmbeddings(Embeddings):
+    """字符 n-gram 哈希向量，纯本地计算，适合短文本意图分类。"""
+
+    def __init__(self, dimensions: int = 512, ngram_range: tuple[int, int] = (1, 2)):
+        self.dimensions = dimensions
+        self.ngram_range = ngram_range
+
+    def _embed(self, text: str) -> list[float]:
+        text = re.sub(r"\s+", "", text.lower())
+        vector = [0.0] * self.dimensions
+        low, high = self.ngram_range
+        for n in range(low, high + 1):
+            for i in range(len(text) - n + 1):
+                # crc32 保证跨进程稳定，不受 PYTHONHASHSEED 影响
+                vector[zlib.crc32(text[i : i + n].encode("utf-8")) % self.dimensions] += 1.0
+        return _normalize(vector)
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> list[float]:
+        return self._embed(text)
+
+
+def _normalize(vector: list[float]) -> list[float]:
+    norm = math.sqrt(sum(v * v for v in vector))
+    return [v / norm for v in vector] if norm else vector
+
+
+class CentroidClassifier:
+    """最近质心分类器：每个意图取样例向量均值，按余弦相似度判定。"""
+
+    def __init__(self, embeddings: Embeddings | None = None):
+        self.embeddings = embeddings or HashingEmbeddings()
+        self.centroids: dict[str, list[float]] = {}
+
+    def fit(self, examples: dict[str, list[str]]) -> "CentroidClassifier":
+        for intent, texts in examples.items():
+            vectors = self.embeddings.embed_documents(texts)
+            centroid = [sum(column) / len(vectors) for column in zip(*vectors)]
+            self.centroids[intent] = _normalize(centroid)
+        return self
+
+    def scores(self, text: str) -> dict[str, float]:
+        query = self.embeddings.embed_query(text)
+        return {
+            intent: sum(q * c for q, c in zip(query, centroid))
+            for intent, centroid in self.centroids.items()
+        }
+
+    def predict(self, text: str) -> tuple[str, float, float]:
+        """返回 (意图, 最高相似度, 与第二名的差距)"""
+        ranked = sorted(self.scores(text).items(), key=lambda item: item[1], reverse=True)
+        best_intent, best_score = ranked[0]
+        margin = best_score - ranked[1][1] if len(ranked) > 1 else best_score
+        return best_intent, best_score, margin
+
+
+class IntentPreClassifier:
+    """先走关键词规则，再走质心分类；都不确定时返回 None，由调用方交给 LLM。"""
+
+    def __init__(
+        self,
+        classifier: CentroidClassifier | None = None,
+        min_score: float = 0.2,
+        min_margin: float = 0.1,
+    ):
+        self.classifier = classifier or CentroidClassifier().fit(LABELED_EXAMPLES)
+        self.min_score = min_score
+        self.min_margin = min_margin
+
+    def classify(self, text: str) -> tuple[Optional[str], str]:
+        """返回 (意图, 来源)，来源为 keyword / centroid / escalate"""
+        hits = [intent for intent, pattern in KEYWORD_RULES.items() if pattern.search(text)]
+        if len(hits) == 1:
+            return hits[0], "keyword"
+
+        intent, score, margin = self.classifier.predict(text)
+        if score >= self.min_score and margin >= self.min_margin:
+            return intent, "centroid"
+        return None, "escalate"
+
+
+# 离线评估集，与训练样例不重叠
+EVAL_SAMPLES = [
+    ("南京后天天气如何", "weather"),
+    ("明天武汉温度高吗", "weather"),
+    ("西安今晚会下雪吗", "weather"),
+    ("外面风大不大，要穿外套吗", "weather"),
+    ("Will it rain in London tomorrow?", "weather"),
+    ("算一下 88 * 12", "math"),
+    ("(3 + 5) × 12 等于几", "math"),
+    ("256 开方是多少", "math"),
+    ("7 加 8 再乘以 3", "math"),
+    ("what's 9 divided by 3", "math"),
+    ("你是谁", "chat"),
+    ("讲个关于程序员的笑话", "chat"),
+    ("怎么学好 Python", "chat"),
+    ("晚饭吃什么好", "chat"),
+    ("tell me about LangChain", "chat"),
+    ("rainbow是什么", "chat"),
+    ("snowflake 数据仓库怎么用", "chat"),
+]
+
+
+def evaluate(pre_classifier: IntentPreClassifier, samples: list[tuple[str, str]]) -> dict:
+    """统计覆盖率（本地判定比例）、本地判定准确率和单次分类延迟。"""
+    latencies = []
+    decided = correct = 0
+    sources = {"keyword": 0, "centroid": 0, "escalate": 0}
+    for text, label in samples:
+        start = time.perf_counter()
+        intent, source = pre_classifier.classify(text)
+        latencies.append((time.perf_counter() - start) * 1000)
+        sources[source] += 1
+        if intent is not None:
+            decided += 1
+            correct += intent == label
+    latencies.sort()
+    return {
+        "samples": len(samples),
+        "coverage": decided / len(samples),
+        "accuracy": correct / decided if decided else 0.0,
+        "sources": sources,
+        "p50_ms": latencies[len(latencies) // 2],
+        "p99_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))],
+    }
+
+
+if __name__ == "__main__":
+    report = evaluate(IntentPreClassifier(), EVAL_SAMPLES)
+    print("本地意图预分类离线报告")
+    print("-" * 40)
+    print(f"样本数: {report['samples']}")
+    print(f"本地覆盖率: {report['coverage']:.1%}（其余交给 LLM）")
+    print(f"本地准确率: {report['accuracy']:.1%}")
+    print(f"来源分布: {report['sources']}")
+    print(f"延迟 p50: {report['p50_ms']:.3f} ms, p99: {report['p99_ms']:.3f} ms")
@@ -0,0 +1,177 @@
+"""
+MCP 客户端连接池：为每个 MCP Server 维持一个长连接会话，供图中的工具反复复用。
+
+`MultiServerMCPClient.get_tools()` 返回的工具每次调用都会新建会话（HTTP 需重新 initialize，
+stdio 甚至要重新拉起子进程）。这里每个 Server 由一个后台任务持有会话：
+- 会话常驻，定期 ping 保活；
+- 连接异常时按指数退避重连，调用方等待重连完成后重试一次；
+- 每个 Server 有独立的并发上限。
+
+用法：
+    async with MCPClientPool({"math": {"url": "http://127.0.0.1:8001/mcp", "transport": "streamable_http"}}) as pool:
+        tools = await pool.get_tools()
+        agent = create_agent(llm, tools=tools)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Any
+
+from langchain_core.tools import StructuredTool, ToolException
+from langchain_mcp_adapters.sessions import create_session
+from mcp import ClientSession
+from mcp.shared.exceptions import McpError
+
+logger = logging.getLogger(__name__)
+
+
+class _ServerSlot:
+    """单个 Server 的会话状态"""
+
+    def __init__(self, name: str, connection: dict, max_concurrency: int):
+        self.name = name
+        self.connection = connection
+        self.session: ClientSession | None = None
+        self.ready = asyncio.Event()
+        self.broken = asyncio.Event()
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.task: asyncio.Task | None = None
+        self.reconnects = 0
+
+
+class MCPClientPool:
+    """按 Server 复用 MCP 会话的客户端池。"""
+
+    def __init__(
+        self,
+        connections: dict[str, dict],
+        max_concurrency: int = 8,
+        keepalive_interval: float = 30.0,
+        backoff_base: float = 0.5,
+        backoff_max: float = 10.0,
+        connect_timeout: float = 30.0,
+    ):
+        self.connections = connections
+        self.keepalive_interval = keepalive_interval
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.connect_timeout = connect_timeout
+        self._slots = {
+            name: _ServerSlot(name, connection, max_concurrency)
+            for name, connection in connections.items()
+        }
+        self._closing = False
+
+    async def __aenter__(self) -> "MCPClientPool":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def start(self):
+        for slot in self._slots.values():
+            slot.task = asyncio.create_task(self._run(slot), name=f"mcp-pool-{slot.name}")
+        try:
+            await asyncio.gather(*[self._wait_ready(slot) for slot in self._slots.values()])
+        except BaseException:
+            # 有 Server 连不上（或 start 被取消）时，不留下仍在后台重连的任务
+            await self.close()
+            raise
+
+    async def close(self):
+        """取消各 Server 的后台任务，不等保活间隔或退避结束"""
+        self._closing = True
+        tasks = [slot.task for slot in self._slots.values() if slot.task and not slot.task.done()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _run(self, slot: _ServerSlot):
+        """持有会话的后台任务：建立会话、保活，断开后指数退避重连"""
+        attempt = 0
+        while not self._closing:
+            try:
+                async with create_session(slot.connection) as session:
+                    await session.initialize()
+                    slot.session = session
+                    slot.broken.clear()
+                    slot.ready.set()
+                    attempt = 0
+                    await self._keepalive(slot)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("MCP server %s disconnected: %s", slot.name, e)
+            finally:
+                slot.ready.clear()
+                slot.session = None
+            if self._closing:
+                break
+            slot.reconnects += 1
+            delay = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    async def _keepalive(self, slot: _ServerSlot):
+        """定期 ping，直到会话被标记为断开或连接池关闭"""
+        while not self._closing:
+            try:
+                await asyncio.wait_for(slot.broken.wait(), timeout=self.keepalive_interval)
+                return
+            except asyncio.TimeoutError:
+                await slot.session.send_ping()
+
+    async def _wait_ready(self, slot: _ServerSlot) -> ClientSession:
+        await asyncio.wait_for(slot.ready.wait(), timeout=self.connect_timeout)
+        return slot.session
+
+    async def call_tool(self, server: str, name: str, arguments: dict[str, Any]):
+        """在常驻会话上调用工具；连接异常时等待重连后重试一次"""
+        slot = self._slots[server]
+        async with slot.semaphore:
+            for attempt in range(2):
+                session = await self._wait_ready(slot)
+                try:
+                    return await session.call_tool(name, arguments)
+                except McpError:
+                    raise
+                except Exception:
+                    if attempt:
+                        raise
+                    slot.broken.set()
+                    slot.ready.clear()
+
+    async def get_tools(self, server: str | None = None) -> list[StructuredTool]:
+        """把各 Server 的 MCP 工具转换为 LangChain 工具，调用走连接池"""
+        tools = []
+        names = [server] if server else list(self._slots)
+        for name in names:
+            session = await self._wait_ready(self._slots[name])
+            listed = await session.list_tools()
+            tools.extend(self._to_langchain_tool(name, tool) for tool in listed.tools)
+        return tools
+
+    def _to_langchain_tool(self, server: str, tool) -> StructuredTool:
+        async def call(**arguments):
+            result = await self.call_tool(server, tool.name, arguments)
+            text = "\n".join(getattr(block, "text", "") for block in result.content if getattr(block, "text", None))
+            if result.isError:
+                raise ToolException(text)
+            return text
+
+        return StructuredTool(
+            name=tool.name,
+            description=tool.description or "",
+            args_schema=tool.inputSchema,
+            coroutine=call,
+            handle_tool_error=True,
+        )
+
+    def stats(self) -> dict[str, dict]:
+        return {
+            name: {"connected": slot.ready.is_set(), "reconnects": slot.reconnects}
+            for name, slot in self._slots.items()
+        }
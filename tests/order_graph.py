@@ -6,9 +6,12 @@ from langgraph.prebuilt import ToolNode
 from langchain_core.messages import SystemMessage, HumanMessage, AIMessage, BaseMessage
 from langchain_core.runnables import RunnableConfig
 from langchain_core.tools import tool
+from langchain_core.utils.json import parse_partial_json
+from pydantic import BaseModel, Field, ValidationError
 from typing import Dict, Any, List, Optional, TypedDict, Annotated
 from operator import add
 import json
+import re
 
 _ = load_dotenv()
 
@@ -19,6 +22,16 @@ llm = ChatOpenAI(
     temperature=0.3,
 )
 
+class OrderFields(BaseModel):
+    """订单字段，未识别的字段保持为空"""
+    product_code: Optional[str] = Field(default=None, description="款号，产品唯一标识，如 A001")
+    color: Optional[str] = Field(default=None, description="颜色，如 红色")
+    quantity: Optional[int] = Field(default=None, description="条数，订购数量，整数")
+    customer: Optional[str] = Field(default=None, description="客户名称")
+
+# 强制以 OrderFields 工具调用输出，参数由 JSON Schema 约束
+extraction_llm = llm.bind_tools([OrderFields], tool_choice="OrderFields")
+
 class OrderState(TypedDict):
     messages: Annotated[List[BaseMessage], add]
     extracted_fields: Dict[str, Any]
@@ -26,6 +39,142 @@ class OrderState(TypedDict):
 
 _order_counter = 1000
 
+# 产品目录：get_product_info 和规则抽取共用
+PRODUCTS = {
+    "A001": {"product_name": "经典款T恤", "price": 99.00, "available_colors": ["红色", "蓝色", "黑色", "白色"], "stock": 500},
+    "A002": {"product_name": "休闲款卫衣", "price": 159.00, "available_colors": ["红色", "蓝色", "灰色"], "stock": 300},
+    "A003": {"product_name": "运动款外套", "price": 299.00, "available_colors": ["黑色", "白色", "绿色"], "stock": 200},
+}
+
+FIELD_NAMES = {"product_code": "款号", "color": "颜色", "quantity": "条数", "customer": "客户"}
+
+# 颜色词典：从产品目录汇总，长词优先匹配
+COLOR_LEXICON = sorted({c for p in PRODUCTS.values() for c in p["available_colors"]}, key=len, reverse=True)
+
+_PRODUCT_CODE_RE = re.compile(r"(?<![A-Za-z0-9])([A-Za-z]\d{3,})(?![0-9])")
+_QUANTITY_RE = re.compile(r"(\d+|[零〇一二两三四五六七八九十百千万]+)\s*(?:条|件|个|套)")
+# 客户名：下单动词、判断词等不能出现在名字里，否则 "客户要10条" 会把 "要10条…" 当成客户名
+_NAME_CHAR = r"(?:(?![要订需购买拿下单是为的给和与])[\u4e00-\u9fa5])"
+_CUSTOMER_END = r"(?=要|订|需要|购买|买|拿|下单|，|,|。|；|;|\s|$)"
+_CUSTOMER_RES = [
+    # 带分隔符：客户：张三、客户名称为 ACME
+    re.compile(rf"客户(?:名称|名)?\s*(?:是|为|:|：)\s*((?:{_NAME_CHAR}|[A-Za-z·]){{1,20}}?){_CUSTOMER_END}"),
+    # 不带分隔符时只接受 2-4 个汉字的人名：客户张三要…
+    re.compile(rf"客户({_NAME_CHAR}{{2,4}}){_CUSTOMER_END}"),
+]
+
+_CN_DIGITS = {"零": 0, "〇": 0, "一": 1, "二": 2, "两": 2, "三": 3, "四": 4, "五": 5, "六": 6, "七": 7, "八": 8, "九": 9}
+_CN_UNITS = {"十": 10, "百": 100, "千": 1000, "万": 10000}
+
+# 字段抽取统计：turns 总轮数，rule_only 跳过 LLM 的轮数，llm_calls 调用 LLM 的轮数，
+# repairs 自动修复重试次数，salvaged 修复失败后从部分输出中挽回字段的次数
+_extract_stats = {"turns": 0, "rule_only": 0, "llm_calls": 0, "repairs": 0, "salvaged": 0}
+
+
+def _parse_chinese_number(text: str) -> Optional[int]:
+    """解析阿拉伯数字或中文数字，如 10、十二、两百五十"""
+    if text.isdigit():
+        return int(text)
+    total, section, number = 0, 0, 0
+    for ch in text:
+        if ch in _CN_DIGITS:
+            number = _CN_DIGITS[ch]
+        elif ch == "万":
+            total += (section + number) * 10000
+            section, number = 0, 0
+        elif ch in _CN_UNITS:
+            # "十二" 省略了前导的 "一"
+            section += (number or 1) * _CN_UNITS[ch]
+            number = 0
+        else:
+            return None
+    return total + section + number
+
+
+def _match_customer(text: str) -> Optional[str]:
+    """匹配客户名；匹配到多个不同的名字，或名字里含颜色词时视为有歧义，交给 LLM"""
+    names = {match.group(1) for pattern in _CUSTOMER_RES for match in pattern.finditer(text)}
+    if len(names) != 1:
+        return None
+    name = names.pop()
+    if any(color in name for color in COLOR_LEXICON):
+        return None
+    return name
+
+
+def rule_extract(text: str) -> Dict[str, Any]:
+    """用正则和颜色词典从文本中确定性地抽取订单字段，只返回识别到的字段"""
+    fields: Dict[str, Any] = {}
+
+    match = _PRODUCT_CODE_RE.search(text)
+    if match:
+        fields["product_code"] = match.group(1).upper()
+
+    for color in COLOR_LEXICON:
+        if color in text:
+            fields["color"] = color
+            break
+
+    match = _QUANTITY_RE.search(text)
+    if match:
+        quantity = _parse_chinese_number(match.group(1))
+        if quantity:
+            fields["quantity"] = quantity
+
+    customer = _match_customer(text)
+    if customer:
+        fields["customer"] = customer
+
+    return fields
+
+
+def _salvage_fields(partial: Dict[str, Any]) -> Dict[str, Any]:
+    """逐个字段校验部分输出，保留合法的字段"""
+    fields = {}
+    for key, value in partial.items():
+        if key not in OrderFields.model_fields:
+            continue
+        try:
+            fields[key] = getattr(OrderFields.model_validate({key: value}), key)
+        except ValidationError:
+            continue
+    return fields
+
+
+def structured_extract(messages: List[BaseMessage]) -> Dict[str, Any]:
+    """结构化抽取订单字段，只返回非空字段
+
+    流式读取 OrderFields 工具调用参数并增量解析；校验失败时带上错误信息自动修复重试一次，
+    仍失败则保留部分输出中合法的字段，避免为格式问题再向用户追问一轮。
+    """
+    partial: Dict[str, Any] = {}
+    for attempt in range(2):
+        raw = ""
+        for chunk in extraction_llm.stream(messages):
+            for tool_chunk in chunk.tool_call_chunks:
+                raw += tool_chunk.get("args") or ""
+            try:
+                parsed = parse_partial_json(raw) if raw else None
+            except json.JSONDecodeError:
+                # 中途的分片无法补全（如缺逗号），等完整输出后走校验和修复
+                parsed = None
+            if isinstance(parsed, dict):
+                partial = parsed
+        try:
+            fields = OrderFields.model_validate_json(raw)
+            return fields.model_dump(exclude_none=True)
+        except ValidationError as e:
+            if attempt == 0:
+                _extract_stats["repairs"] += 1
+                messages = messages + [HumanMessage(content=f"你上次输出的参数 {raw} 未通过校验：{e}\n请修正后重新调用 OrderFields。")]
+    _extract_stats["salvaged"] += 1
+    return {k: v for k, v in _salvage_fields(partial).items() if v is not None}
+
+
+def get_extract_stats() -> Dict[str, int]:
+    """返回字段抽取统计的副本"""
+    return dict(_extract_stats)
+
 @tool
 def create_sales_order(product_code: str, color: str, quantity: int, customer: str) -> str:
     """创建销售单
@@ -80,12 +229,7 @@ def get_product_info(product_code: str) -> str:
     Returns:
         产品信息
     """
-    products = {
-        "A001": {"product_name": "经典款T恤", "price": 99.00, "available_colors": ["红色", "蓝色", "黑色", "白色"], "stock": 500},
-        "A002": {"product_name": "休闲款卫衣", "price": 159.00, "available_colors": ["红色", "蓝色", "灰色"], "stock": 300},
-        "A003": {"product_name": "运动款外套", "price": 299.00, "available_colors": ["黑色", "白色", "绿色"], "stock": 200},
-    }
-    product = products.get(product_code, {"product_name": "未知产品", "price": 0, "available_colors": [], "stock": 0})
+    product = PRODUCTS.get(product_code, {"product_name": "未知产品", "price": 0, "available_colors": [], "stock": 0})
     result = {
         "product_code": product_code,
         "product_name": product["product_name"],
@@ -121,49 +265,51 @@ order_tools = [create_sales_order, track_sales_order, get_product_info, get_colo
 tool_node = ToolNode(order_tools)
 
 def extract_fields(state: OrderState, config: RunnableConfig):
-    system_prompt = """你是一个订单助手，负责从用户的订单文本中提取订单字段。
-需要提取的字段包括：
-- 款号 (product_code): 产品唯一标识，如 A001, A002
-- 颜色 (color): 产品颜色，如 红色, 蓝色
-- 条数 (quantity): 订购数量，整数
-- 客户 (customer): 客户名称
-
-请仔细分析用户输入，提取所有可识别的字段。
-如果某个字段无法从文本中识别，请将其标记为缺失。
-返回格式为JSON，包含 extracted_fields 和 missing_fields 两个字段。
-只返回JSON，不要包含其他文字说明。"""
+    _extract_stats["turns"] += 1
+
+    # 先用规则抽取，后面的用户消息覆盖前面的
+    extracted_fields: Dict[str, Any] = {}
+    for message in state["messages"]:
+        if isinstance(message, HumanMessage):
+            extracted_fields.update(rule_extract(message.content))
+
+    missing_keys = [key for key in FIELD_NAMES if key not in extracted_fields]
+    if not missing_keys:
+        # 规则已覆盖全部字段，跳过 LLM
+        _extract_stats["rule_only"] += 1
+        return {"extracted_fields": extracted_fields, "missing_fields": []}
+
+    _extract_stats["llm_calls"] += 1
+    known = "\n".join(f"- {FIELD_NAMES[k]} ({k}): {v}" for k, v in extracted_fields.items()) or "无"
+    wanted = "\n".join(f"- {FIELD_NAMES[k]} ({k})" for k in missing_keys)
+    system_prompt = f"""你是一个订单助手，负责从用户的订单文本中提取订单字段。
+以下字段已识别，无需重复提取：
+{known}
+
+只需提取以下缺失字段：
+{wanted}
+
+请调用 OrderFields 输出结果，无法从文本中识别的字段留空。"""
     
     all_messages = [SystemMessage(system_prompt)] + state["messages"]
-    response = llm.invoke(all_messages)
-    
-    content = response.content if hasattr(response, 'content') else str(response)
+    llm_fields = structured_extract(all_messages)
     
-    try:
-        if "```json" in content:
-            content = content.split("```json")[1].split("```")[0].strip()
-        elif "```" in content:
-            content = content.split("```")[1].split("```")[0].strip()
-        
-        extracted_data = json.loads(content)
-        extracted_fields = extracted_data.get("extracted_fields", {})
-        missing_fields = extracted_data.get("missing_fields", [])
-    except json.JSONDecodeError:
-        extracted_fields = {}
-        missing_fields = ["款号", "颜色", "条数", "客户"]
+    for key in missing_keys:
+        if key in llm_fields:
+            extracted_fields[key] = llm_fields[key]
+    missing_fields = [FIELD_NAMES[key] for key in FIELD_NAMES if key not in extracted_fields]
     
     state["extracted_fields"] = extracted_fields
     state["missing_fields"] = missing_fields
     
-    return {"messages": [response], "extracted_fields": extracted_fields, "missing_fields": missing_fields}
+    return {"extracted_fields": extracted_fields, "missing_fields": missing_fields}
 
 def confirm_fields(state: OrderState, config: RunnableConfig):
     extracted_fields = state.get("extracted_fields", {})
     missing_fields = state.get("missing_fields", [])
     
-    field_names = {"product_code": "款号", "color": "颜色", "quantity": "条数", "customer": "客户"}
-    
     confirm_message = "我已提取到以下订单信息：\n"
-    for key, display_name in field_names.items():
+    for key, display_name in FIELD_NAMES.items():
         value = extracted_fields.get(key)
         if value is None or value == "" or value == "[缺失]" or str(value) == "[缺失]":
             value = "[缺失]"
@@ -213,36 +359,23 @@ def process_confirm(state: OrderState, config: RunnableConfig):
 def process_modify(state: OrderState, config: RunnableConfig):
     last_message = state["messages"][-1]
     content = last_message.content if isinstance(last_message, HumanMessage) else ""
+    current_fields = state.get("extracted_fields", {})
+    current = "\n".join(f"- {FIELD_NAMES[k]} ({k}): {current_fields.get(k, '[缺失]')}" for k in FIELD_NAMES)
     
     system_prompt = f"""你是一个订单助手，用户想要修改订单字段。
+当前订单字段：
+{current}
+
 用户输入: {content}
 
-请分析用户的修改意图，提取更新后的订单字段。
-返回格式为JSON，包含 extracted_fields 和 missing_fields 两个字段。"""
+请分析用户的修改意图，调用 OrderFields 输出需要更新的字段，未修改的字段留空（保留上面的当前值）。"""
     
     all_messages = [SystemMessage(system_prompt)] + state["messages"][-2:]
-    model = llm.bind_tools(order_tools)
-    response = model.invoke(all_messages)
-    
-    response_content = response.content if hasattr(response, 'content') else str(response)
-    
-    try:
-        if "```json" in response_content:
-            response_content = response_content.split("```json")[1].split("```")[0].strip()
-        elif "```" in response_content:
-            response_content = response_content.split("```")[1].split("```")[0].strip()
-        
-        extracted_data = json.loads(response_content)
-        extracted_fields = extracted_data.get("extracted_fields", {})
-        missing_fields = extracted_data.get("missing_fields", [])
-    except json.JSONDecodeError:
-        extracted_fields = state.get("extracted_fields", {})
-        missing_fields = state.get("missing_fields", [])
-    
-    field_names = {"product_code": "款号", "color": "颜色", "quantity": "条数", "customer": "客户"}
+    extracted_fields = {**current_fields, **structured_extract(all_messages)}
+    missing_fields = [FIELD_NAMES[key] for key in FIELD_NAMES if key not in extracted_fields]
     
     confirm_message = "我已更新订单信息：\n"
-    for key, display_name in field_names.items():
+    for key, display_name in FIELD_NAMES.items():
         value = extracted_fields.get(key, "[缺失]")
         confirm_message += f"{display_name}: {value}\n"
     
@@ -258,7 +391,8 @@ def process_cancel(state: OrderState, config: RunnableConfig):
     cancel_message = "订单已取消。"
     return {"messages": [AIMessage(content=cancel_message)]}
 
-def build_order_graph():
+def build_order_graph(checkpointer=None):
+    """构建订单图，传入 checkpointer（如 checkpoint_saver.BatchedSqliteSaver）可持久化每一步状态"""
     builder = StateGraph(OrderState)
     
     builder.add_node("extract_fields", extract_fields)
@@ -274,7 +408,7 @@ def build_order_graph():
     builder.add_edge("process_modify", END)
     builder.add_edge("process_cancel", END)
     
-    return builder.compile(name="order-graph")
+    return builder.compile(name="order-graph", checkpointer=checkpointer)
 
 def demo(query: str = "客户张三要10条红色A001款"):
     graph = build_order_graph()
@@ -313,7 +447,12 @@ def demo(query: str = "客户张三要10条红色A001款"):
                     print(f"Agent: {msg.content}\n")
             break
         elif "修改" in user_input or "modify" in user_input.lower():
-            state["messages"] = result["messages"] + [HumanMessage(content=user_input)]
+            # 带上上一轮的字段，process_modify 只覆盖用户修改的部分
+            state = {
+                "messages": result["messages"] + [HumanMessage(content=user_input)],
+                "extracted_fields": extracted_fields,
+                "missing_fields": missing_fields,
+            }
             result = process_modify(state, {})
             for msg in result["messages"]:
                 if isinstance(msg, AIMessage):
@@ -330,6 +469,9 @@ def demo(query: str = "客户张三要10条红色A001款"):
             print("Agent: 请输入 '确认'、'修改' 或 '取消'\n")
         
         turn += 1
+    
+    stats = get_extract_stats()
+    print(f"字段抽取: 共 {stats['turns']} 轮，规则直出 {stats['rule_only']} 轮，调用 LLM {stats['llm_calls']} 轮")
 
 if __name__ == "__main__":
     print("=" * 50)
@@ -0,0 +1,261 @@
+"""
+产品目录列式索引：在内存中回答“棉涤、20 元/米以下、克重大于 200g 的面料有哪些”这类筛选问题。
+
+这类问题走图谱或向量检索既慢又不精确，而 data/products.json 本身就是列式字段：
+- 数值字段（mprice、weight 等）各存一个 NumPy float64 数组，缺失或无法解析的值为 NaN，区间条件不会命中；
+- 分类字段（series、className 等）每个取值一个布尔位图，同一字段内多个取值取并集，不同字段之间取交集；
+- dressing_category、production_process 等多值字段按 “、” / “,” 切分后分别建位图，“T恤” 只需命中其中一项。
+
+查询只是几次数组比较和按位与，单次在微秒量级；as_tool() 把它作为区间 / 分面查询工具交给 Agent。
+
+运行 `python tests/product_index.py` 输出查询延迟报告。
+"""
+
+from __future__ import annotations
+
+import json
+import re
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+from langchain_core.tools import StructuredTool
+from pydantic import BaseModel, Field
+
+DEFAULT_PRODUCTS_PATH = Path(__file__).resolve().parent.parent / "data" / "products.json"
+
+# 数值字段：字段名 -> 说明（同时用作工具参数描述）
+NUMERIC_FIELDS = {
+    "mprice": "米价（元/米）",
+    "yprice": "码价（元/码）",
+    "kgprice": "公斤价（元/kg）",
+    "price": "大货价",
+    "weight": "克重（g/m²）",
+    "width": "门幅（cm）",
+    "sale_num_year": "年销量",
+}
+
+# 分类字段：字段名 -> 多值分隔符（为空表示整体作为一个取值）
+CATEGORICAL_FIELDS = {
+    "series": (",", "，"),
+    "className": (),
+    "dressing_category": ("、", ",", "，"),
+    "production_process": ("、", ",", "，"),
+    "quality_level": (),
+    "fiber_type": (),
+    "devtype": (),
+}
+
+# 查询结果中返回的字段
+RESULT_FIELDS = ("code", "name", "series", "className", "mprice", "weight", "width", "elem", "dressing_category")
+
+
+def _to_float(value) -> float:
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            return float(value.strip())
+        except ValueError:
+            return np.nan
+    return np.nan
+
+
+def _tokens(value, separators: tuple[str, ...]) -> list[str]:
+    if value is None or value == "":
+        return []
+    text = str(value)
+    if not separators:
+        return [text.strip()]
+    return [token.strip() for token in re.split("|".join(map(re.escape, separators)), text) if token.strip()]
+
+
+@dataclass
+class QueryResult:
+    total: int
+    products: list[dict]
+    unknown_values: dict[str, list[str]] = field(default_factory=dict)
+    elapsed_us: float = 0.0
+
+
+class RangeCondition(BaseModel):
+    field: str = Field(description="数值字段名，如 mprice、weight")
+    min: Optional[float] = Field(default=None, description="下限（含），不限则留空")
+    max: Optional[float] = Field(default=None, description="上限（含），不限则留空")
+
+
+class ProductFilter(BaseModel):
+    ranges: list[RangeCondition] = Field(default_factory=list, description="数值区间条件")
+    facets: dict[str, list[str]] = Field(
+        default_factory=dict, description='分类条件，字段名 -> 取值列表，如 {"series": ["棉涤"], "dressing_category": ["T恤"]}'
+    )
+    sort_by: Optional[str] = Field(default=None, description="按该数值字段排序")
+    descending: bool = Field(default=False, description="是否降序")
+    limit: int = Field(default=20, description="最多返回的产品数")
+
+
+class ProductIndex:
+    def __init__(
+        self,
+        products: list[dict],
+        numeric_fields: Optional[dict[str, str]] = None,
+        categorical_fields: Optional[dict[str, tuple[str, ...]]] = None,
+    ):
+        self.products = products
+        self.numeric_fields = NUMERIC_FIELDS if numeric_fields is None else numeric_fields
+        self.categorical_fields = CATEGORICAL_FIELDS if categorical_fields is None else categorical_fields
+        self.size = len(products)
+        self.columns: dict[str, np.ndarray] = {
+            name: np.array([_to_float(product.get(name)) for product in products], dtype=np.float64)
+            for name in self.numeric_fields
+        }
+        self.bitmaps: dict[str, dict[str, np.ndarray]] = {}
+        for name, separators in self.categorical_fields.items():
+            bitmaps: dict[str, np.ndarray] = {}
+            for row, product in enumerate(products):
+                for token in _tokens(product.get(name), separators):
+                    bitmap = bitmaps.get(token)
+                    if bitmap is None:
+                        bitmap = bitmaps[token] = np.zeros(self.size, dtype=bool)
+                    bitmap[row] = True
+            self.bitmaps[name] = bitmaps
+
+    @classmethod
+    def from_file(cls, path: str | Path = DEFAULT_PRODUCTS_PATH, **kwargs) -> "ProductIndex":
+        """读取产品目录，兼容顶层数组（data/products.json）和 {"products": [...]}（1218_json.json）"""
+        with open(path, encoding="utf-8") as file:
+            data = json.load(file)
+        return cls(data.get("products", []) if isinstance(data, dict) else data, **kwargs)
+
+    def values(self, name: str) -> dict[str, int]:
+        """分类字段的全部取值及对应产品数"""
+        return {value: int(bitmap.sum()) for value, bitmap in self.bitmaps[name].items()}
+
+    def mask(
+        self,
+        ranges: Optional[dict[str, tuple[Optional[float], Optional[float]]]] = None,
+        facets: Optional[dict[str, list[str]]] = None,
+        unknown_values: Optional[dict[str, list[str]]] = None,
+    ) -> np.ndarray:
+        """区间条件（闭区间，None 表示不限）与分面条件的交集位图"""
+        mask = np.ones(self.size, dtype=bool)
+        for name, (low, high) in (ranges or {}).items():
+            if name not in self.columns:
+                raise ValueError(f"不支持的数值字段: {name}，可选: {', '.join(self.columns)}")
+            column = self.columns[name]
+            if low is not None:
+                mask &= column >= low
+            if high is not None:
+                mask &= column <= high
+        for name, values in (facets or {}).items():
+            if name not in self.bitmaps:
+                raise ValueError(f"不支持的分类字段: {name}，可选: {', '.join(self.bitmaps)}")
+            selected = np.zeros(self.size, dtype=bool)
+            for value in values:
+                bitmap = self.bitmaps[name].get(value)
+                if bitmap is None:
+                    if unknown_values is not None:
+                        unknown_values.setdefault(name, []).append(value)
+                    continue
+                selected |= bitmap
+            mask &= selected
+        return mask
+
+    def query(
+        self,
+        ranges: Optional[dict[str, tuple[Optional[float], Optional[float]]]] = None,
+        facets: Optional[dict[str, list[str]]] = None,
+        sort_by: Optional[str] = None,
+        descending: bool = False,
+        limit: int = 20,
+    ) -> QueryResult:
+        started = time.perf_counter()
+        unknown_values: dict[str, list[str]] = {}
+        rows = np.flatnonzero(self.mask(ranges, facets, unknown_values))
+        if sort_by is not None:
+            if sort_by not in self.columns:
+                raise ValueError(f"不支持的排序字段: {sort_by}，可选: {', '.join(self.columns)}")
+            keys = self.columns[sort_by][rows]
+            # 缺失值（NaN）始终排在最后
+            order = np.argsort(-keys if descending else keys, kind="stable")
+            rows = rows[order]
+        products = [
+            {name: self.products[row].get(name) for name in RESULT_FIELDS if name in self.products[row]}
+            for row in rows[:limit]
+        ]
+        return QueryResult(
+            total=len(rows),
+            products=products,
+            unknown_values=unknown_values,
+            elapsed_us=(time.perf_counter() - started) * 1e6,
+        )
+
+    def as_tool(self, name: str = "filter_products") -> StructuredTool:
+        def filter_products(
+            ranges: Optional[list[RangeCondition]] = None,
+            facets: Optional[dict[str, list[str]]] = None,
+            sort_by: Optional[str] = None,
+            descending: bool = False,
+            limit: int = 20,
+        ) -> str:
+            try:
+                result = self.query(
+                    ranges={condition.field: (condition.min, condition.max) for condition in ranges or []},
+                    facets=facets,
+                    sort_by=sort_by,
+                    descending=descending,
+                    limit=limit,
+                )
+            except ValueError as e:
+                return json.dumps({"error": str(e)}, ensure_ascii=False)
+            output = {"total": result.total, "products": result.products}
+            if result.unknown_values:
+                # 把可选取值告诉模型，便于它修正条件后重试
+                output["unknown_values"] = {
+                    field_name: {"requested": values, "available": sorted(self.bitmaps[field_name])}
+                    for field_name, values in result.unknown_values.items()
+                }
+            return json.dumps(output, ensure_ascii=False)
+
+        numeric = "、".join(f"{key}（{label}）" for key, label in self.numeric_fields.items())
+        return StructuredTool.from_function(
+            func=filter_products,
+            name=name,
+            args_schema=ProductFilter,
+            description=(
+                "按数值区间和分类取值精确筛选面料产品，适合“xx 系列、价格低于 x、克重大于 y”之类的条件查询。"
+                f"数值字段: {numeric}。分类字段: {'、'.join(self.categorical_fields)}，"
+                "同一字段多个取值满足其一即可，不同字段须同时满足。"
+            ),
+        )
+
+
+def benchmark(index: ProductIndex, repeat: int = 2000) -> dict:
+    """典型筛选条件的单次查询延迟（微秒）"""
+    queries = [
+        {"ranges": {"mprice": (None, 20)}, "facets": {"series": ["棉涤"]}},
+        {"ranges": {"weight": (200, None), "mprice": (None, 20)}, "facets": {"className": ["罗纹"]}},
+        {"facets": {"dressing_category": ["T恤", "打底"]}, "sort_by": "mprice"},
+    ]
+    latencies = []
+    for i in range(repeat):
+        latencies.append(index.query(**queries[i % len(queries)]).elapsed_us)
+    latencies.sort()
+    return {
+        "products": index.size,
+        "p50_us": latencies[len(latencies) // 2],
+        "p99_us": latencies[int(len(latencies) * 0.99)],
+    }
+
+
+if __name__ == "__main__":
+    catalog = ProductIndex.from_file()
+    result = catalog.query(ranges={"mprice": (None, 20), "weight": (200, None)}, facets={"series": ["纯纺", "RC"]})
+    print(f"纯纺/RC、20 元/米以下、克重 ≥200g: {[p['code'] for p in result.products]}")
+    print("列式索引查询延迟报告")
+    print("-" * 40)
+    for copies in (1, 1000):
+        report = benchmark(ProductIndex(catalog.products * copies))
+        print(f"产品数 {report['products']:>6}: p50 {report['p50_us']:.1f} µs, p99 {report['p99_us']:.1f} µs")
@@ -0,0 +1,128 @@
+"""
+BatchingEmbedder 测试：假 embedder 记录每次批量请求，验证按大小/时间合并（含 graphiti 的 create(input_data=[text]) 调用方式）、相同文本去重和缓存，以及发送被取消时等待者不会挂起。
+
+运行：pytest tests/test_batching_embedder.py
+"""
+
+import asyncio
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "graphiti"))
+
+from batching_embedder import BatchingEmbedder
+
+
+class FakeEmbedder:
+    def __init__(self, delay: float = 0.01, fail: bool = False):
+        self.delay = delay
+        self.fail = fail
+        self.batches = []
+        self.creates = []
+
+    async def create_batch(self, texts):
+        self.batches.append(list(texts))
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("429 Too Many Requests")
+        return [[float(len(text))] for text in texts]
+
+    async def create(self, input_data):
+        self.creates.append(input_data)
+        return [float(len(input_data))]
+
+
+def test_concurrent_creates_are_batched_and_deduped():
+    inner = FakeEmbedder()
+    embedder = BatchingEmbedder(inner, max_batch_size=8, max_wait_ms=5)
+    facts = [f"6220A series 棉涤 #{i % 10}" for i in range(50)]
+
+    async def main():
+        return await asyncio.gather(*[embedder.create(fact) for fact in facts])
+
+    vectors = asyncio.run(main())
+    assert vectors == [[float(len(fact))] for fact in facts]
+    sent = [text for batch in inner.batches for text in batch]
+    assert sorted(sent) == sorted(set(facts))
+    assert all(len(batch) <= 8 for batch in inner.batches)
+    assert len(inner.batches) == 2
+    assert embedder.stats["deduped"] == 40
+
+
+def test_graphiti_call_shape_is_batched():
+    inner = FakeEmbedder()
+    embedder = BatchingEmbedder(inner, max_batch_size=8, max_wait_ms=5)
+    names = [f"series:棉涤 #{i % 10}" for i in range(50)]
+
+    async def main():
+        # graphiti 的 nodes.py / edges.py / search.py 都是 create(input_data=[text])
+        vectors = await asyncio.gather(*[embedder.create(input_data=[name]) for name in names])
+        tokens = await embedder.create(input_data=[101, 102, 103])
+        return vectors, tokens
+
+    vectors, tokens = asyncio.run(main())
+    assert vectors == [[float(len(name))] for name in names]
+    assert len(inner.batches) == 2 and embedder.stats["deduped"] == 40
+    # 只有 token 序列直接交给底层 embedder
+    assert inner.creates == [[101, 102, 103]] and tokens == [3.0]
+
+
+def test_single_create_flushes_after_max_wait():
+    inner = FakeEmbedder(delay=0)
+    embedder = BatchingEmbedder(inner, max_batch_size=64, max_wait_ms=30)
+
+    async def main():
+        start = time.perf_counter()
+        await embedder.create("series:棉涤")
+        return time.perf_counter() - start
+
+    elapsed = asyncio.run(main())
+    assert 0.025 <= elapsed < 0.2
+    assert inner.batches == [["series:棉涤"]]
+
+
+def test_cache_and_create_batch():
+    inner = FakeEmbedder()
+    embedder = BatchingEmbedder(inner, max_batch_size=4, max_wait_ms=1)
+
+    async def main():
+        first = await embedder.create_batch(["a", "bb", "a", "ccc"])
+        second = await embedder.create_batch(["bb", "ccc"])
+        return first, second
+
+    first, second = asyncio.run(main())
+    assert first == [[1.0], [2.0], [1.0], [3.0]]
+    assert second == [[2.0], [3.0]]
+    assert inner.batches == [["a", "bb", "ccc"]]
+    assert embedder.stats["cache_hits"] == 2
+
+
+def test_errors_reach_every_waiter():
+    embedder = BatchingEmbedder(FakeEmbedder(fail=True), max_batch_size=4, max_wait_ms=1)
+
+    async def main():
+        return await asyncio.gather(*[embedder.create(t) for t in ("x", "y", "x")], return_exceptions=True)
+
+    results = asyncio.run(main())
+    assert all(isinstance(r, RuntimeError) for r in results)
+    with pytest.raises(RuntimeError):
+        asyncio.run(embedder.create("x"))  # 失败结果不进入缓存，会重新请求
+
+
+def test_cancelled_send_releases_waiters():
+    embedder = BatchingEmbedder(FakeEmbedder(delay=10), max_batch_size=4, max_wait_ms=1)
+
+    async def main():
+        waiters = [asyncio.ensure_future(embedder.create(t)) for t in ("x", "y")]
+        await asyncio.sleep(0.05)
+        for task in list(embedder._tasks):
+            task.cancel()
+        results = await asyncio.wait_for(asyncio.gather(*waiters, return_exceptions=True), 1)
+        return results, dict(embedder._inflight)
+
+    results, inflight = asyncio.run(main())
+    assert all(isinstance(r, asyncio.CancelledError) for r in results)
+    assert inflight == {}
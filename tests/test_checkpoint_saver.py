@@ -0,0 +1,118 @@
+"""
+BatchedSqliteSaver 测试：与 SqliteSaver 保存的状态一致、每个超步只提交一个事务、
+async 模式下读操作能读到尚在队列中的写入、中断写入立即落盘、后台写入失败会抛给调用方。
+
+运行：pytest tests/test_checkpoint_saver.py
+"""
+
+import asyncio
+import os
+import sqlite3
+import sys
+from typing import TypedDict
+
+import pytest
+
+# order_graph 在导入时会创建 ChatOpenAI，规则抽取覆盖全部字段时不会发出请求
+os.environ.setdefault("DASHSCOPE_API_KEY", "test")
+os.environ.setdefault("DASHSCOPE_BASE_URL", "http://127.0.0.1:9/v1")
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from langchain_core.messages import HumanMessage
+from langgraph.checkpoint.sqlite import SqliteSaver
+from langgraph.graph import END, START, StateGraph
+from langgraph.types import interrupt
+
+import order_graph
+from checkpoint_saver import BatchedSqliteSaver
+
+ORDER = {"messages": [HumanMessage(content="客户张三要10条红色A001款")], "extracted_fields": {}, "missing_fields": []}
+
+
+def run_orders(saver, threads=("a", "b")):
+    graph = order_graph.build_order_graph(checkpointer=saver)
+    for thread_id in threads:
+        graph.invoke(ORDER, {"configurable": {"thread_id": thread_id}})
+    return graph
+
+
+@pytest.mark.parametrize("durability", ["sync", "async"])
+def test_state_matches_sqlite_saver(tmp_path, durability):
+    baseline = run_orders(SqliteSaver(sqlite3.connect(tmp_path / "base.db", check_same_thread=False)))
+    saver = BatchedSqliteSaver(sqlite3.connect(tmp_path / "batched.db", check_same_thread=False), durability=durability)
+    batched = run_orders(saver)
+
+    config = {"configurable": {"thread_id": "a"}}
+    assert batched.get_state(config).values["extracted_fields"] == baseline.get_state(config).values["extracted_fields"]
+    assert len(list(batched.get_state_history(config))) == len(list(baseline.get_state_history(config)))
+    assert saver.stats["transactions"] <= saver.stats["checkpoints"]
+    if durability == "sync":
+        # put_writes 与同一步的 put 合并提交
+        assert saver.stats["transactions"] == saver.stats["checkpoints"]
+    saver.close()
+
+
+def test_async_writes_survive_close_and_reopen(tmp_path):
+    path = tmp_path / "async.db"
+    with BatchedSqliteSaver.from_conn_string(str(path), durability="async") as saver:
+        run_orders(saver, threads=[f"t{i}" for i in range(20)])
+        # 队列可能还没写完，读操作会先等待
+        assert saver.get_tuple({"configurable": {"thread_id": "t19"}}) is not None
+
+    with SqliteSaver.from_conn_string(str(path)) as reopened:
+        graph = order_graph.build_order_graph(checkpointer=reopened)
+        state = graph.get_state({"configurable": {"thread_id": "t19"}})
+        assert state.values["extracted_fields"]["product_code"] == "A001"
+        assert reopened.conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+
+class ApprovalState(TypedDict):
+    answer: str
+
+
+def ask(state: ApprovalState):
+    return {"answer": interrupt("确认下单？")}
+
+
+def test_interrupt_is_committed_without_put(tmp_path):
+    path = tmp_path / "interrupt.db"
+    builder = StateGraph(ApprovalState)
+    builder.add_node("ask", ask)
+    builder.add_edge(START, "ask")
+    builder.add_edge("ask", END)
+    saver = BatchedSqliteSaver(sqlite3.connect(path, check_same_thread=False))
+    graph = builder.compile(checkpointer=saver)
+    graph.invoke({"answer": ""}, {"configurable": {"thread_id": "1"}})
+
+    # 另一个连接直接读库，中断写入已经提交
+    with SqliteSaver.from_conn_string(str(path)) as other:
+        pending = other.get_tuple({"configurable": {"thread_id": "1"}}).pending_writes
+        assert any(channel == "__interrupt__" for _, channel, _ in pending)
+
+
+def test_async_graph_api(tmp_path):
+    saver = BatchedSqliteSaver(sqlite3.connect(tmp_path / "aio.db", check_same_thread=False), durability="async")
+    graph = order_graph.build_order_graph(checkpointer=saver)
+    config = {"configurable": {"thread_id": "aio"}}
+
+    async def main():
+        await graph.ainvoke(ORDER, config)
+        return await graph.aget_state(config)
+
+    state = asyncio.run(main())
+    assert state.values["missing_fields"] == []
+    saver.close()
+
+
+def test_background_failure_is_raised(tmp_path):
+    saver = BatchedSqliteSaver(sqlite3.connect(tmp_path / "fail.db", check_same_thread=False), durability="async")
+
+    def broken_commit(batches):
+        raise sqlite3.OperationalError("disk I/O error")
+
+    saver._commit = broken_commit
+    config = {"configurable": {"thread_id": "1", "checkpoint_ns": "", "checkpoint_id": "c0"}}
+    saver.put_writes(config, [("__error__", "boom")], task_id="task")
+    with pytest.raises(RuntimeError, match="后台写入失败"):
+        saver.flush()
+    saver.close()
@@ -0,0 +1,150 @@
+"""
+DeltaSqliteSaver 测试：还原出的状态和历史与 SqliteSaver 一致、冷缓存下沿父链还原、
+从旧 checkpoint 分叉（时间旅行）、按 ID 替换消息退回完整保存、关键帧间隔、压缩往返，
+以及提交失败的 checkpoint 不进入缓存、async 模式的还原结果。
+
+运行：pytest tests/test_delta_checkpoint.py
+"""
+
+import os
+import sqlite3
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from langchain_core.messages import HumanMessage
+from langgraph.checkpoint.sqlite import SqliteSaver
+
+from bench_delta_checkpoint import QUESTION, build_chat_graph
+from checkpoint_saver import BatchedSqliteSaver
+from delta_checkpoint import CompressedSerializer, DeltaSqliteSaver
+
+CONFIG = {"configurable": {"thread_id": "chat"}}
+
+
+def chat(graph, turns, start=1):
+    for turn in range(start, start + turns):
+        graph.invoke({"messages": [HumanMessage(content=QUESTION.format(turn=turn), id=f"h{turn}")]}, CONFIG)
+
+
+def contents(state):
+    return [message.content for message in state.values["messages"]]
+
+
+def test_state_and_history_match_sqlite_saver(tmp_path):
+    baseline = build_chat_graph(SqliteSaver(sqlite3.connect(tmp_path / "base.db", check_same_thread=False)))
+    saver = DeltaSqliteSaver(sqlite3.connect(tmp_path / "delta.db", check_same_thread=False), keyframe_interval=7)
+    graph = build_chat_graph(saver)
+    chat(baseline, 12)
+    chat(graph, 12)
+
+    assert contents(graph.get_state(CONFIG)) == contents(baseline.get_state(CONFIG))
+    assert [contents(s) for s in graph.get_state_history(CONFIG)] == [
+        contents(s) for s in baseline.get_state_history(CONFIG)
+    ]
+    assert saver.stats["deltas"] > saver.stats["keyframes"] > 1
+
+
+def test_cold_cache_walks_parent_chain(tmp_path):
+    path = tmp_path / "delta.db"
+    with DeltaSqliteSaver.from_conn_string(str(path), keyframe_interval=10) as saver:
+        chat(build_chat_graph(saver), 5)
+        expected = contents(build_chat_graph(saver).get_state(CONFIG))
+
+    with DeltaSqliteSaver.from_conn_string(str(path), keyframe_interval=10) as reopened:
+        graph = build_chat_graph(reopened)
+        assert contents(graph.get_state(CONFIG)) == expected
+        loads = reopened.stats["parent_loads"]
+        assert 0 < loads < 10
+        # 整条历史复用缓存，不再重复加载父节点
+        history = list(graph.get_state_history(CONFIG))
+        assert len(history) == 15
+        assert reopened.stats["parent_loads"] == loads
+
+
+def test_fork_from_earlier_checkpoint(tmp_path):
+    saver = DeltaSqliteSaver(sqlite3.connect(tmp_path / "delta.db", check_same_thread=False))
+    graph = build_chat_graph(saver)
+    chat(graph, 4)
+    # 回到第 2 轮结束时的 checkpoint，从那里改写后续对话
+    earlier = next(s for s in graph.get_state_history(CONFIG) if len(s.values["messages"]) == 4 and not s.next)
+    graph.invoke({"messages": [HumanMessage(content="换成蓝色", id="fork")]}, earlier.config)
+
+    forked = contents(graph.get_state(CONFIG))
+    assert forked[:4] == contents(earlier) and forked[4] == "换成蓝色" and len(forked) == 6
+    saver._cache.clear()
+    assert contents(graph.get_state(CONFIG)) == forked
+    # 原分支的最新状态不受影响
+    original = [s for s in graph.get_state_history(CONFIG) if len(s.values["messages"]) == 8]
+    assert original and contents(original[0])[4].startswith("客户张三要3条")
+
+
+def test_replaced_message_is_stored_in_full(tmp_path):
+    saver = DeltaSqliteSaver(sqlite3.connect(tmp_path / "delta.db", check_same_thread=False))
+    graph = build_chat_graph(saver)
+    chat(graph, 2)
+    keyframes = saver.stats["keyframes"]
+    graph.update_state(CONFIG, {"messages": [HumanMessage(content="改成20条", id="h1")]})
+    assert saver.stats["keyframes"] == keyframes + 1
+
+    saver._cache.clear()
+    assert contents(graph.get_state(CONFIG))[0] == "改成20条"
+    assert len(contents(graph.get_state(CONFIG))) == 4
+
+
+def test_keyframe_interval_bounds_chain(tmp_path):
+    saver = DeltaSqliteSaver(sqlite3.connect(tmp_path / "delta.db", check_same_thread=False), keyframe_interval=4)
+    chat(build_chat_graph(saver), 8)
+    # 输入前的空 checkpoint 没有 messages，其余 23 个每 4 个一个关键帧
+    assert saver.stats["keyframes"] == 6 and saver.stats["deltas"] == 17
+
+
+def test_compressed_serializer_round_trip():
+    serde = CompressedSerializer(min_size=64)
+    small = serde.dumps_typed({"a": 1})
+    large = serde.dumps_typed({"messages": [HumanMessage(content=QUESTION.format(turn=i)) for i in range(20)]})
+    assert not small[0].endswith("+zlib") and large[0].endswith("+zlib")
+    assert serde.loads_typed(small) == {"a": 1}
+    assert serde.loads_typed(large)["messages"][19].content == QUESTION.format(turn=19)
+    # 未压缩的旧数据照常读取
+    assert serde.loads_typed(serde.inner.dumps_typed([1, 2])) == [1, 2]
+
+
+def test_failed_commit_is_not_cached(tmp_path, monkeypatch):
+    saver = DeltaSqliteSaver(sqlite3.connect(tmp_path / "delta.db", check_same_thread=False))
+    graph = build_chat_graph(saver)
+    chat(graph, 2)
+    expected = contents(graph.get_state(CONFIG))
+
+    def fail(self, batches):
+        raise sqlite3.OperationalError("disk I/O error")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(BatchedSqliteSaver, "_commit", fail)
+        with pytest.raises(sqlite3.OperationalError):
+            chat(graph, 1, start=3)
+
+    # 缓存里只有已落库的 checkpoint，后续增量不会指向丢失的父节点
+    stored = {row[0] for row in saver.conn.execute("SELECT checkpoint_id FROM checkpoints")}
+    assert {key[2] for key in saver._cache} <= stored
+    assert saver._uncommitted == {}
+    assert contents(graph.get_state(CONFIG)) == expected
+    chat(graph, 2, start=3)
+    saver._cache.clear()
+    assert len(contents(graph.get_state(CONFIG))) == 8
+    assert all(s.values for s in graph.get_state_history(CONFIG))
+
+
+def test_async_durability_round_trip(tmp_path):
+    with DeltaSqliteSaver.from_conn_string(str(tmp_path / "delta.db"), durability="async") as saver:
+        graph = build_chat_graph(saver)
+        chat(graph, 6)
+        expected = contents(graph.get_state(CONFIG))
+        history = [contents(s) for s in graph.get_state_history(CONFIG)]
+
+    with DeltaSqliteSaver.from_conn_string(str(tmp_path / "delta.db")) as reopened:
+        graph = build_chat_graph(reopened)
+        assert contents(graph.get_state(CONFIG)) == expected
+        assert [contents(s) for s in graph.get_state_history(CONFIG)] == history
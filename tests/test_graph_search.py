@@ -0,0 +1,156 @@
+"""
+图谱多路并行检索测试：假 graphiti（可控延迟的 search / search_）+ 内存图驱动，
+验证三路结果融合排序、编码/属性的结构化查找（只认图中已有的编码），超过截止时间的检索路径被取消，
+以及编码表在截止时间之外加载、写入后自动重新加载。
+
+运行：pytest tests/test_graph_search.py
+"""
+
+import asyncio
+import os
+import sys
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "graphiti"))
+
+from graph_search import GraphSearcher, SearchHit, fuse
+from memory_driver import InMemoryGraphDriver
+from neo4j_pool import CachedGraphDriver
+from product_ingest import BulkProductIngestor, load_products
+
+CATALOG = os.path.join(os.path.dirname(os.path.abspath(__file__)), "graphiti", "1218_json.json")
+
+
+class FakeGraphiti:
+    """edges / nodes 两路检索按给定延迟返回固定结果，driver 为已导入目录的内存图"""
+
+    def __init__(self, driver, edges=(), nodes=(), edge_delay=0.0, node_delay=0.0):
+        self.driver = driver
+        self.edges = list(edges)
+        self.nodes = list(nodes)
+        self.edge_delay = edge_delay
+        self.node_delay = node_delay
+        self.cancelled = []
+
+    async def search(self, query, group_ids=None, num_results=10):
+        return await self._delayed("edges", self.edge_delay, self.edges[:num_results])
+
+    async def search_(self, query, config=None, group_ids=None):
+        return SimpleNamespace(nodes=await self._delayed("nodes", self.node_delay, self.nodes))
+
+    async def _delayed(self, name, delay, result):
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            self.cancelled.append(name)
+            raise
+        return result
+
+
+def loaded_driver() -> InMemoryGraphDriver:
+    driver = InMemoryGraphDriver()
+    asyncio.run(BulkProductIngestor(driver, group_id="product_demo").ingest(load_products(CATALOG)))
+    return driver
+
+
+def product_uuid(driver, code):
+    return next(node["uuid"] for node in driver.nodes_with_label("Product") if node["name"] == code)
+
+
+def make_searcher(graphiti, **kwargs) -> GraphSearcher:
+    searcher = GraphSearcher(graphiti, **kwargs)
+    # graphiti 未安装时节点检索无法导入检索配置，测试直接调用 search_
+    searcher.strategies["nodes"] = lambda question: _search_nodes(graphiti)
+    return searcher
+
+
+async def _search_nodes(graphiti):
+    results = await graphiti.search_("")
+    return [SearchHit(key=node.uuid, kind="node", text=node.name) for node in results.nodes]
+
+
+def test_fuse_accumulates_scores_across_strategies():
+    a, b, c = (SearchHit(key=key, kind="node", text=key) for key in "abc")
+    fused = fuse({"edges": [a, b], "nodes": [c, b]}, weights={})
+    assert [hit.key for hit in fused] == ["b", "a", "c"]
+    assert fused[0].sources == ["edges", "nodes"]
+
+
+def test_code_and_attribute_lookup_fuse_with_semantic_results():
+    driver = loaded_driver()
+    target = product_uuid(driver, "6220A")
+    graphiti = FakeGraphiti(
+        driver,
+        edges=[SimpleNamespace(uuid="edge-1", fact="6220A series 棉涤")],
+        nodes=[SimpleNamespace(uuid="other", name="6213", summary=""), SimpleNamespace(uuid=target, name="6220A", summary="")],
+    )
+    report = asyncio.run(make_searcher(graphiti).search("6220A 和其他棉涤面料有什么区别"))
+
+    assert report.timed_out == [] and report.errors == {}
+    assert report.hits[0].key == target
+    assert report.hits[0].kind == "product"
+    assert report.hits[0].sources == ["nodes", "attributes"]
+    assert "series=棉涤" in report.hits[0].text
+    # 其他棉涤产品也由属性查找命中（series 按逗号拆分，"麻,棉麻,新麻,棉涤,混纺" 也算）
+    cotton = [node for node in driver.nodes_with_label("Product") if "棉涤" in (node.get("series") or "").split(",")]
+    assert len([hit for hit in report.hits if "attributes" in hit.sources]) == len(cotton)
+
+
+def test_deadline_returns_partial_results_and_cancels_slow_strategy():
+    driver = loaded_driver()
+    graphiti = FakeGraphiti(
+        driver,
+        edges=[SimpleNamespace(uuid="edge-1", fact="6090A className 罗纹")],
+        nodes=[SimpleNamespace(uuid="slow", name="slow", summary="")],
+        node_delay=5.0,
+    )
+
+    async def main():
+        report = await make_searcher(graphiti, deadline_ms=200).search("6090A 是什么面料")
+        await asyncio.sleep(0)  # 让被取消的任务处理 CancelledError
+        return report
+
+    report = asyncio.run(main())
+    assert report.timed_out == ["nodes"]
+    assert sorted(report.completed) == ["attributes", "edges"]
+    assert report.elapsed_ms < 1000
+    assert graphiti.cancelled == ["nodes"]
+    assert report.hits[0].key == product_uuid(driver, "6090A")
+    assert "检索超时" in report.to_text()
+
+
+def test_as_tool_returns_formatted_text():
+    graphiti = FakeGraphiti(loaded_driver())
+    tool = make_searcher(graphiti).as_tool()
+    text = asyncio.run(tool.ainvoke({"question": "有没有冬季的罗纹面料"}))
+    assert tool.name == "graph_search"
+    assert "6090A" in text
+
+
+def test_only_known_product_codes_are_boosted():
+    driver = loaded_driver()
+    searcher = make_searcher(FakeGraphiti(driver))
+
+    # 克重、年份形似编码但不在产品编码表里
+    assert asyncio.run(searcher._lookup_attributes("1200g 的货 2024 年还有吗")) == []
+    hits = asyncio.run(searcher._lookup_attributes("2024 年的 6323b1 还有吗"))
+    assert [hit.key for hit in hits] == [product_uuid(driver, "6323B1")]
+
+
+def test_tables_load_outside_deadline_and_reload_after_writes():
+    inner = loaded_driver()
+    driver = CachedGraphDriver(inner)
+    searcher = make_searcher(FakeGraphiti(inner), driver=driver, deadline_ms=150)
+    # 每次往返 100ms：整表加载 + 查找超过截止时间，但加载不计入截止时间
+    inner.latency = 0.1
+
+    report = asyncio.run(searcher.search("6090A 是什么面料"))
+    assert "attributes" in report.completed
+    assert report.hits[0].key == product_uuid(inner, "6090A")
+
+    # 经过同一个驱动导入新产品后，不调用 refresh_vocabulary 也能按新编码查到
+    inner.latency = 0.0
+    new_product = {"code": "7001X", "series": "棉涤"}
+    asyncio.run(BulkProductIngestor(driver, group_id="product_demo").ingest([new_product]))
+    report = asyncio.run(searcher.search("7001x 还有货吗"))
+    assert report.hits[0].key == product_uuid(inner, "7001X")
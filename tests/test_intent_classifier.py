@@ -0,0 +1,41 @@
+"""
+本地意图预分类测试：关键词规则按整词匹配英文天气词和 calculate，rainbow / snowflake 不会被判为天气，
+miscalculated 不会被判为计算。
+
+运行：pytest tests/test_intent_classifier.py
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from intent_classifier import KEYWORD_RULES, IntentPreClassifier
+
+
+@pytest.mark.parametrize(
+    "text",
+    ["Will it rain in London tomorrow?", "is it raining now", "snowy weekend?", "明天会下雪吗"],
+)
+def test_weather_keywords(text):
+    assert KEYWORD_RULES["weather"].search(text)
+    assert IntentPreClassifier().classify(text) == ("weather", "keyword")
+
+
+@pytest.mark.parametrize("text", ["rainbow是什么", "snowflake 数据仓库怎么用", "Brainstorm some names"])
+def test_words_containing_weather_terms_are_not_weather(text):
+    assert not KEYWORD_RULES["weather"].search(text)
+    assert IntentPreClassifier().classify(text) != ("weather", "keyword")
+
+
+@pytest.mark.parametrize("text", ["calculate my BMI", "Calculating the tip", "calculation of the area"])
+def test_math_keywords(text):
+    assert KEYWORD_RULES["math"].search(text)
+
+
+@pytest.mark.parametrize("text", ["The budget was miscalculated", "incalculable losses"])
+def test_words_containing_calculate_are_not_math(text):
+    assert not KEYWORD_RULES["math"].search(text)
+    assert IntentPreClassifier().classify(text) != ("math", "keyword")
@@ -0,0 +1,93 @@
+"""
+math_mcp 算术引擎测试：运算优先级、一元负号、三种数值模式、指数和结果大小限制、编译缓存复用，
+以及 math 工具对超大结果返回友好的错误。
+
+运行：pytest tests/test_math_engine.py
+"""
+
+import os
+import sys
+from decimal import Decimal
+from fractions import Fraction
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mcp_server.math_mcp.engine import (
+    MAX_RESULT_BITS,
+    compile_expression,
+    evaluate,
+    evaluate_expression,
+)
+from mcp_server.math_mcp.server import _solve
+
+
+@pytest.mark.parametrize(
+    "expr, expected",
+    [
+        ("2 + 3 * 4", 14),
+        ("(2 + 3) * 4", 20),
+        ("2 ** 3 ** 2", 512),
+        ("-2 ** 2", -4),
+        ("(-2) ** 2", 4),
+        ("- - 3", 3),
+        ("-3 + +5", 2),
+        ("7 // 2 * 2 + 7 % 2", 7),
+        ("(3 + 5) × 12 ÷ 4", 24.0),
+    ],
+)
+def test_precedence_and_unary(expr, expected):
+    assert evaluate_expression(expr) == expected
+
+
+def test_modes():
+    assert evaluate_expression("0.1 + 0.2") == pytest.approx(0.3)
+    assert evaluate_expression("0.1 + 0.2", "decimal") == Decimal("0.3")
+    assert evaluate_expression("1 / 3", "fraction") == Fraction(1, 3)
+    assert evaluate_expression("1 / 3 * 3", "fraction") == 1
+    # decimal 模式按 28 位有效数字计算
+    assert str(evaluate_expression("1 / 3", "decimal")) == "0." + "3" * 28
+    with pytest.raises(ValueError, match="Unsupported mode"):
+        evaluate_expression("1 + 1", "complex")
+
+
+@pytest.mark.parametrize("mode", ["float", "decimal", "fraction"])
+@pytest.mark.parametrize("expr", ["9 ** 9 ** 9", "2 ** 100000", "10 ** 5000"])
+def test_power_guards(expr, mode):
+    with pytest.raises(ValueError, match="too large"):
+        evaluate_expression(expr, mode)
+
+
+@pytest.mark.parametrize("mode", ["float", "fraction"])
+def test_result_size_guard_on_products(mode):
+    # 每个乘数都在限制内，乘积超出
+    half = MAX_RESULT_BITS // 2 + 100
+    with pytest.raises(ValueError, match="Result too large"):
+        evaluate_expression(f"2 ** {half} * 2 ** {half}", mode)
+    assert evaluate_expression(f"2 ** 6000 * 2 ** {MAX_RESULT_BITS - 6001}", mode) == 2 ** (MAX_RESULT_BITS - 1)
+    # 限制内的结果都能转成字符串
+    assert len(str(evaluate_expression("3 ** 8000", mode))) == 3817
+
+
+@pytest.mark.parametrize("expr", ["abs(-1)", "x + 1", "'a' * 3", "True + 1", "[1, 2]"])
+def test_rejects_non_arithmetic(expr):
+    with pytest.raises(ValueError):
+        evaluate_expression(expr)
+
+
+def test_compile_cache_reuse():
+    compile_expression.cache_clear()
+    program = compile_expression("(1 + 2) * 3")
+    assert compile_expression("(1 + 2) * 3") is program
+    info = compile_expression.cache_info()
+    assert (info.hits, info.misses) == (1, 1)
+    # 同一个程序可以按不同模式求值
+    assert evaluate(program) == 9 and evaluate(program, "fraction") == Fraction(9)
+
+
+def test_math_tool_reports_large_results():
+    for mode in ("float", "decimal", "fraction"):
+        with pytest.raises(ValueError, match="too large"):
+            _solve("10 ** 5000", mode)
+    assert _solve("2 ** 10", "fraction") == "1024"
@@ -0,0 +1,43 @@
+"""
+math_batch 冒烟测试：用内存传输调用 math_mcp，基准用的算式表全部能算出结果。
+
+运行：pytest tests/test_math_mcp_batch.py
+"""
+
+import asyncio
+import os
+import re
+import sys
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(TESTS_DIR))
+sys.path.insert(0, TESTS_DIR)
+
+from fastmcp import Client
+
+from bench_math_mcp_batch import make_questions
+from mcp_server.math_mcp.server import mcp
+
+
+def call_batch(questions):
+    async def main():
+        async with Client(mcp) as client:
+            return await client.call_tool("math_batch", {"questions": questions})
+
+    return asyncio.run(main()).structured_content["result"]
+
+
+def test_bench_questions_all_solve():
+    questions = make_questions(10)
+    items = call_batch(questions)
+    assert len(items) == 10
+    assert all("error" not in item for item in items), items
+    # "(a + b) × c 是多少"
+    a, b, c = map(int, re.findall(r"\d+", questions[0]))
+    assert items[0]["result"] == (a + b) * c
+
+
+def test_errors_are_reported_per_item():
+    items = call_batch(["1 + 1", "1 / 0", "1 + 1"])
+    assert items[0] == items[2] == {"result": 2}
+    assert "Division by zero" in items[1]["error"]
@@ -0,0 +1,66 @@
+"""
+MCPClientPool 测试：常驻会话上调用工具、close 立即取消后台任务（不等保活间隔），
+连接超时时 start 抛错且不留下仍在重连的任务。
+
+运行：pytest tests/test_mcp_client_pool.py
+"""
+
+import asyncio
+import os
+import socket
+import sys
+import time
+
+import pytest
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, TESTS_DIR)
+
+from mcp_client_pool import MCPClientPool
+
+MATH_STDIO = {
+    "math": {
+        "transport": "stdio",
+        "command": sys.executable,
+        "args": [os.path.join(os.path.dirname(TESTS_DIR), "mcp_server", "math_mcp", "server.py")],
+        "env": {"PYTHONPATH": os.getenv("PYTHONPATH", ""), "PATH": os.getenv("PATH", "")},
+    },
+}
+
+
+def unused_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def test_call_and_prompt_close():
+    async def main():
+        pool = MCPClientPool(MATH_STDIO, keepalive_interval=60)
+        await pool.start()
+        result = await pool.call_tool("math", "math", {"question": "(3 + 5) * 12"})
+        started = time.perf_counter()
+        await pool.close()
+        return result, time.perf_counter() - started, pool
+
+    result, close_seconds, pool = asyncio.run(main())
+    assert result.content[0].text == "96"
+    assert close_seconds < 5
+    assert all(slot.task.done() for slot in pool._slots.values())
+
+
+def test_start_timeout_cancels_reconnect_task():
+    connections = {"down": {"url": f"http://127.0.0.1:{unused_port()}/mcp", "transport": "streamable_http"}}
+
+    async def main():
+        pool = MCPClientPool(connections, connect_timeout=0.3, backoff_base=0.05, backoff_max=0.05)
+        with pytest.raises(asyncio.TimeoutError):
+            await pool.start()
+        slot = pool._slots["down"]
+        reconnects = slot.reconnects
+        await asyncio.sleep(0.3)
+        return slot, reconnects
+
+    slot, reconnects = asyncio.run(main())
+    assert slot.task.done()
+    assert slot.reconnects == reconnects
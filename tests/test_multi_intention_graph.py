@@ -1,4 +1,6 @@
 import os
+import sys
+from pathlib import Path
 from dotenv import load_dotenv
 from langchain_openai import ChatOpenAI
 from langgraph.graph import StateGraph, MessagesState, START, END
@@ -8,6 +10,12 @@ from langchain_core.runnables import RunnableConfig
 from langchain_core.tools import tool
 from typing import Literal
 
+from intent_classifier import INTENTS, IntentPreClassifier
+
+# 与 math_mcp 共用安全的表达式引擎
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from mcp_server.math_mcp.engine import evaluate_expression
+
 _ = load_dotenv()
 
 # 配置大模型服务
@@ -28,7 +36,7 @@ def get_weather(city: str) -> str:
 def calculate(expression: str) -> str:
     """计算数学表达式的结果"""
     try:
-        result = eval(expression)
+        result = evaluate_expression(expression)
         return f"计算结果：{expression} = {result}"
     except Exception as e:
         return f"计算错误：{str(e)}"
@@ -39,8 +47,13 @@ math_tools = [calculate]
 weather_tool_node = ToolNode(weather_tools)
 math_tool_node = ToolNode(math_tools)
 
-# 分类节点：使用LLM对问题进行意图分类
-def classify_intention(state: MessagesState, config: RunnableConfig):
+# 本地意图预分类器：关键词规则 + 最近质心分类，确定的问题不再调用 LLM
+pre_classifier = IntentPreClassifier()
+
+# 分类统计：local 本地判定次数，llm 交给 LLM 分类的次数
+_classify_stats = {"local": 0, "llm": 0}
+
+def _llm_classify(text: str) -> str:
     """使用LLM对用户问题进行意图分类"""
     system_prompt = """你是一个意图分类助手。请根据用户的问题，判断其意图类型。
 
@@ -51,8 +64,7 @@ def classify_intention(state: MessagesState, config: RunnableConfig):
 
     请只返回一个单词：weather、math 或 chat，不要返回其他内容。"""
 
-    last_message = state["messages"][-1]
-    classification_prompt = f"""用户问题：{last_message.content}
+    classification_prompt = f"""用户问题：{text}
 
     请判断意图类型（只返回一个单词：weather、math 或 chat）："""
 
@@ -65,15 +77,26 @@ def classify_intention(state: MessagesState, config: RunnableConfig):
     intention = response.content.strip().lower()
     
     # 确保返回的是有效的意图类型
-    if intention not in ["weather", "math", "chat"]:
+    if intention not in INTENTS:
         intention = "chat"  # 默认为聊天
+    return intention
+
+# 多意图状态：意图单独存放，不写入消息列表，避免污染对话历史
+class IntentionState(MessagesState):
+    intention: str
+
+# 分类节点：先本地预分类，不确定时再使用LLM进行意图分类
+def classify_intention(state: IntentionState, config: RunnableConfig):
+    """对用户问题进行意图分类"""
+    last_message = state["messages"][-1]
+    intention, _ = pre_classifier.classify(last_message.content)
+    if intention is None:
+        _classify_stats["llm"] += 1
+        intention = _llm_classify(last_message.content)
+    else:
+        _classify_stats["local"] += 1
     
-    # 将分类结果添加到消息中
-    classification_msg = HumanMessage(
-        content=f"[系统分类结果：{intention}]"
-    )
-    
-    return {"messages": state["messages"] + [classification_msg]}
+    return {"intention": intention}
 
 # 天气处理节点
 def weather_handler(state: MessagesState, config: RunnableConfig):
@@ -99,17 +122,10 @@ def chat_handler(state: MessagesState, config: RunnableConfig):
     return {"messages": [llm.invoke(all_messages)]}
 
 # 路由函数：根据分类结果决定路由
-def route_by_intention(state: MessagesState, config: RunnableConfig) -> Literal["weather", "math", "chat"]:
+def route_by_intention(state: IntentionState, config: RunnableConfig) -> Literal["weather", "math", "chat"]:
     """根据分类结果路由到不同的处理节点"""
-    # 从最后一条消息中提取分类结果
-    last_message = state["messages"][-1].content
-    
-    if "[系统分类结果：weather]" in last_message:
-        return "weather"
-    elif "[系统分类结果：math]" in last_message:
-        return "math"
-    else:
-        return "chat"
+    intention = state.get("intention")
+    return intention if intention in INTENTS else "chat"
 
 # 判断是否需要调用工具（天气）
 def should_use_weather_tool(state: MessagesState, config: RunnableConfig):
@@ -128,9 +144,9 @@ def should_use_math_tool(state: MessagesState, config: RunnableConfig):
     return "end"
 
 # 构建多意图状态图
-def build_multi_intention_graph():
-    """构建多意图分类处理图"""
-    builder = StateGraph(MessagesState)
+def build_multi_intention_graph(checkpointer=None):
+    """构建多意图分类处理图，传入 checkpointer 可进行多轮对话"""
+    builder = StateGraph(IntentionState)
     
     # 添加节点
     builder.add_node("classify", classify_intention)  # 分类节点
@@ -179,7 +195,7 @@ def build_multi_intention_graph():
     # 聊天处理直接结束
     builder.add_edge("chat_handler", END)
     
-    return builder.compile(name="multi-intention-graph")
+    return builder.compile(name="multi-intention-graph", checkpointer=checkpointer)
 
 # 运行多意图图
 def demo(query: str = "北京今天天气怎么样？"):
@@ -221,4 +237,6 @@ if __name__ == "__main__":
         print("\n" + "=" * 60)
         demo(query)
         print("\n")
+    
+    print(f"意图分类: 本地判定 {_classify_stats['local']} 次，调用 LLM {_classify_stats['llm']} 次")
 
@@ -0,0 +1,58 @@
+"""
+多意图图状态回归测试：意图写入独立的 intention 通道，多轮对话后消息数只随轮数线性增长，
+处理节点发给 LLM 的消息中不再夹带分类结果。
+
+运行：pytest tests/test_multi_intention_state.py（使用假模型，无需大模型服务）
+"""
+
+import os
+import sys
+import uuid
+
+# 导入时会创建 ChatOpenAI，测试中替换为假模型，不会真正发出请求
+os.environ.setdefault("DASHSCOPE_API_KEY", "test")
+os.environ.setdefault("DASHSCOPE_BASE_URL", "http://127.0.0.1:9/v1")
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.checkpoint.memory import InMemorySaver
+
+import test_multi_intention_graph as mig
+
+QUERIES = ["北京今天天气怎么样？", "算一下 88 * 12", "你好，介绍一下你自己"]
+
+
+class FakeLLM:
+    """记录每次调用的输入消息，固定返回不带工具调用的回复"""
+
+    def __init__(self):
+        self.calls = []
+
+    def bind_tools(self, tools):
+        return self
+
+    def invoke(self, messages):
+        self.calls.append(list(messages))
+        return AIMessage(content="chat")
+
+
+def test_state_stays_linear_after_n_turns(monkeypatch):
+    fake = FakeLLM()
+    monkeypatch.setattr(mig, "llm", fake)
+    graph = mig.build_multi_intention_graph(checkpointer=InMemorySaver())
+    config = {"configurable": {"thread_id": str(uuid.uuid4())}}
+
+    turns = 10
+    for i in range(turns):
+        query = QUERIES[i % len(QUERIES)]
+        result = graph.invoke({"messages": [HumanMessage(content=query)]}, config)
+
+    messages = result["messages"]
+    # 每轮只有一条用户消息和一条回复
+    assert len(messages) == 2 * turns
+    assert not any("系统分类结果" in str(m.content) for m in messages)
+    assert result["intention"] in mig.INTENTS
+
+    # 最后一次处理节点调用：系统提示 + 历史消息 + 本轮问题，不含重复历史
+    handler_calls = [c for c in fake.calls if "意图分类助手" not in str(c[0].content)]
+    assert len(handler_calls[-1]) == 1 + 2 * turns - 1
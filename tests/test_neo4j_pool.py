@@ -0,0 +1,116 @@
+"""
+Neo4j 查询缓存测试：内存图驱动代替 Neo4j，验证读查询按规范化 Cypher + 参数缓存、并发合并、TTL 过期，
+以及导入写入使缓存失效（写入前发出的读结果不会被缓存）。
+
+运行：pytest tests/test_neo4j_pool.py
+"""
+
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "graphiti"))
+
+from graph_search import ATTR_LOOKUP_CYPHER, ATTR_VOCAB_CYPHER
+from memory_driver import InMemoryGraphDriver
+from neo4j_pool import CachedGraphDriver, is_write_query, normalize_cypher
+from product_ingest import BulkProductIngestor, load_products
+
+CATALOG = os.path.join(os.path.dirname(os.path.abspath(__file__)), "graphiti", "1218_json.json")
+GROUP = ["product_demo"]
+
+
+def loaded_driver(latency: float = 0.0) -> InMemoryGraphDriver:
+    driver = InMemoryGraphDriver(latency=latency)
+    asyncio.run(BulkProductIngestor(driver, group_id="product_demo").ingest(load_products(CATALOG)[:10]))
+    driver.queries = 0
+    return driver
+
+
+def lookup(driver, codes):
+    return driver.execute_query(ATTR_LOOKUP_CYPHER, group_ids=GROUP, codes=codes, attr_names=[], limit=10)
+
+
+def test_write_detection_and_normalization():
+    assert is_write_query("UNWIND $rows AS row MERGE (n:Entity {uuid: row.uuid})")
+    assert not is_write_query(ATTR_LOOKUP_CYPHER)
+    assert is_write_query("MATCH (n) WHERE n.name = 'x' SET n.seen = true")
+    assert is_write_query("MATCH (n) ON CREATE SET n.a = 1 // 'quoted'")
+    # 属性名、标签、参数名、map 键、字符串字面量和注释里的关键字不算写子句
+    assert not is_write_query("MATCH (n:Merge) WHERE n.set = $create RETURN n.merge AS merge")
+    assert not is_write_query("MATCH (n) WHERE n.note = 'please MERGE; SET later' RETURN n")
+    assert not is_write_query('MATCH (n) WHERE n.name CONTAINS "delete" RETURN n {.*, set: 1}')
+    assert not is_write_query("MATCH (n)\n// TODO: CREATE index\nRETURN `SET` AS x")
+    assert normalize_cypher("MATCH (n)\n   RETURN n") == normalize_cypher("MATCH (n) RETURN n")
+
+
+def test_hot_reads_are_cached_and_coalesced():
+    inner = loaded_driver(latency=0.01)
+    driver = CachedGraphDriver(inner, cache_ttl=60)
+
+    async def main():
+        # 同一语句的不同空白写法共享缓存
+        reformatted = "  \n".join(ATTR_VOCAB_CYPHER.split("\n"))
+        results = await asyncio.gather(*[
+            driver.execute_query(ATTR_VOCAB_CYPHER if i % 2 else reformatted, group_ids=GROUP) for i in range(10)
+        ])
+        again = await driver.execute_query(ATTR_VOCAB_CYPHER, group_ids=GROUP)
+        other = await driver.execute_query(ATTR_VOCAB_CYPHER, group_ids=["other"])
+        return results, again, other
+
+    results, again, other = asyncio.run(main())
+    assert all(result is results[0] for result in results) and again is results[0]
+    assert other[0] == []
+    assert inner.queries == 2
+    report = driver.report()
+    assert (report["misses"], report["coalesced"], report["hits"]) == (2, 9, 1)
+    assert report["statements"] == 1
+
+
+def test_ttl_expiry():
+    inner = loaded_driver()
+    driver = CachedGraphDriver(inner, cache_ttl=0.05)
+
+    async def main():
+        await lookup(driver, ["6090A"])
+        await lookup(driver, ["6090A"])
+        await asyncio.sleep(0.06)
+        return await lookup(driver, ["6090A"])
+
+    records, _, _ = asyncio.run(main())
+    assert records[0]["name"] == "6090A"
+    assert inner.queries == 2
+
+
+def test_ingestion_writes_invalidate_cache():
+    inner = loaded_driver()
+    driver = CachedGraphDriver(inner, cache_ttl=60)
+    products = load_products(CATALOG)
+
+    async def main():
+        before, _, _ = await lookup(driver, ["6395"])
+        await BulkProductIngestor(driver, group_id="product_demo").ingest(products[10:])
+        after, _, _ = await lookup(driver, ["6395"])
+        return before, after
+
+    before, after = asyncio.run(main())
+    assert before == []
+    assert [record["name"] for record in after] == ["6395"]
+    assert driver.stats["writes"] > 0 and driver.stats["invalidations"] >= 1
+
+
+def test_read_in_flight_during_write_is_not_cached():
+    inner = loaded_driver(latency=0.02)
+    driver = CachedGraphDriver(inner, cache_ttl=60)
+
+    async def main():
+        stale = asyncio.create_task(lookup(driver, ["6090A"]))
+        await asyncio.sleep(0)
+        driver.invalidate()  # 读查询发出后、返回前发生了写入
+        await stale
+        await lookup(driver, ["6090A"])
+        await lookup(driver, ["6090A"])
+
+    asyncio.run(main())
+    assert inner.queries == 2
+    assert driver.stats["hits"] == 1
@@ -0,0 +1,202 @@
+"""
+Open WebUI Z-Image Pipe/Filter 测试：本地假 Z-Image /jobs 服务，验证并发生图时事件循环不被阻塞、
+进度通过 __event_emitter__ 推送、用户中止和超时时撤销服务端任务，
+以及两个单文件插件里拷贝的 ZImageClient 保持一致。
+
+运行：pytest tests/test_openwebui_zimage.py
+"""
+
+import asyncio
+import inspect
+import json
+import os
+import sys
+import time
+import uuid
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "z-image"))
+
+import openwebui_function
+import openwebui_pip
+from openwebui_function import Filter
+from openwebui_pip import Pipe, ZImageClient
+
+
+class FakeZImage:
+    """假 Z-Image 服务：每个任务按 step_delay 逐步推送 SSE 进度"""
+
+    def __init__(self, steps: int = 5, step_delay: float = 0.05):
+        self.steps = steps
+        self.step_delay = step_delay
+        self.jobs = {}
+        self.cancelled = []
+        self.app = web.Application()
+        self.app.router.add_post("/jobs", self.create_job)
+        self.app.router.add_get("/jobs/{job_id}/events", self.events)
+        self.app.router.add_delete("/jobs/{job_id}", self.cancel)
+
+    async def create_job(self, request):
+        job_id = uuid.uuid4().hex
+        self.jobs[job_id] = await request.json()
+        return web.json_response({"job_id": job_id, "status": "queued"}, status=202)
+
+    async def events(self, request):
+        job_id = request.match_info["job_id"]
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+        for step in range(1, self.steps + 1):
+            await asyncio.sleep(self.step_delay)
+            if job_id in self.cancelled:
+                return response
+            await self._send(response, {"status": "running", "step": step, "total_steps": self.steps})
+        await self._send(response, {
+            "status": "succeeded",
+            "step": self.steps,
+            "total_steps": self.steps,
+            "result": {"url": f"http://fake/images/{job_id}.png"},
+        })
+        return response
+
+    async def _send(self, response, event: dict):
+        await response.write(f"event: {event['status']}\ndata: {json.dumps(event)}\n\n".encode("utf-8"))
+
+    async def cancel(self, request):
+        self.cancelled.append(request.match_info["job_id"])
+        return web.json_response({"status": "cancelled"})
+
+
+class Recorder:
+    def __init__(self):
+        self.events = []
+
+    async def __call__(self, event: dict):
+        self.events.append(event)
+
+
+async def start(fake: FakeZImage) -> TestServer:
+    server = TestServer(fake.app)
+    await server.start_server()
+    return server
+
+
+async def stop(server: TestServer):
+    if ZImageClient._session is not None:
+        await ZImageClient._session.close()
+    await server.close()
+
+
+def make_pipe(server: TestServer, **valves) -> Pipe:
+    pipe = Pipe()
+    pipe.valves = Pipe.Valves(api_base_url=str(server.make_url("")), **valves)
+    return pipe
+
+
+def test_concurrent_generations_keep_event_loop_responsive():
+    fake = FakeZImage(steps=5, step_delay=0.05)
+
+    async def chat_latency(stop_event: asyncio.Event) -> float:
+        """模拟其他聊天：不断 sleep 0.01s，记录最大调度延迟"""
+        worst = 0.0
+        while not stop_event.is_set():
+            start_time = time.perf_counter()
+            await asyncio.sleep(0.01)
+            worst = max(worst, time.perf_counter() - start_time - 0.01)
+        return worst
+
+    async def main():
+        server = await start(fake)
+        try:
+            pipe = make_pipe(server)
+            recorders = [Recorder() for _ in range(3)]
+            stop_event = asyncio.Event()
+            latency = asyncio.create_task(chat_latency(stop_event))
+            results = await asyncio.gather(*[
+                pipe.pipe({"messages": [{"role": "user", "content": f"一只猫 {i}"}]}, __event_emitter__=recorder)
+                for i, recorder in enumerate(recorders)
+            ])
+            stop_event.set()
+            return results, recorders, await latency
+        finally:
+            await stop(server)
+
+    results, recorders, worst_lag = asyncio.run(main())
+    assert all(result.startswith("![Generated Image](http://fake/images/") for result in results)
+    assert worst_lag < 0.05
+    for recorder in recorders:
+        descriptions = [event["data"]["description"] for event in recorder.events]
+        assert "正在生成图片: 5/5 步" in descriptions
+        assert recorder.events[-1]["data"] == {"description": "绘图成功！", "done": True}
+
+
+def test_user_abort_cancels_server_job():
+    fake = FakeZImage(steps=20, step_delay=0.05)
+
+    async def main():
+        server = await start(fake)
+        try:
+            pipe = make_pipe(server)
+            recorder = Recorder()
+            task = asyncio.create_task(
+                pipe.pipe({"messages": [{"role": "user", "content": "一只狗"}]}, __event_emitter__=recorder)
+            )
+            while not any("步" in event["data"]["description"] for event in recorder.events):
+                await asyncio.sleep(0.01)
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+            return recorder
+        finally:
+            await stop(server)
+
+    recorder = asyncio.run(main())
+    assert list(fake.jobs) == fake.cancelled
+    assert recorder.events[-1]["data"] == {"description": "已取消生成", "done": True}
+
+
+def test_timeout_cancels_server_job():
+    fake = FakeZImage(steps=40, step_delay=0.05)
+
+    async def main():
+        server = await start(fake)
+        try:
+            pipe = make_pipe(server, timeout=1)
+            return await pipe.pipe({"messages": [{"role": "user", "content": "一只鸟"}]})
+        finally:
+            await stop(server)
+
+    result = asyncio.run(main())
+    assert "生成超时" in result
+    assert list(fake.jobs) == fake.cancelled
+
+
+def test_filter_renders_image_and_rewrites_prompt():
+    fake = FakeZImage(steps=2, step_delay=0.01)
+
+    async def main():
+        server = await start(fake)
+        try:
+            image_filter = Filter()
+            image_filter.valves = Filter.Valves(api_base_url=str(server.make_url("")))
+            recorder = Recorder()
+            body = await image_filter.inlet(
+                {"messages": [{"role": "user", "content": "画图 一片森林"}]}, __event_emitter__=recorder
+            )
+            return body, recorder
+        finally:
+            await stop(server)
+
+    body, recorder = asyncio.run(main())
+    assert any(event["type"] == "message" and "http://fake/images/" in event["data"]["content"] for event in recorder.events)
+    assert body["messages"][-1]["content"].startswith("我已经生成了这张图片：一片森林")
+
+
+def test_plugin_client_copies_are_identical():
+    # Open WebUI 插件必须是单文件，openwebui_function.py 拷贝了 openwebui_pip.py 的客户端
+    for name in ("ZImageError", "ZImageClient"):
+        assert inspect.getsource(getattr(openwebui_function, name)) == inspect.getsource(getattr(openwebui_pip, name))
+    assert openwebui_function.TERMINAL_STATUSES == openwebui_pip.TERMINAL_STATUSES
@@ -0,0 +1,118 @@
+"""
+订单字段规则抽取测试：款号、颜色、条数（含中文数字）、客户名，以及客户名有歧义时交给 LLM；
+修改订单时只覆盖用户改动的字段。
+
+运行：pytest tests/test_order_extraction.py
+"""
+
+import os
+import sys
+
+import pytest
+
+# order_graph 在导入时会创建 ChatOpenAI，规则抽取不会发出请求
+os.environ.setdefault("DASHSCOPE_API_KEY", "test")
+os.environ.setdefault("DASHSCOPE_BASE_URL", "http://127.0.0.1:9/v1")
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from langchain_core.messages import AIMessage, AIMessageChunk, HumanMessage
+
+import order_graph
+from order_graph import _parse_chinese_number, rule_extract
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("10", 10),
+        ("十", 10),
+        ("十二", 12),
+        ("二十", 20),
+        ("两百五十", 250),
+        ("一千零五", 1005),
+        ("三万二千", 32000),
+        ("十条", None),
+        ("abc", None),
+    ],
+)
+def test_parse_chinese_number(text, expected):
+    assert _parse_chinese_number(text) == expected
+
+
+def test_rule_extract_full_order():
+    assert rule_extract("客户张三要10条红色A001款") == {
+        "product_code": "A001",
+        "color": "红色",
+        "quantity": 10,
+        "customer": "张三",
+    }
+    assert rule_extract("客户王五要二十件黑色a003") == {
+        "product_code": "A003",
+        "color": "黑色",
+        "quantity": 20,
+        "customer": "王五",
+    }
+
+
+@pytest.mark.parametrize(
+    "text, customer",
+    [
+        ("客户：ACME，要5条A001", "ACME"),
+        ("客户名称为王小明，订8条A002", "王小明"),
+        ("客户张三丰要两百条", "张三丰"),
+    ],
+)
+def test_rule_extract_customer(text, customer):
+    assert rule_extract(text)["customer"] == customer
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "客户要10条红色A001",  # 没有客户名，不能把 "要10条…" 当成名字
+        "客户是要10条",
+        "客户张三，客户李四要5条",  # 两个不同的名字
+        "客户红色要5条",  # 名字里是颜色词
+        "要10条红色A001",
+    ],
+)
+def test_rule_extract_leaves_ambiguous_customer_to_llm(text):
+    assert "customer" not in rule_extract(text)
+
+
+def test_rule_extract_skips_missing_fields():
+    assert rule_extract("来点蓝色的") == {"color": "蓝色"}
+    assert rule_extract("款号a002，颜色待定") == {"product_code": "A002"}
+
+
+class FakeExtractionModel:
+    """以工具调用参数分片的形式吐出固定的 OrderFields 参数，并记录收到的消息"""
+
+    def __init__(self, raw: str):
+        self.raw = raw
+        self.messages = []
+
+    def stream(self, messages):
+        self.messages.append(messages)
+        for i in range(0, len(self.raw), 8):
+            yield AIMessageChunk(
+                content="",
+                tool_call_chunks=[{"name": None, "args": self.raw[i:i + 8], "id": None, "index": 0}],
+            )
+
+
+def test_modify_keeps_untouched_fields(monkeypatch):
+    model = FakeExtractionModel('{"color": "蓝色"}')
+    monkeypatch.setattr(order_graph, "extraction_llm", model)
+    fields = rule_extract("客户张三要10条红色A001款")
+    state = {
+        "messages": [AIMessage(content="请确认订单"), HumanMessage(content="修改，颜色换成蓝色")],
+        "extracted_fields": fields,
+        "missing_fields": [],
+    }
+
+    result = order_graph.process_modify(state, {})
+    assert result["extracted_fields"] == {**fields, "color": "蓝色"}
+    assert result["missing_fields"] == []
+    # 模型能看到当前字段值
+    assert "A001" in model.messages[0][0].content and "张三" in model.messages[0][0].content
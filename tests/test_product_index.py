@@ -0,0 +1,60 @@
+"""
+产品列式索引测试：区间 / 分面条件与逐条过滤结果一致，多值字段按切分后的取值命中，
+未知取值和缺失数值的处理，以及 Agent 工具的输入输出。
+
+运行：pytest tests/test_product_index.py
+"""
+
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from product_index import ProductIndex
+
+index = ProductIndex.from_file()
+
+
+def test_range_and_facet_query_matches_linear_scan():
+    result = index.query(ranges={"mprice": (None, 20), "weight": (200, None)}, facets={"series": ["纯纺", "RC"]})
+    expected = [
+        p["code"] for p in index.products
+        if p["mprice"] <= 20 and p["weight"] >= 200 and set(p["series"].split(",")) & {"纯纺", "RC"}
+    ]
+    assert [p["code"] for p in result.products] == expected
+    assert result.total == len(expected) > 0
+
+
+def test_multi_value_fields_are_tokenized():
+    assert set(index.bitmaps["series"]) >= {"羊毛", "混纺"}
+    tshirt = index.query(facets={"dressing_category": ["T恤"]})
+    assert tshirt.total == sum("T恤" in p["dressing_category"].split("、") for p in index.products)
+    assert index.values("dressing_category")["打底"] == 2
+
+
+def test_sort_and_missing_values():
+    products = [{"code": "a", "mprice": 10}, {"code": "b", "mprice": None}, {"code": "c", "mprice": "30"}]
+    small = ProductIndex(products)
+    assert [p["code"] for p in small.query(sort_by="mprice", descending=True).products] == ["c", "a", "b"]
+    # 缺失值不会命中任何区间条件
+    assert small.query(ranges={"mprice": (0, None)}).total == 2
+
+
+def test_unknown_values_are_reported():
+    result = index.query(facets={"series": ["棉涤", "不存在的系列"]})
+    assert result.total == 2
+    assert result.unknown_values == {"series": ["不存在的系列"]}
+
+
+def test_agent_tool():
+    tool = index.as_tool()
+    output = json.loads(tool.invoke({
+        "ranges": [{"field": "mprice", "max": 25}],
+        "facets": {"series": ["棉涤"], "dressing_category": ["卫衣", "T恤"]},
+        "sort_by": "weight",
+        "descending": True,
+    }))
+    assert [p["code"] for p in output["products"]] == ["9207", "6125"]
+    assert "T恤" in output["unknown_values"]["dressing_category"]["available"]
+    assert "error" in json.loads(tool.invoke({"ranges": [{"field": "color", "min": 1}]}))
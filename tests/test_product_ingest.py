@@ -0,0 +1,142 @@
+"""
+产品批量导入测试：内存图驱动代替 Neo4j，验证属性节点去重、关系完整、批次数，
+属性节点 UUID 跨多次导入复用，重复导入同一目录不产生重复节点，
+以及不调用 LLM 的结构化 Episode 导入。
+
+运行：pytest tests/test_product_ingest.py
+"""
+
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "graphiti"))
+
+from attr_interner import AttributeInterner
+from memory_driver import InMemoryGraphDriver
+from product_ingest import (
+    CATALOG_1218_SCHEMA,
+    PRODUCTS_JSON_SCHEMA,
+    BulkProductIngestor,
+    ingest_catalog,
+    load_products,
+)
+
+CATALOG = os.path.join(os.path.dirname(os.path.abspath(__file__)), "graphiti", "1218_json.json")
+PRODUCTS_JSON = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "products.json")
+
+
+class FakeEmbedder:
+    """记录每次 create_batch 的文本，返回固定维度的假向量"""
+
+    def __init__(self):
+        self.batches = []
+
+    async def create_batch(self, texts):
+        self.batches.append(list(texts))
+        return [[float(len(text)), 0.0] for text in texts]
+
+
+def test_bulk_ingest_dedupes_attribute_nodes():
+    # 复制 4 份目录并改写款号，得到 60 个不同的产品
+    products = [{**product, "code": f"{product['code']}-{n}"} for n in range(4) for product in load_products(CATALOG)]
+    driver = InMemoryGraphDriver()
+    report = asyncio.run(BulkProductIngestor(driver, batch_size=10).ingest(products))
+
+    attr_nodes = driver.nodes_with_label("ProductAttr")
+    names = [node["name"] for node in attr_nodes]
+    assert len(names) == len(set(names))
+    assert "series:棉涤" in names
+    assert report.products == len(driver.nodes_with_label("Product")) == 60
+    assert report.attr_nodes == len(attr_nodes)
+    assert report.edges == len(driver.edges)
+    assert report.batches == 6
+    assert driver.queries == report.queries <= 3 * report.batches
+
+    # 同一属性值只对应一个节点，多个产品指向它
+    cotton = next(node["uuid"] for node in attr_nodes if node["name"] == "series:棉涤")
+    assert sum(edge["target_uuid"] == cotton for edge in driver.edges.values()) > 1
+
+
+def test_data_products_catalog_is_supported():
+    products = load_products(PRODUCTS_JSON)
+    driver = InMemoryGraphDriver()
+    report = asyncio.run(BulkProductIngestor(driver).ingest(products))
+    assert report.products == len(products)
+    assert {node["name"] for node in driver.nodes_with_label("Product")} == {p["code"] for p in products}
+
+
+def test_interned_attribute_uuids_survive_restarts(tmp_path):
+    products = load_products(CATALOG)
+    table = tmp_path / "attr_nodes.json"
+
+    first_driver = InMemoryGraphDriver()
+    first = asyncio.run(BulkProductIngestor(first_driver, interner=AttributeInterner(table)).ingest(products))
+    assert first.nodes_saved == first.edges - first.attr_nodes
+    assert table.exists()
+
+    # 新进程、新的（已清空的）图：属性节点按原 UUID 重建，不再分配新 UUID
+    interner = AttributeInterner(table)
+    second_driver = InMemoryGraphDriver()
+    second = asyncio.run(BulkProductIngestor(second_driver, interner=interner).ingest(products))
+    first_uuids = {node["name"]: node["uuid"] for node in first_driver.nodes_with_label("ProductAttr")}
+    second_uuids = {node["name"]: node["uuid"] for node in second_driver.nodes_with_label("ProductAttr")}
+    assert first_uuids == second_uuids
+    assert interner.created == 0
+    assert second.nodes_saved == second.edges
+    assert len(second_driver.edges) == second.edges
+
+
+def test_reingest_is_idempotent():
+    driver = InMemoryGraphDriver()
+
+    def ingest_and_count():
+        # 每次都用新的导入器和不落盘的查找表，相当于重新运行一次导入脚本
+        asyncio.run(ingest_catalog(driver, CATALOG, CATALOG_1218_SCHEMA, batch_size=8))
+        return len(driver.nodes), len(driver.edges), len(driver.episodes), len(driver.mentions)
+
+    first = ingest_and_count()
+    assert ingest_and_count() == first
+    assert len(driver.nodes_with_label("Product")) == 15
+
+
+def test_interner_is_scoped_by_group():
+    interner = AttributeInterner(path=None)
+    a, created_a = interner.intern("shop_a", "series", "棉涤")
+    b, created_b = interner.intern("shop_b", "series", "棉涤")
+    again, created_again = interner.intern("shop_a", "series", "棉涤")
+    assert a != b and again == a
+    assert (created_a, created_b, created_again) == (True, True, False)
+    assert interner.stats() == {"entries": 2, "created": 2, "nodes_saved": 1}
+
+
+def test_structured_episodes_embed_only_declared_fields():
+    driver = InMemoryGraphDriver()
+    embedder = FakeEmbedder()
+    report = asyncio.run(ingest_catalog(driver, CATALOG, CATALOG_1218_SCHEMA, embedder=embedder, batch_size=8))
+
+    products = driver.nodes_with_label("Product")
+    attrs = driver.nodes_with_label("ProductAttr")
+    assert report.episodes == len(driver.episodes) == len(driver.mentions) == len(products) == 15
+    # 只嵌入产品检索文本和属性节点名，关系 fact 不生成向量
+    texts = [text for batch in embedder.batches for text in batch]
+    assert len(embedder.batches) == report.batches == 2
+    assert report.embedded == len(texts) == len(products) + len(attrs)
+    assert all("name_embedding" in node for node in products + attrs)
+    assert all("fact_embedding" not in edge for edge in driver.edges.values())
+    # 适用场景按顿号拆成独立属性
+    assert "dressing_category:T恤" in {node["name"] for node in attrs}
+    # Episode 记录了产品的全部关系
+    episode = next(iter(driver.episodes.values()))
+    assert episode["entity_edges"]
+    assert all(driver.edges[uuid]["episodes"] == [episode["uuid"]] for uuid in episode["entity_edges"])
+
+
+def test_structured_products_json_keeps_reserved_fields():
+    driver = InMemoryGraphDriver()
+    report = asyncio.run(ingest_catalog(driver, PRODUCTS_JSON, PRODUCTS_JSON_SCHEMA))
+    product = next(node for node in driver.nodes_with_label("Product") if node["name"] == "6125")
+    assert product["product_name"] == "韩国精棉"
+    assert product["mprice"] == 13.6
+    assert report.embedded == 0
+    assert "production_process:食毛" in {node["name"] for node in driver.nodes_with_label("ProductAttr")}
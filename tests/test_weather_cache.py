@@ -0,0 +1,102 @@
+"""
+get_weather_mcp 缓存测试：使用本地假天气后端，验证 TTL、stale-while-revalidate 和并发合并，以及未知后端名报错。
+
+运行：pytest tests/test_weather_cache.py
+"""
+
+import asyncio
+import os
+import sys
+
+import httpx
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mcp_server.get_weather_mcp.backends import WeatherBackend, WttrBackend
+from mcp_server.get_weather_mcp.cache import WeatherCache
+
+
+class FakeBackend(WeatherBackend):
+    """本地假天气后端：记录调用次数，每次返回不同的结果"""
+
+    def __init__(self, delay: float = 0.05):
+        self.delay = delay
+        self.calls = 0
+
+    async def fetch(self, city: str) -> str:
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return f"{city}: sunny #{self.calls}"
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_concurrent_lookups_are_coalesced():
+    async def run():
+        backend = FakeBackend()
+        cache = WeatherCache(backend)
+        results = await asyncio.gather(*[cache.get("Beijing") for _ in range(50)])
+        return backend, cache, results
+
+    backend, cache, results = asyncio.run(run())
+    assert backend.calls == 1
+    assert set(results) == {"Beijing: sunny #1"}
+    assert cache.stats["coalesced"] == 49
+
+
+def test_ttl_and_stale_while_revalidate():
+    async def run():
+        clock = FakeClock()
+        backend = FakeBackend(delay=0)
+        cache = WeatherCache(backend, ttl=10, stale_ttl=20, clock=clock)
+
+        assert await cache.get("Shanghai") == "Shanghai: sunny #1"
+        clock.now = 5
+        assert await cache.get(" shanghai ") == "Shanghai: sunny #1"
+        assert backend.calls == 1
+
+        # 过期但在 stale 窗口内：立即返回旧值，后台刷新
+        clock.now = 15
+        assert await cache.get("Shanghai") == "Shanghai: sunny #1"
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        assert backend.calls == 2
+        assert await cache.get("Shanghai") == "Shanghai: sunny #2"
+
+        # 超出 stale 窗口：同步回源
+        clock.now = 100
+        assert await cache.get("Shanghai") == "Shanghai: sunny #3"
+
+    asyncio.run(run())
+
+
+def test_wttr_backend_against_local_fake_service():
+    def handler(request: httpx.Request) -> httpx.Response:
+        city = request.url.path.strip("/")
+        return httpx.Response(200, text=f"{city}: ☀️ +25°C\n")
+
+    async def run():
+        backend = WttrBackend(base_url="http://fake-weather", transport=httpx.MockTransport(handler))
+        try:
+            return await WeatherCache(backend).get("Hangzhou")
+        finally:
+            await backend.aclose()
+
+    assert asyncio.run(run()) == "Hangzhou: ☀️ +25°C"
+
+
+def test_unknown_backend_is_rejected(monkeypatch):
+    from mcp_server.get_weather_mcp import server
+
+    monkeypatch.setenv("WEATHER_BACKEND", "sunny")
+    with pytest.raises(ValueError, match="stub, wttr"):
+        server._create_backend()
+    monkeypatch.setenv("WEATHER_BACKEND", "stub")
+    assert isinstance(server._create_backend(), WeatherBackend)
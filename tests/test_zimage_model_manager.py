@@ -0,0 +1,166 @@
+"""
+Z-Image 模型管理器测试：用 CPU 上的假 pipeline 验证后台/懒加载、失败重试和多条常驻 pipeline 并行推理。
+
+运行：pytest tests/test_zimage_model_manager.py
+"""
+
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "z-image"))
+
+from model_manager import ModelManager, ModelUnavailableError
+from scheduler import GenerationJob, GenerationScheduler
+from test_zimage_scheduler import StubPipeline
+
+
+class StubLoader:
+    """假加载器：阻塞 sleep 模拟加载，前 failures 次抛出异常"""
+
+    def __init__(self, delay: float = 0.1, failures: int = 0):
+        self.delay = delay
+        self.failures = failures
+        self.calls = []
+
+    def __call__(self, index: int):
+        self.calls.append(index)
+        time.sleep(self.delay)
+        if len(self.calls) <= self.failures:
+            raise OSError("权重文件读取失败")
+        return StubPipeline(delay=0.2)
+
+
+def make_job(prompt: str) -> GenerationJob:
+    return GenerationJob(prompt=prompt, width=512, height=512, steps=2, seed=1)
+
+
+def test_background_load_does_not_block_event_loop():
+    loader = StubLoader(delay=0.3)
+    manager = ModelManager(loader, mode="background")
+
+    async def main():
+        start = time.perf_counter()
+        manager.start()
+        await asyncio.sleep(0.05)
+        assert time.perf_counter() - start < 0.2
+        assert manager.status()["status"] == "loading"
+        assert not manager.is_ready()
+        await manager.wait_ready()
+        return manager.status()
+
+    status = asyncio.run(main())
+    assert status["status"] == "ready"
+    assert status["pipelines"][0]["load_seconds"] >= 0.3
+
+
+def test_failed_load_is_retried():
+    loader = StubLoader(delay=0.01, failures=2)
+    manager = ModelManager(loader, max_attempts=3, retry_base=0.01)
+
+    async def main():
+        manager.start()
+        return await manager.wait_ready()
+
+    assert isinstance(asyncio.run(main()), StubPipeline)
+    assert len(loader.calls) == 3
+    assert manager.status()["pipelines"][0]["attempts"] == 3
+
+
+def test_exhausted_retries_fail_requests_then_reload():
+    loader = StubLoader(delay=0.01, failures=2)
+    manager = ModelManager(loader, mode="lazy", max_attempts=2, retry_base=0.01)
+    scheduler = GenerationScheduler(
+        pipe_provider=manager.get, make_generator=lambda seed: seed, max_wait_ms=1, wait_ready=manager.wait_ready,
+    )
+
+    async def main():
+        scheduler.start()
+        try:
+            try:
+                await scheduler.submit(make_job("第一次"))
+            except ModelUnavailableError as e:
+                first_error = str(e)
+            assert manager.status()["status"] == "failed"
+            # 下一个请求重新触发加载，这次成功
+            image = await scheduler.submit(make_job("第二次"))
+            return first_error, image
+        finally:
+            await scheduler.stop()
+
+    first_error, image = asyncio.run(main())
+    assert "模型加载失败" in first_error
+    assert image == ("第二次", 1)
+    assert len(loader.calls) == 3
+
+
+def test_lazy_load_waits_for_first_request():
+    loader = StubLoader(delay=0.05)
+    manager = ModelManager(loader, mode="lazy")
+    scheduler = GenerationScheduler(
+        pipe_provider=manager.get, make_generator=lambda seed: seed, max_wait_ms=1, wait_ready=manager.wait_ready,
+    )
+
+    async def main():
+        manager.start()
+        scheduler.start()
+        try:
+            await asyncio.sleep(0.1)
+            assert loader.calls == []
+            return await scheduler.submit(make_job("猫"))
+        finally:
+            await scheduler.stop()
+
+    assert asyncio.run(main()) == ("猫", 1)
+    assert loader.calls == [0]
+
+
+def test_warm_pool_runs_batches_in_parallel():
+    loader = StubLoader(delay=0.01)
+    manager = ModelManager(loader, num_pipelines=2)
+    scheduler = GenerationScheduler(
+        pipe_provider=manager.get, make_generator=lambda seed: seed, max_batch_size=1, max_wait_ms=1,
+        workers=2, wait_ready=manager.wait_ready,
+    )
+
+    async def main():
+        manager.start()
+        await asyncio.gather(manager.wait_ready(0), manager.wait_ready(1))
+        scheduler.start()
+        try:
+            start = time.perf_counter()
+            await asyncio.gather(*[scheduler.submit(make_job(str(i))) for i in range(4)])
+            return time.perf_counter() - start
+        finally:
+            await scheduler.stop()
+
+    elapsed = asyncio.run(main())
+    # 每批 0.2s，4 批在 2 条 pipeline 上约 0.4s，串行需要 0.8s
+    assert elapsed < 0.7
+    assert loader.calls == [0, 1]
+    assert all(len(manager.get(i).calls) == 2 for i in range(2))
+
+
+def test_failed_pipeline_hands_requests_to_healthy_worker():
+    pipelines = {0: StubLoader(delay=0.01), 1: StubLoader(delay=0.01, failures=100)}
+    manager = ModelManager(lambda index: pipelines[index](index), mode="lazy", num_pipelines=2,
+                           max_attempts=1, retry_base=0.01)
+    scheduler = GenerationScheduler(
+        pipe_provider=manager.get, make_generator=lambda seed: seed, max_batch_size=1, max_wait_ms=1,
+        workers=2, wait_ready=manager.wait_ready, unhealthy_retry=60,
+    )
+
+    async def main():
+        scheduler.start()
+        try:
+            return await asyncio.gather(*[scheduler.submit(make_job(str(i))) for i in range(4)]), scheduler.stats()
+        finally:
+            await scheduler.stop()
+
+    images, stats = asyncio.run(main())
+    # 1 号 pipeline 加载失败后不再取任务，请求全部由 0 号完成
+    assert images == [(str(i), 1) for i in range(4)]
+    assert stats["unhealthy_workers"] == [1]
+    assert pipelines[1].calls == [1]
+    assert len(manager.get(0).calls) == 4
@@ -0,0 +1,160 @@
+"""
+Z-Image 结果缓存测试：命中、并发合并、LRU 淘汰和重启后重建索引，以及先返回结果、后台写入缓存。
+
+运行：pytest tests/test_zimage_result_cache.py
+"""
+
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "z-image"))
+
+from result_cache import ResultCache, cache_key
+
+
+def make_producer(calls: list, size: int = 100, delay: float = 0.0):
+    async def produce(tmp_path: str):
+        calls.append(tmp_path)
+        await asyncio.sleep(delay)
+        with open(tmp_path, "wb") as f:
+            f.write(b"x" * size)
+    return produce
+
+
+def test_cache_key_is_deterministic():
+    a = cache_key(prompt="猫", width=512, height=512, steps=9, seed=42)
+    b = cache_key(seed=42, steps=9, height=512, width=512, prompt="猫")
+    assert a == b
+    assert a != cache_key(prompt="猫", width=512, height=512, steps=9, seed=43)
+
+
+def test_hit_after_miss(tmp_path):
+    cache = ResultCache(str(tmp_path), max_bytes=10_000)
+    key = cache_key(prompt="猫", seed=1)
+    calls = []
+
+    async def main():
+        first = await cache.get_or_create(key, make_producer(calls))
+        second = await cache.get_or_create(key, make_producer(calls))
+        return first, second
+
+    first, second = asyncio.run(main())
+    assert first == (f"{key}.png", False)
+    assert second == (f"{key}.png", True)
+    assert len(calls) == 1
+    assert os.listdir(tmp_path) == [f"{key}.png"]  # 临时文件已被重命名
+
+
+def test_concurrent_requests_are_coalesced(tmp_path):
+    cache = ResultCache(str(tmp_path), max_bytes=10_000)
+    key = cache_key(prompt="狗", seed=1)
+    calls = []
+
+    async def main():
+        return await asyncio.gather(*[
+            cache.get_or_create(key, make_producer(calls, delay=0.05)) for _ in range(5)
+        ])
+
+    results = asyncio.run(main())
+    assert len(calls) == 1
+    assert {name for name, _ in results} == {f"{key}.png"}
+    assert cache.stats["coalesced"] == 4
+
+
+def test_failed_producer_leaves_no_files(tmp_path):
+    cache = ResultCache(str(tmp_path), max_bytes=10_000)
+
+    async def broken(tmp_path):
+        with open(tmp_path, "wb") as f:
+            f.write(b"partial")
+        raise RuntimeError("CUDA OOM")
+
+    async def main():
+        try:
+            await cache.get_or_create(cache_key(prompt="坏"), broken)
+        except RuntimeError:
+            pass
+
+    asyncio.run(main())
+    assert os.listdir(tmp_path) == []
+
+
+def test_lru_eviction_and_reload(tmp_path):
+    cache = ResultCache(str(tmp_path), max_bytes=250)
+    keys = [cache_key(prompt=str(i)) for i in range(3)]
+    calls = []
+
+    async def main():
+        await cache.get_or_create(keys[0], make_producer(calls))
+        await cache.get_or_create(keys[1], make_producer(calls))
+        await cache.get_or_create(keys[0], make_producer(calls))  # keys[0] 变为最近使用
+        await cache.get_or_create(keys[2], make_producer(calls))  # 超出预算，淘汰 keys[1]
+
+    asyncio.run(main())
+    assert cache.stats["evictions"] == 1
+    assert cache.lookup(keys[1]) is None
+    assert sorted(os.listdir(tmp_path)) == sorted(f"{k}.png" for k in (keys[0], keys[2]))
+
+    reloaded = ResultCache(str(tmp_path), max_bytes=250)
+    assert reloaded.usage()["files"] == 2
+    assert reloaded.usage()["bytes"] == 200
+
+
+def test_compute_returns_before_background_write(tmp_path):
+    cache = ResultCache(str(tmp_path), max_bytes=10_000)
+    key = cache_key(prompt="流式")
+    computed, written = [], []
+
+    async def compute():
+        computed.append(1)
+        await asyncio.sleep(0.05)
+        return b"png"
+
+    def write(result, path):
+        time.sleep(0.1)  # 慢磁盘：生成方不应等待写入
+        written.append(path)
+        with open(path, "wb") as f:
+            f.write(result)
+
+    async def main():
+        start = time.perf_counter()
+        leader = await cache.get_or_compute(key, compute, write)
+        elapsed = time.perf_counter() - start
+        assert written == [] and not os.path.exists(cache.path(key))
+        # 写入完成前到达的相同请求等待写入，读到同一个文件
+        follower = await cache.get_or_compute(key, compute, write)
+        hit = await cache.get_or_compute(key, compute, write)
+        await cache.drain()
+        return leader, elapsed, follower, hit
+
+    leader, elapsed, follower, hit = asyncio.run(main())
+    assert leader == (None, b"png", False) and elapsed < 0.1
+    assert follower == (f"{key}.png", None, False)
+    assert hit == (f"{key}.png", None, True)
+    assert len(computed) == len(written) == 1
+    assert cache.usage()["coalesced"] == 1
+
+
+def test_failed_background_write_lets_waiters_recompute(tmp_path):
+    cache = ResultCache(str(tmp_path), max_bytes=10_000)
+    key = cache_key(prompt="磁盘满")
+    computed = []
+
+    async def compute():
+        computed.append(1)
+        return b"png"
+
+    def write(result, path):
+        raise OSError("No space left on device")
+
+    async def main():
+        await cache.get_or_compute(key, compute, write)
+        second = await cache.get_or_compute(key, compute, write)
+        await cache.drain()
+        return second
+
+    assert asyncio.run(main()) == (None, b"png", False)
+    assert len(computed) == 2
+    assert os.listdir(tmp_path) == []
@@ -0,0 +1,157 @@
+"""
+Z-Image 推理调度器测试：用 CPU 上的假 pipeline 验证批处理、队列指标、事件循环不被阻塞，
+以及异步任务的逐步进度事件。
+
+运行：pytest tests/test_zimage_scheduler.py
+"""
+
+import asyncio
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "z-image"))
+
+from jobs import JobStore
+from scheduler import GenerationJob, GenerationScheduler
+
+
+class StubPipeline:
+    """假 pipeline：阻塞 sleep 模拟推理，返回 (prompt, seed) 作为“图片”"""
+
+    def __init__(self, delay: float = 0.1):
+        self.delay = delay
+        self.calls = []
+
+    def __call__(self, prompt, height, width, num_inference_steps, guidance_scale, generator, **kwargs):
+        self.calls.append({"prompts": list(prompt), "size": (width, height), "steps": num_inference_steps})
+        callback = kwargs.get("callback_on_step_end")
+        for step in range(num_inference_steps):
+            time.sleep(self.delay / num_inference_steps)
+            if callback:
+                callback(self, step, None, {})
+        return SimpleNamespace(images=[(p, g) for p, g in zip(prompt, generator)])
+
+
+def make_scheduler(pipe, **kwargs):
+    return GenerationScheduler(pipe_provider=lambda worker: pipe, make_generator=lambda seed: seed, **kwargs)
+
+
+def job(prompt, seed=1, size=512, steps=4):
+    return GenerationJob(prompt=prompt, width=size, height=size, steps=steps, seed=seed)
+
+
+def test_compatible_requests_are_batched():
+    async def run():
+        pipe = StubPipeline(delay=0.05)
+        scheduler = make_scheduler(pipe, max_batch_size=4, max_wait_ms=50)
+        scheduler.start()
+        try:
+            results = await asyncio.gather(
+                scheduler.submit(job("a", 1)),
+                scheduler.submit(job("b", 2)),
+                scheduler.submit(job("c", 3, size=768)),
+                scheduler.submit(job("d", 4)),
+            )
+        finally:
+            await scheduler.stop()
+        return pipe, scheduler, results
+
+    pipe, scheduler, results = asyncio.run(run())
+    assert results == [("a", 1), ("b", 2), ("c", 3), ("d", 4)]
+    assert [c["prompts"] for c in pipe.calls] == [["a", "b", "d"], ["c"]]
+    stats = scheduler.stats()
+    assert stats["batches"] == 2
+    assert stats["completed"] == 4
+    assert stats["queue_depth"] == 0
+
+
+def test_inference_runs_off_the_event_loop():
+    async def run():
+        pipe = StubPipeline(delay=0.3)
+        scheduler = make_scheduler(pipe, max_wait_ms=0)
+        scheduler.start()
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.01)
+
+        ticking = asyncio.create_task(ticker())
+        try:
+            await scheduler.submit(job("a"))
+        finally:
+            ticking.cancel()
+            await scheduler.stop()
+        return ticks
+
+    # 推理期间事件循环仍能持续调度其他协程
+    assert asyncio.run(run()) >= 10
+
+
+def test_pipeline_errors_are_propagated():
+    class Broken(StubPipeline):
+        def __call__(self, *args, **kwargs):
+            raise RuntimeError("boom")
+
+    async def run():
+        scheduler = make_scheduler(Broken())
+        scheduler.start()
+        try:
+            await scheduler.submit(job("a"))
+        finally:
+            await scheduler.stop()
+
+    try:
+        asyncio.run(run())
+    except RuntimeError as e:
+        assert str(e) == "boom"
+    else:
+        raise AssertionError("expected RuntimeError")
+
+
+def test_job_progress_events():
+    async def run():
+        scheduler = make_scheduler(StubPipeline(delay=0.04), max_wait_ms=0)
+        scheduler.start()
+        store = JobStore()
+        record = store.create({"prompt": "a", "steps": 4})
+
+        async def generate():
+            on_step = store.progress_callback(record, asyncio.get_running_loop())
+            image = await scheduler.submit(GenerationJob("a", 512, 512, 4, 1, on_step=on_step))
+            record.update(status="succeeded", result={"image": image})
+
+        record.task = asyncio.create_task(generate())
+        try:
+            return [event async for event in record.events()]
+        finally:
+            await scheduler.stop()
+
+    events = asyncio.run(run())
+    assert events[0]["status"] == "queued"
+    assert [e["step"] for e in events if e["status"] == "running"] == [1, 2, 3, 4]
+    assert events[-1]["status"] == "succeeded"
+
+
+def test_stop_fails_waiting_requests():
+    async def run():
+        scheduler = make_scheduler(StubPipeline(delay=0.3), max_batch_size=1, max_wait_ms=0)
+        scheduler.start()
+        waiting = [asyncio.create_task(scheduler.submit(job(str(i)))) for i in range(3)]
+        await asyncio.sleep(0.05)  # 第一个请求已在推理，其余在排队
+        await scheduler.stop()
+        results = await asyncio.wait_for(asyncio.gather(*waiting, return_exceptions=True), timeout=1)
+        try:
+            await scheduler.submit(job("late"))
+        except RuntimeError as e:
+            late = str(e)
+        return results, late, scheduler.stats()
+
+    results, late, stats = asyncio.run(run())
+    assert all(isinstance(r, RuntimeError) and str(r) == "调度器已停止" for r in results)
+    assert late == "调度器未运行"
+    assert stats["failed"] == 3 and stats["queue_depth"] == 0
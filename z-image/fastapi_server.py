@@ -1,25 +1,78 @@
 import os
-import time
+import copy
+import asyncio
 import torch
 import io
+from typing import Literal
 from fastapi import FastAPI, HTTPException, Request
-from fastapi.responses import StreamingResponse
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from fastapi.staticfiles import StaticFiles  # 导入静态文件挂载模块
 from pydantic import BaseModel, Field
 from diffusers import ZImagePipeline
 
+from jobs import JobStore, sse_format
+from model_manager import ModelManager, ModelUnavailableError
+from result_cache import ResultCache, cache_key
+from scheduler import GenerationJob, GenerationScheduler
+
 # --- 1. 初始化配置 ---
 app = FastAPI(title="Z-Image-Turbo API", description="通义 Z-Image 图像生成服务")
 
 SAVE_DIR = "zimage-gem"
 os.makedirs(SAVE_DIR, exist_ok=True)
 
+MODEL_PATH = os.getenv("ZIMAGE_MODEL_PATH", "/root/.cache/modelscope/hub/models/Tongyi-MAI/Z-Image-Turbo")
+
 # 【核心修改】：挂载静态资源目录
 # 这样访问 http://IP:8888/images/xxx.png 就能直接看到图片
 app.mount("/images", StaticFiles(directory=SAVE_DIR), name="images")
 
-# 模型全局变量
-pipe = None
+DEVICE = os.getenv("ZIMAGE_DEVICE", "cuda")
+
+def load_pipeline(index: int):
+    """加载第 index 条 pipeline（在后台线程中调用）"""
+    base = model_manager.get(0) if index > 0 else None
+    if base is not None and os.getenv("ZIMAGE_SHARE_WEIGHTS", "1") == "1":
+        # 复用第一条 pipeline 的权重，只复制有状态的调度器，额外 pipeline 几乎不占显存
+        components = {**base.components, "scheduler": copy.deepcopy(base.scheduler)}
+        return ZImagePipeline(**components)
+    print(f"正在加载模型: {MODEL_PATH}...")
+    pipeline = ZImagePipeline.from_pretrained(
+        MODEL_PATH,
+        torch_dtype=torch.bfloat16,
+        low_cpu_mem_usage=True,  # 按需加载权重，避免先在 CPU 上完整初始化一份
+    )
+    if os.getenv("ZIMAGE_CPU_OFFLOAD") == "1":
+        pipeline.enable_model_cpu_offload()  # 显存不足时按模块换入换出
+    else:
+        pipeline.to(DEVICE)
+    print("模型加载成功！")
+    return pipeline
+
+# 模型管理器：后台（background）或首个请求到达时（lazy）加载，失败自动重试
+model_manager = ModelManager(
+    loader=load_pipeline,
+    num_pipelines=int(os.getenv("ZIMAGE_NUM_PIPELINES", 1)),
+    mode=os.getenv("ZIMAGE_LOAD_MODE", "background"),
+    max_attempts=int(os.getenv("ZIMAGE_LOAD_ATTEMPTS", 3)),
+)
+
+# 推理调度器：推理在专用线程中执行，兼容请求（相同尺寸/步数）合并为一批；
+# 每条常驻 pipeline 对应一个推理 worker
+scheduler = GenerationScheduler(
+    pipe_provider=model_manager.get,
+    make_generator=lambda seed: torch.Generator(DEVICE).manual_seed(seed),
+    max_batch_size=int(os.getenv("ZIMAGE_MAX_BATCH", 4)),
+    max_wait_ms=float(os.getenv("ZIMAGE_BATCH_WAIT_MS", 20)),
+    workers=model_manager.num_pipelines,
+    wait_ready=model_manager.wait_ready,
+)
+
+# 生成结果缓存：相同参数直接返回已有图片，磁盘占用超出预算时按 LRU 淘汰
+result_cache = ResultCache(SAVE_DIR, max_bytes=int(os.getenv("ZIMAGE_CACHE_MAX_BYTES", 5 * 1024 ** 3)))
+
+# 异步任务表：POST /jobs 立即返回，进度通过 GET /jobs/{id} 或 SSE 获取
+jobs = JobStore()
 
 # --- 2. 定义请求参数模型 ---
 class GenerateRequest(BaseModel):
@@ -28,71 +81,233 @@ class GenerateRequest(BaseModel):
     height: int = Field(1920, ge=256, le=2048, description="高度")
     steps: int = Field(9, ge=1, le=50, description="生成步数/精度")
     seed: int = Field(42, description="随机种子")
+    # 仅对 /generate 生效：image 表示直接在响应体中返回编码后的图片，不再需要二次请求 /images
+    response_format: Literal["url", "image"] = Field("url", description="返回图片 URL 或图片本身")
+    image_format: Literal["png", "webp", "jpeg"] = Field("png", description="直接返回图片时的编码格式")
+    quality: int = Field(90, ge=1, le=100, description="webp/jpeg 编码质量")
 
-# --- 3. 生命周期管理 (启动时加载模型) ---
+# --- 3. 生命周期管理 (模型在后台加载，不阻塞启动) ---
 @app.on_event("startup")
-def load_model():
-    global pipe
-    model_path = "/root/.cache/modelscope/hub/models/Tongyi-MAI/Z-Image-Turbo"
-    print(f"正在加载模型: {model_path}...")
-    try:
-        pipe = ZImagePipeline.from_pretrained(
-            model_path,
-            torch_dtype=torch.bfloat16,
-            low_cpu_mem_usage=False,
-        )
-        pipe.to("cuda")
-        print("模型加载成功！")
-    except Exception as e:
-        print(f"模型加载失败: {e}")
+async def start_scheduler():
+    model_manager.start()
+    scheduler.start()
+
+@app.on_event("shutdown")
+async def stop_scheduler():
+    await scheduler.stop()
+    await result_cache.drain()  # 等后台的缓存写入落盘
+    await model_manager.stop()
+
+@app.get("/health/live")
+async def liveness():
+    """进程存活即返回 200"""
+    return {"status": "ok"}
+
+@app.get("/health/ready")
+async def readiness():
+    """至少一条 pipeline 加载完成时返回 200，否则 503；响应体包含各 pipeline 的加载状态"""
+    status = model_manager.status()
+    # lazy 模式由请求触发加载，未加载时也应接收流量
+    ready = model_manager.is_ready() or model_manager.mode == "lazy"
+    return JSONResponse(status, status_code=200 if ready else 503)
 
 # --- 4. 核心 API 接口 ---
+def _cache_key(request: GenerateRequest) -> str:
+    return cache_key(
+        model=MODEL_PATH,
+        prompt=request.prompt,
+        width=request.width,
+        height=request.height,
+        steps=request.steps,
+        seed=request.seed,
+        guidance_scale=0.0,
+    )
+
+async def _submit(request: GenerateRequest, on_step=None):
+    """排队执行推理，不阻塞事件循环"""
+    return await scheduler.submit(GenerationJob(
+        prompt=request.prompt,
+        width=request.width,
+        height=request.height,
+        steps=request.steps,
+        seed=request.seed,
+        on_step=on_step,
+    ))
+
+async def _generate_and_save(request: GenerateRequest, base_url: str, on_step=None) -> dict:
+    """排队执行推理并保存图片，返回图片信息；相同参数命中缓存时直接返回已有图片"""
+    key = _cache_key(request)
+
+    async def produce(tmp_path: str):
+        image = await _submit(request, on_step)
+        # 保存到本地 zimage-gem 目录（先写临时文件，由缓存原子重命名为哈希文件名）
+        await asyncio.to_thread(image.save, tmp_path, format="PNG")
+
+    file_name, cached = await result_cache.get_or_create(key, produce)
+
+    # 动态构建图片的访问 URL，base_url 例如 http://127.0.0.1:8888/
+    image_url = f"{base_url}images/{file_name}"
+
+    return {
+        "status": "success",
+        "file_name": file_name,
+        "url": image_url,
+        "cached": cached,
+        "params": {
+            "prompt": request.prompt,
+            "size": f"{request.width}x{request.height}",
+            "steps": request.steps,
+            "seed": request.seed
+        }
+    }
+
+IMAGE_MEDIA_TYPES = {"png": "image/png", "webp": "image/webp", "jpeg": "image/jpeg"}
+
+def _encode_image(image, image_format: str, quality: int) -> bytes:
+    """把 PIL 图片编码为字节（在线程中调用）"""
+    buffer = io.BytesIO()
+    if image_format == "png":
+        image.save(buffer, format="PNG", compress_level=1)
+    elif image_format == "webp":
+        image.save(buffer, format="WEBP", quality=quality, method=4)
+    else:
+        image.convert("RGB").save(buffer, format="JPEG", quality=quality, optimize=True)
+    return buffer.getvalue()
+
+def _read_cached(file_name: str) -> bytes:
+    with open(os.path.join(SAVE_DIR, file_name), "rb") as f:
+        return f.read()
+
+def _open_cached(file_name: str):
+    from PIL import Image
+    with Image.open(os.path.join(SAVE_DIR, file_name)) as image:
+        image.load()
+        return image
+
+def _write_result(result, tmp_path: str):
+    """后台写入缓存：PNG 请求直接写已编码的字节，其他格式另存一份 PNG"""
+    if isinstance(result, bytes):
+        with open(tmp_path, "wb") as f:
+            f.write(result)
+    else:
+        result.save(tmp_path, format="PNG")
+
+async def _stream_image(request: GenerateRequest) -> Response:
+    """
+    直接返回编码后的图片；未命中时经结果缓存合并相同参数的并发请求，只推理一次，
+    编码好就返回，缓存文件在后台写入，不占用响应时间。
+    """
+    key = _cache_key(request)
+    headers = {"X-Cache-Key": key}
+
+    async def compute():
+        image = await _submit(request)
+        if request.image_format == "png":
+            # 响应和缓存共用同一份 PNG 编码
+            return await asyncio.to_thread(_encode_image, image, "png", request.quality)
+        return image
+
+    while True:
+        file_name, result, cached = await result_cache.get_or_compute(key, compute, _write_result)
+        headers["X-Cache"] = "hit" if cached else "miss"
+        if result is not None:
+            break
+        # 命中缓存，或等到了另一个相同参数请求的生成结果。
+        # 先把文件读进内存再响应：发送过程中 LRU 淘汰删除文件也不影响；读之前就被淘汰则重新获取
+        try:
+            if request.image_format == "png":
+                # 缓存文件本身就是 PNG，不用重新编码
+                result = await asyncio.to_thread(_read_cached, file_name)
+            else:
+                result = await asyncio.to_thread(_open_cached, file_name)
+            break
+        except FileNotFoundError:
+            continue
+
+    if isinstance(result, bytes):
+        body = result
+    else:
+        body = await asyncio.to_thread(_encode_image, result, request.image_format, request.quality)
+    return Response(body, media_type=IMAGE_MEDIA_TYPES[request.image_format], headers=headers)
+
 @app.post("/generate")
 async def generate_image(request: GenerateRequest, http_request: Request):
     """
-    生成图片并返回图片的访问 URL 和保存路径
+    生成图片并返回图片的访问 URL 和保存路径；
+    response_format="image" 时直接在响应体中返回 png/webp/jpeg 编码的图片
     """
-    if pipe is None:
-        raise HTTPException(status_code=503, detail="模型未加载完成")
-
     try:
-        # 执行推理
-        # Z-Image-Turbo 特性：guidance_scale 固定为 0.0
-        image = pipe(
-            prompt=request.prompt,
-            height=request.height,
-            width=request.width,
-            num_inference_steps=request.steps,
-            guidance_scale=0.0,
-            generator=torch.Generator("cuda").manual_seed(request.seed),
-        ).images[0]
-
-        # 保存到本地 zimage-gem 目录
-        timestamp = int(time.time())
-        file_name = f"api_{timestamp}.png"
-        file_path = os.path.join(SAVE_DIR, file_name)
-        image.save(file_path)
-
-        # 动态构建图片的访问 URL
-        base_url = str(http_request.base_url)  # 例如 http://127.0.0.1:8888/
-        image_url = f"{base_url}images/{file_name}"
-
-        # 返回 JSON 信息，包含图片链接
-        return {
-            "status": "success",
-            "file_name": file_name,
-            "url": image_url,
-            "params": {
-                "prompt": request.prompt,
-                "size": f"{request.width}x{request.height}",
-                "steps": request.steps,
-                "seed": request.seed
-            }
-        }
-
+        if request.response_format == "image":
+            return await _stream_image(request)
+        return await _generate_and_save(request, str(http_request.base_url))
+    except ModelUnavailableError as e:
+        raise HTTPException(status_code=503, detail=f"模型不可用: {str(e)}")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"生成失败: {str(e)}")
 
+async def _run_job(record, request: GenerateRequest, base_url: str):
+    on_step = jobs.progress_callback(record, asyncio.get_running_loop())
+    try:
+        result = await _generate_and_save(request, base_url, on_step=on_step)
+    except asyncio.CancelledError:
+        record.update(status="cancelled")
+        raise
+    except Exception as e:
+        record.update(status="failed", error=str(e))
+    else:
+        record.update(status="succeeded", step=record.total_steps, result=result)
+
+@app.post("/jobs", status_code=202)
+async def create_job(request: GenerateRequest, http_request: Request):
+    """
+    提交生成任务，立即返回任务 ID；通过 GET /jobs/{id} 查询或 /jobs/{id}/events 订阅进度
+    """
+    record = jobs.create(request.model_dump())
+    base_url = str(http_request.base_url)
+    record.task = asyncio.create_task(_run_job(record, request, base_url))
+    return {
+        "job_id": record.job_id,
+        "status": record.status,
+        "status_url": f"{base_url}jobs/{record.job_id}",
+        "events_url": f"{base_url}jobs/{record.job_id}/events",
+    }
+
+def _get_job(job_id: str):
+    record = jobs.get(job_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail="任务不存在")
+    return record
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """查询任务状态、进度和结果"""
+    return _get_job(job_id).to_dict()
+
+@app.get("/jobs/{job_id}/events")
+async def job_events(job_id: str):
+    """以 SSE 推送任务进度，每个去噪步一条事件，任务结束后关闭"""
+    record = _get_job(job_id)
+
+    async def stream():
+        async for event in record.events():
+            yield sse_format(event)
+
+    return StreamingResponse(stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.delete("/jobs/{job_id}")
+async def cancel_job(job_id: str):
+    """取消排队中或生成中的任务（已在推理的批次会跑完，但结果被丢弃）"""
+    record = _get_job(job_id)
+    if not record.done and record.task is not None:
+        record.task.cancel()
+    return {"job_id": job_id, "status": "cancelled" if not record.done else record.status}
+
+@app.get("/queue")
+async def queue_stats():
+    """推理队列状态：队列深度、等待时间、批大小等，以及结果缓存的命中情况"""
+    return {**scheduler.stats(), "cache": result_cache.usage()}
+
 # --- 5. 启动入口 ---
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,106 @@
+"""
+Z-Image 异步任务登记表：POST /jobs 立即返回任务 ID，客户端轮询 GET /jobs/{id}
+或订阅 GET /jobs/{id}/events（SSE）获取每个去噪步的进度。
+"""
+
+import asyncio
+import json
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+TERMINAL_STATUSES = ("succeeded", "failed", "cancelled")
+
+
+@dataclass
+class JobRecord:
+    job_id: str
+    params: dict
+    status: str = "queued"  # queued / running / succeeded / failed / cancelled
+    step: int = 0
+    total_steps: int = 0
+    result: Optional[dict] = None
+    error: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    updated_at: float = field(default_factory=time.time)
+    task: Optional[asyncio.Task] = field(default=None, repr=False)
+    _subscribers: list = field(default_factory=list, repr=False)
+
+    @property
+    def done(self) -> bool:
+        return self.status in TERMINAL_STATUSES
+
+    def to_dict(self) -> dict:
+        return {
+            "job_id": self.job_id,
+            "status": self.status,
+            "step": self.step,
+            "total_steps": self.total_steps,
+            "result": self.result,
+            "error": self.error,
+            "params": self.params,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+        }
+
+    def update(self, **changes: Any):
+        """更新状态并推送给所有订阅者（须在事件循环线程中调用）"""
+        for key, value in changes.items():
+            setattr(self, key, value)
+        self.updated_at = time.time()
+        event = self.to_dict()
+        for queue in self._subscribers:
+            queue.put_nowait(event)
+
+    async def events(self):
+        """逐个产出状态事件，直到任务结束"""
+        queue: asyncio.Queue = asyncio.Queue()
+        self._subscribers.append(queue)
+        try:
+            yield self.to_dict()
+            while not self.done:
+                event = await queue.get()
+                yield event
+                if event["status"] in TERMINAL_STATUSES:
+                    break
+        finally:
+            self._subscribers.remove(queue)
+
+
+class JobStore:
+    """内存中的任务表，超过上限时淘汰最早的已结束任务"""
+
+    def __init__(self, max_jobs: int = 1000):
+        self.max_jobs = max_jobs
+        self._jobs: "OrderedDict[str, JobRecord]" = OrderedDict()
+
+    def create(self, params: dict) -> JobRecord:
+        record = JobRecord(job_id=uuid.uuid4().hex, params=params, total_steps=params.get("steps", 0))
+        self._jobs[record.job_id] = record
+        self._evict()
+        return record
+
+    def get(self, job_id: str) -> Optional[JobRecord]:
+        return self._jobs.get(job_id)
+
+    def _evict(self):
+        if len(self._jobs) <= self.max_jobs:
+            return
+        for job_id in [j for j, r in self._jobs.items() if r.done]:
+            del self._jobs[job_id]
+            if len(self._jobs) <= self.max_jobs:
+                break
+
+    def progress_callback(self, record: JobRecord, loop: asyncio.AbstractEventLoop):
+        """生成 scheduler 的 on_step 回调：从推理线程切回事件循环更新进度"""
+        def on_step(step: int, total_steps: int):
+            loop.call_soon_threadsafe(
+                lambda: record.done or record.update(status="running", step=step, total_steps=total_steps)
+            )
+        return on_step
+
+
+def sse_format(event: dict) -> str:
+    return f"event: {event['status']}\ndata: {json.dumps(event, ensure_ascii=False)}\n\n"
@@ -0,0 +1,148 @@
+"""
+Z-Image 模型管理器：后台或懒加载 pipeline，维护若干条常驻（warm）pipeline，加载失败自动重试。
+
+- mode="background"：服务启动后立即在后台线程加载，不阻塞启动，期间 /health/ready 返回 503；
+- mode="lazy"：第一个请求到达时才加载；
+- 多条 pipeline 依次加载，避免同时占用双倍的峰值内存；
+- 单条 pipeline 加载失败时按指数退避重试，超过次数后标记为 failed，下一次请求会重新触发加载。
+
+loader(index) 负责真正的加载（例如 ZImagePipeline.from_pretrained），在线程中调用。
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class ModelUnavailableError(RuntimeError):
+    """pipeline 重试耗尽仍未加载成功，服务端应返回 503"""
+
+
+@dataclass
+class _PipelineSlot:
+    index: int
+    pipe: Any = None
+    state: str = "idle"  # idle / loading / ready / failed
+    attempts: int = 0
+    error: Optional[str] = None
+    load_seconds: Optional[float] = None
+    task: Optional[asyncio.Task] = field(default=None, repr=False)
+
+    def to_dict(self) -> dict:
+        return {
+            "index": self.index,
+            "state": self.state,
+            "attempts": self.attempts,
+            "error": self.error,
+            "load_seconds": self.load_seconds,
+        }
+
+
+class ModelManager:
+    def __init__(
+        self,
+        loader: Callable[[int], Any],
+        num_pipelines: int = 1,
+        mode: str = "background",
+        max_attempts: int = 3,
+        retry_base: float = 5.0,
+        retry_max: float = 60.0,
+    ):
+        if mode not in ("background", "lazy"):
+            raise ValueError(f"未知的加载模式: {mode}")
+        self.loader = loader
+        self.mode = mode
+        self.max_attempts = max_attempts
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+        self._slots = [_PipelineSlot(index=i) for i in range(num_pipelines)]
+        self._load_lock: Optional[asyncio.Lock] = None
+
+    @property
+    def num_pipelines(self) -> int:
+        return len(self._slots)
+
+    def start(self):
+        """background 模式下在后台依次加载全部 pipeline；lazy 模式下什么也不做"""
+        if self.mode == "background":
+            for slot in self._slots:
+                self._ensure_loading(slot)
+
+    async def stop(self):
+        tasks = [slot.task for slot in self._slots if slot.task and not slot.task.done()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def get(self, index: int = 0) -> Any:
+        """返回已加载的 pipeline，未就绪时返回 None（可在推理线程中调用）"""
+        return self._slots[index].pipe
+
+    async def wait_ready(self, index: int = 0) -> Any:
+        """等待第 index 条 pipeline 就绪，必要时触发加载；重试耗尽仍失败时抛出 ModelUnavailableError"""
+        slot = self._slots[index]
+        if slot.pipe is not None:
+            return slot.pipe
+        # shield：等待方被取消不会中断加载
+        await asyncio.shield(self._ensure_loading(slot))
+        if slot.pipe is None:
+            raise ModelUnavailableError(f"模型加载失败: {slot.error}")
+        return slot.pipe
+
+    def is_ready(self) -> bool:
+        return any(slot.pipe is not None for slot in self._slots)
+
+    def status(self) -> dict:
+        states = [slot.state for slot in self._slots]
+        if all(state == "ready" for state in states):
+            overall = "ready"
+        elif "ready" in states:
+            overall = "degraded"  # 部分 pipeline 可用
+        elif "loading" in states:
+            overall = "loading"
+        elif "failed" in states:
+            overall = "failed"
+        else:
+            overall = "idle"
+        return {
+            "status": overall,
+            "mode": self.mode,
+            "ready_pipelines": states.count("ready"),
+            "num_pipelines": self.num_pipelines,
+            "pipelines": [slot.to_dict() for slot in self._slots],
+        }
+
+    def _ensure_loading(self, slot: _PipelineSlot) -> asyncio.Task:
+        if slot.task is None or (slot.task.done() and slot.pipe is None):
+            slot.task = asyncio.create_task(self._load(slot), name=f"zimage-load-{slot.index}")
+        return slot.task
+
+    async def _load(self, slot: _PipelineSlot):
+        if self._load_lock is None:
+            self._load_lock = asyncio.Lock()
+        slot.state = "loading"
+        slot.attempts = 0
+        for attempt in range(self.max_attempts):
+            slot.attempts = attempt + 1
+            started = time.perf_counter()
+            try:
+                # 串行加载，避免多条 pipeline 同时占用峰值内存
+                async with self._load_lock:
+                    pipe = await asyncio.to_thread(self.loader, slot.index)
+            except Exception as e:
+                slot.error = f"{type(e).__name__}: {e}"
+                logger.warning("pipeline %d 第 %d 次加载失败: %s", slot.index, slot.attempts, slot.error)
+                if attempt + 1 < self.max_attempts:
+                    await asyncio.sleep(min(self.retry_max, self.retry_base * (2 ** attempt)))
+                continue
+            slot.pipe = pipe
+            slot.state = "ready"
+            slot.error = None
+            slot.load_seconds = time.perf_counter() - started
+            logger.info("pipeline %d 加载完成，用时 %.1fs", slot.index, slot.load_seconds)
+            return
+        slot.state = "failed"
@@ -2,26 +2,115 @@
 title: Z_Image_Generator_Direct
 author: larry li
 des: 调用 Z-Image FastAPI 生成图片,基于Filter过滤器
-version: 0.3
+version: 0.5
 """
 
-import requests
+import asyncio
+import json
 import time
+import aiohttp
 from pydantic import BaseModel, Field
 from typing import Optional, Callable, Awaitable
 
+# Open WebUI 的 Pipe/Filter 以单个文件粘贴导入，不能 import 同目录的模块。
+# 以下 TERMINAL_STATUSES / ZImageError / ZImageClient 原样拷贝自 openwebui_pip.py（规范副本），
+# 不要只改这里；tests/test_openwebui_zimage.py 会检查两份源码一致。
+TERMINAL_STATUSES = ("succeeded", "failed", "cancelled")
+
+
+class ZImageError(Exception):
+    pass
+
+
+class ZImageClient:
+    """
+    Z-Image /jobs 接口的异步客户端。
+    同一事件循环内所有实例共用一个 aiohttp 会话（连接池），多个聊天并发生图时复用 TCP 连接；
+    超时或用户中止（任务被取消）时调用 DELETE /jobs/{id} 撤销服务端任务。
+    """
+
+    _session: Optional[aiohttp.ClientSession] = None
+    _session_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def __init__(self, base_url: str, timeout: float, connect_timeout: float = 10, read_timeout: float = 60):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.request_timeout = aiohttp.ClientTimeout(total=connect_timeout + read_timeout, connect=connect_timeout)
+        # SSE 是长连接：不设总超时，只限制连接时间和两条事件之间的最大间隔
+        self.stream_timeout = aiohttp.ClientTimeout(total=None, connect=connect_timeout, sock_read=read_timeout)
+
+    @classmethod
+    def session(cls) -> aiohttp.ClientSession:
+        loop = asyncio.get_running_loop()
+        if cls._session is None or cls._session.closed or cls._session_loop is not loop:
+            cls._session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=100, keepalive_timeout=60))
+            cls._session_loop = loop
+        return cls._session
+
+    async def generate(
+        self,
+        payload: dict,
+        on_progress: Optional[Callable[[dict], Awaitable[None]]] = None,
+    ) -> dict:
+        """提交任务并等待结束，返回最后一条任务事件"""
+        async with self.session().post(
+            f"{self.base_url}/jobs", json=payload, timeout=self.request_timeout
+        ) as response:
+            if response.status != 202:
+                raise ZImageError(f"接口失败: {response.status}\n{await response.text()}")
+            job = await response.json()
+
+        try:
+            return await asyncio.wait_for(self._follow(job["job_id"], on_progress), self.timeout)
+        except (asyncio.CancelledError, asyncio.TimeoutError):
+            # 用户中止或超时：撤销服务端任务，释放推理队列
+            await asyncio.shield(self.cancel(job["job_id"]))
+            raise
+
+    async def _follow(self, job_id: str, on_progress) -> dict:
+        """订阅任务的 SSE 进度，直到任务结束"""
+        async with self.session().get(
+            f"{self.base_url}/jobs/{job_id}/events", timeout=self.stream_timeout
+        ) as response:
+            async for line in response.content:
+                line = line.decode("utf-8").strip()
+                if not line.startswith("data:"):
+                    continue
+                event = json.loads(line[len("data:"):])
+                if event["status"] == "running" and on_progress:
+                    await on_progress(event)
+                if event["status"] in TERMINAL_STATUSES:
+                    return event
+        raise ZImageError("进度流意外中断")
+
+    async def cancel(self, job_id: str):
+        try:
+            async with self.session().delete(
+                f"{self.base_url}/jobs/{job_id}", timeout=self.request_timeout
+            ):
+                pass
+        except Exception:
+            pass
+
 
 class Filter:
     class Valves(BaseModel):
-        api_url: str = Field(
-            default="http://139.196.198.169:8888/generate",
-            description="Z-Image FastAPI 的生成接口地址",
+        api_base_url: str = Field(
+            default="http://139.196.198.169:8888",
+            description="Z-Image FastAPI 服务地址（使用 /jobs 任务接口）",
         )
+        timeout: int = Field(default=300, description="单次生成的超时时间（秒）")
+        connect_timeout: int = Field(default=10, description="连接超时（秒）")
+        read_timeout: int = Field(default=60, description="两次进度事件之间的最长等待（秒）")
         trigger_word: str = Field(default="画图", description="触发词")
 
     def __init__(self):
         self.valves = self.Valves()
 
+    async def _emit(self, emitter, event_type: str, data: dict):
+        if emitter:
+            await emitter({"type": event_type, "data": data})
+
     async def inlet(
         self,
         body: dict,
@@ -43,67 +132,63 @@ class Filter:
                 return body
 
             # 1. 发送“正在生成”的状态到 UI
-            await __event_emitter__(
-                {
-                    "type": "status",
-                    "data": {"description": f"正在为您绘图: {prompt}", "done": False},
-                }
-            )
+            await self._emit(__event_emitter__, "status", {"description": f"正在为您绘图: {prompt}", "done": False})
 
+            async def on_progress(event: dict):
+                await self._emit(
+                    __event_emitter__,
+                    "status",
+                    {"description": f"正在为您绘图: {event['step']}/{event['total_steps']} 步", "done": False},
+                )
+
+            client = ZImageClient(
+                self.valves.api_base_url,
+                timeout=self.valves.timeout,
+                connect_timeout=self.valves.connect_timeout,
+                read_timeout=self.valves.read_timeout,
+            )
             try:
-                # 2. 调用 API
-                response = requests.post(
-                    self.valves.api_url,
-                    json={
+                # 2. 提交任务并订阅进度（SSE），不阻塞 Open WebUI 的事件循环
+                event = await client.generate(
+                    {
                         "prompt": prompt,
                         "width": 1440,
                         "height": 1920,
                         "steps": 9,
                         "seed": int(time.time()),
                     },
-                    timeout=120,
+                    on_progress,
                 )
+            except asyncio.CancelledError:
+                # 用户中止：服务端任务已撤销
+                await asyncio.shield(self._emit(__event_emitter__, "status", {"description": "已取消绘图", "done": True}))
+                raise
+            except asyncio.TimeoutError:
+                await self._emit(__event_emitter__, "status", {"description": "绘图超时，已取消任务", "done": True})
+                return body
+            except Exception as e:
+                await self._emit(__event_emitter__, "status", {"description": f"错误: {e}", "done": True})
+                return body
 
-                if response.status_code == 200:
-                    image_url = response.json().get("url")
-
-                    # 3. 【核心操作】直接把图片渲染到 UI 界面，不经过 AI 处理
-                    await __event_emitter__(
-                        {
-                            "type": "message",
-                            "data": {
-                                "content": f"🎨 **绘图完成！**\n\n![Generated Image]({image_url})\n\n"
-                            },
-                        }
-                    )
-
-                    # 4. 告诉 UI 状态已完成
-                    await __event_emitter__(
-                        {
-                            "type": "status",
-                            "data": {"description": "绘图成功", "done": True},
-                        }
-                    )
-
-                    # 5. 修改给 AI 的指令，让 AI 针对这张图说句赞美的话，而不是重复生成
-                    messages[-1][
-                        "content"
-                    ] = f"我已经生成了这张图片：{prompt}。请你用很简短的一句话赞美一下这张画，不要再尝试生成或回复 Markdown 链接。"
-
-                else:
-                    await __event_emitter__(
-                        {
-                            "type": "status",
-                            "data": {"description": "生成失败", "done": True},
-                        }
-                    )
+            if event.get("status") == "succeeded":
+                image_url = event["result"]["url"]
 
-            except Exception as e:
-                await __event_emitter__(
-                    {
-                        "type": "status",
-                        "data": {"description": f"错误: {e}", "done": True},
-                    }
+                # 3. 【核心操作】直接把图片渲染到 UI 界面，不经过 AI 处理
+                await self._emit(
+                    __event_emitter__,
+                    "message",
+                    {"content": f"🎨 **绘图完成！**\n\n![Generated Image]({image_url})\n\n"},
                 )
 
+                # 4. 告诉 UI 状态已完成
+                await self._emit(__event_emitter__, "status", {"description": "绘图成功", "done": True})
+
+                # 5. 修改给 AI 的指令，让 AI 针对这张图说句赞美的话，而不是重复生成
+                messages[-1][
+                    "content"
+                ] = f"我已经生成了这张图片：{prompt}。请你用很简短的一句话赞美一下这张画，不要再尝试生成或回复 Markdown 链接。"
+
+            else:
+                await self._emit(__event_emitter__, "status", {"description": "生成失败", "done": True})
+
         return body
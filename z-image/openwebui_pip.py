@@ -3,22 +3,106 @@ title: Z-Image Standalone Model (Async)
 author: open-webui
 author_url: https://github.com/open-webui
 dec: Z-Image 模型的异步管道实现，用于在 OpenWebUI 中调用 Z-Image FastAPI 生成图片。
-version: 0.6
+version: 0.8
 """
 
-import requests
-import time
 import asyncio
+import json
+import time
+import aiohttp
 from pydantic import BaseModel, Field
 from typing import Optional, Union, Generator, Iterator, Callable, Awaitable
 
+# Open WebUI 的 Pipe/Filter 以单个文件粘贴导入，不能 import 同目录的模块，
+# 因此 openwebui_function.py 里有一份相同的 ZImageClient。这里是规范副本：先改这里再原样拷过去，
+# tests/test_openwebui_zimage.py 会检查两份源码一致。
+TERMINAL_STATUSES = ("succeeded", "failed", "cancelled")
+
+
+class ZImageError(Exception):
+    pass
+
+
+class ZImageClient:
+    """
+    Z-Image /jobs 接口的异步客户端。
+    同一事件循环内所有实例共用一个 aiohttp 会话（连接池），多个聊天并发生图时复用 TCP 连接；
+    超时或用户中止（任务被取消）时调用 DELETE /jobs/{id} 撤销服务端任务。
+    """
+
+    _session: Optional[aiohttp.ClientSession] = None
+    _session_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def __init__(self, base_url: str, timeout: float, connect_timeout: float = 10, read_timeout: float = 60):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.request_timeout = aiohttp.ClientTimeout(total=connect_timeout + read_timeout, connect=connect_timeout)
+        # SSE 是长连接：不设总超时，只限制连接时间和两条事件之间的最大间隔
+        self.stream_timeout = aiohttp.ClientTimeout(total=None, connect=connect_timeout, sock_read=read_timeout)
+
+    @classmethod
+    def session(cls) -> aiohttp.ClientSession:
+        loop = asyncio.get_running_loop()
+        if cls._session is None or cls._session.closed or cls._session_loop is not loop:
+            cls._session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=100, keepalive_timeout=60))
+            cls._session_loop = loop
+        return cls._session
+
+    async def generate(
+        self,
+        payload: dict,
+        on_progress: Optional[Callable[[dict], Awaitable[None]]] = None,
+    ) -> dict:
+        """提交任务并等待结束，返回最后一条任务事件"""
+        async with self.session().post(
+            f"{self.base_url}/jobs", json=payload, timeout=self.request_timeout
+        ) as response:
+            if response.status != 202:
+                raise ZImageError(f"接口失败: {response.status}\n{await response.text()}")
+            job = await response.json()
+
+        try:
+            return await asyncio.wait_for(self._follow(job["job_id"], on_progress), self.timeout)
+        except (asyncio.CancelledError, asyncio.TimeoutError):
+            # 用户中止或超时：撤销服务端任务，释放推理队列
+            await asyncio.shield(self.cancel(job["job_id"]))
+            raise
+
+    async def _follow(self, job_id: str, on_progress) -> dict:
+        """订阅任务的 SSE 进度，直到任务结束"""
+        async with self.session().get(
+            f"{self.base_url}/jobs/{job_id}/events", timeout=self.stream_timeout
+        ) as response:
+            async for line in response.content:
+                line = line.decode("utf-8").strip()
+                if not line.startswith("data:"):
+                    continue
+                event = json.loads(line[len("data:"):])
+                if event["status"] == "running" and on_progress:
+                    await on_progress(event)
+                if event["status"] in TERMINAL_STATUSES:
+                    return event
+        raise ZImageError("进度流意外中断")
+
+    async def cancel(self, job_id: str):
+        try:
+            async with self.session().delete(
+                f"{self.base_url}/jobs/{job_id}", timeout=self.request_timeout
+            ):
+                pass
+        except Exception:
+            pass
+
 
 class Pipe:
     class Valves(BaseModel):
-        api_url: str = Field(
-            default="http://139.196.198.169:8888/generate",
-            description="Z-Image FastAPI 的生成接口地址",
+        api_base_url: str = Field(
+            default="http://139.196.198.169:8888",
+            description="Z-Image FastAPI 服务地址（使用 /jobs 任务接口）",
         )
+        timeout: int = Field(default=300, description="单次生成的超时时间（秒）")
+        connect_timeout: int = Field(default=10, description="连接超时（秒）")
+        read_timeout: int = Field(default=60, description="两次进度事件之间的最长等待（秒）")
         width: int = Field(default=1440, description="图片宽度")
         height: int = Field(default=1920, description="图片高度")
         steps: int = Field(default=9, description="生成步数")
@@ -29,7 +113,10 @@ class Pipe:
     def pipes(self) -> list[dict]:
         return [{"id": "z_image_turbo", "name": "Z-Image Turbo (免费生图)"}]
 
-    # 注意：这里改成了 async def
+    async def _emit_status(self, emitter, description: str, done: bool):
+        if emitter:
+            await emitter({"type": "status", "data": {"description": description, "done": done}})
+
     async def pipe(
         self,
         body: dict,
@@ -45,56 +132,53 @@ class Pipe:
         if not prompt:
             return "请输入绘图提示词。"
 
-        # 2. 推送状态通知（使用 await 代替 asyncio.run）
-        if __event_emitter__:
-            await __event_emitter__(
-                {
-                    "type": "status",
-                    "data": {
-                        "description": f"正在生成图片: {prompt[:20]}...",
-                        "done": False,
-                    },
-                }
+        # 2. 推送状态通知
+        await self._emit_status(__event_emitter__, f"正在生成图片: {prompt[:20]}...", False)
+
+        # 3. 构造请求参数
+        payload = {
+            "prompt": prompt,
+            "width": self.valves.width,
+            "height": self.valves.height,
+            "steps": self.valves.steps,
+            "seed": int(time.time()),
+        }
+
+        async def on_progress(event: dict):
+            await self._emit_status(
+                __event_emitter__, f"正在生成图片: {event['step']}/{event['total_steps']} 步", False
             )
 
+        client = ZImageClient(
+            self.valves.api_base_url,
+            timeout=self.valves.timeout,
+            connect_timeout=self.valves.connect_timeout,
+            read_timeout=self.valves.read_timeout,
+        )
         try:
-            # 3. 构造请求参数
-            payload = {
-                "prompt": prompt,
-                "width": self.valves.width,
-                "height": self.valves.height,
-                "steps": self.valves.steps,
-                "seed": int(time.time()),
-            }
-
-            # 4. 执行 API 调用
-            # 虽然 requests 是阻塞的，但在 async def 中简单使用通常没问题
-            # 如果想更“专业”，可以使用 httpx.AsyncClient()
-            response = requests.post(self.valves.api_url, json=payload, timeout=120)
-
-            if response.status_code == 200:
-                result = response.json()
-                image_url = result.get("url")
-
-                if __event_emitter__:
-                    await __event_emitter__(
-                        {
-                            "type": "status",
-                            "data": {"description": "绘图成功！", "done": True},
-                        }
-                    )
-
-                # 5. 返回 Markdown 结果
-                return f"![Generated Image]({image_url})\n\n**提示词:** {prompt}\n**分辨率:** {self.valves.width}x{self.valves.height}"
-            else:
-                return f"❌ 接口失败: {response.status_code}\n{response.text}"
-
+            # 4. 提交任务并订阅进度（SSE），全程不阻塞 Open WebUI 的事件循环
+            event = await client.generate(payload, on_progress)
+        except asyncio.CancelledError:
+            # 用户点击停止：服务端任务已撤销，这里只更新状态
+            await asyncio.shield(self._emit_status(__event_emitter__, "已取消生成", True))
+            raise
+        except asyncio.TimeoutError:
+            await self._emit_status(__event_emitter__, "生成超时，已取消任务", True)
+            return f"⚠️ 生成超时（{self.valves.timeout} 秒）"
+        except ZImageError as e:
+            await self._emit_status(__event_emitter__, f"生成失败: {e}", True)
+            return f"❌ {e}"
         except Exception as e:
-            if __event_emitter__:
-                await __event_emitter__(
-                    {
-                        "type": "status",
-                        "data": {"description": f"错误: {str(e)}", "done": True},
-                    }
-                )
+            await self._emit_status(__event_emitter__, f"错误: {str(e)}", True)
             return f"⚠️ 发生错误: {str(e)}"
+
+        if event.get("status") != "succeeded":
+            error = event.get("error") or event.get("status", "未知状态")
+            await self._emit_status(__event_emitter__, f"生成失败: {error}", True)
+            return f"❌ 生成失败: {error}"
+
+        image_url = event["result"]["url"]
+        await self._emit_status(__event_emitter__, "绘图成功！", True)
+
+        # 5. 返回 Markdown 结果
+        return f"![Generated Image]({image_url})\n\n**提示词:** {prompt}\n**分辨率:** {self.valves.width}x{self.valves.height}"
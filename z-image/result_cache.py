@@ -0,0 +1,196 @@
+"""
+Z-Image 生成结果缓存：以生成参数的哈希为文件名，按 LRU 控制磁盘占用。
+
+Z-Image-Turbo 在 guidance_scale=0.0 时，相同的 (模型, prompt, width, height, steps, seed)
+总是生成同一张图，因此可以按参数内容寻址：
+- 命中时直接返回已有文件，不再推理；
+- 同一参数的并发请求只生成一次；
+- get_or_compute 拿到生成结果就返回给调用方，文件在后台写入，写完前的并发请求等待写入后读文件；
+- 先写临时文件再原子重命名，文件名由哈希决定，并发下不会冲突；
+- 超过磁盘预算时淘汰最久未使用的文件。
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import uuid
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+_CACHE_FILE_RE = re.compile(r"^([0-9a-f]{64})\.(png|webp|jpg)$")
+
+
+def cache_key(**params) -> str:
+    """生成参数的内容哈希"""
+    payload = json.dumps(params, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    def __init__(self, directory: str, max_bytes: int, ext: str = "png"):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.ext = ext
+        self._index: "OrderedDict[str, int]" = OrderedDict()  # key -> 文件大小，按最近使用排序
+        self._total = 0
+        self._inflight: dict[str, asyncio.Future] = {}
+        self._writes: set[asyncio.Task] = set()  # get_or_compute 的后台写入
+        self.stats = {"hits": 0, "misses": 0, "coalesced": 0, "evictions": 0}
+        os.makedirs(directory, exist_ok=True)
+        self._load()
+
+    def _load(self):
+        """启动时按修改时间重建 LRU 索引"""
+        entries = []
+        for name in os.listdir(self.directory):
+            match = _CACHE_FILE_RE.match(name)
+            if match and match.group(2) == self.ext:
+                stat = os.stat(os.path.join(self.directory, name))
+                entries.append((stat.st_mtime, match.group(1), stat.st_size))
+        for _, key, size in sorted(entries):
+            self._index[key] = size
+            self._total += size
+        self._evict()
+
+    def file_name(self, key: str) -> str:
+        return f"{key}.{self.ext}"
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, self.file_name(key))
+
+    def lookup(self, key: str) -> Optional[str]:
+        """命中则刷新 LRU 位置并返回文件名"""
+        if key not in self._index:
+            return None
+        path = self.path(key)
+        if not os.path.exists(path):
+            self._total -= self._index.pop(key)
+            return None
+        self._index.move_to_end(key)
+        try:
+            os.utime(path)  # 重启后仍能按最近使用排序
+        except OSError:
+            pass
+        return self.file_name(key)
+
+    async def _wait_inflight(self, key: str) -> Optional[tuple[str, bool]]:
+        """命中或等到并发生成的结果时返回 (文件名, 是否命中缓存)，需要自己生成时返回 None"""
+        while True:
+            file_name = self.lookup(key)
+            if file_name is not None:
+                self.stats["hits"] += 1
+                return file_name, True
+
+            future = self._inflight.get(key)
+            if future is None:
+                return None
+            self.stats["coalesced"] += 1
+            # asyncio.wait 不会因为被等待的 future 取消而抛错；生成方被取消时重新竞争生成
+            await asyncio.wait([future])
+            if not future.cancelled():
+                return future.result(), False
+
+    async def get_or_create(self, key: str, produce: Callable[[str], Awaitable[None]]) -> tuple[str, bool]:
+        """返回 (文件名, 是否命中缓存)；produce(tmp_path) 负责把图片写到临时路径"""
+        found = await self._wait_inflight(key)
+        if found is not None:
+            return found
+        self.stats["misses"] += 1
+        future = self._inflight[key] = asyncio.get_running_loop().create_future()
+        try:
+            file_name = await self._write_file(key, produce)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # 没有并发等待者时避免 "never retrieved" 警告
+            raise
+        finally:
+            self._inflight.pop(key, None)
+        future.set_result(file_name)
+        return file_name, False
+
+    async def get_or_compute(
+        self, key: str, compute: Callable[[], Awaitable[Any]], write: Callable[[Any, str], None],
+    ) -> tuple[Optional[str], Any, bool]:
+        """
+        返回 (文件名, 结果, 是否命中缓存)：命中或等到并发请求的结果时返回文件名，结果为 None；
+        自己生成时 compute() 的结果立即返回，文件名为 None，write(结果, tmp_path) 在后台线程写入缓存。
+        """
+        found = await self._wait_inflight(key)
+        if found is not None:
+            return found[0], None, found[1]
+        self.stats["misses"] += 1
+        future = self._inflight[key] = asyncio.get_running_loop().create_future()
+        try:
+            value = await compute()
+        except BaseException as e:
+            self._inflight.pop(key, None)
+            if isinstance(e, asyncio.CancelledError):
+                future.cancel()
+            else:
+                future.set_exception(e)
+                future.exception()
+            raise
+        task = asyncio.create_task(self._write_later(key, future, value, write))
+        self._writes.add(task)
+        task.add_done_callback(self._writes.discard)
+        return None, value, False
+
+    async def _write_later(self, key: str, future: asyncio.Future, value, write: Callable[[Any, str], None]):
+        try:
+            file_name = await self._write_file(key, lambda tmp_path: asyncio.to_thread(write, value, tmp_path))
+        except BaseException as e:
+            # 结果已经返回给生成方；等待者收到取消后重新竞争生成
+            future.cancel()
+            if not isinstance(e, Exception):
+                raise
+            logger.warning("写入结果缓存失败: %s", e)
+        else:
+            future.set_result(file_name)
+        finally:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+
+    async def _write_file(self, key: str, produce: Callable[[str], Awaitable[None]]) -> str:
+        """先写临时文件再原子重命名，加入 LRU 索引"""
+        tmp_path = os.path.join(self.directory, f".{key}.{uuid.uuid4().hex}.tmp.{self.ext}")
+        try:
+            await produce(tmp_path)
+            os.replace(tmp_path, self.path(key))
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        self._add(key, os.path.getsize(self.path(key)))
+        return self.file_name(key)
+
+    async def drain(self):
+        """等待后台写入完成（关闭服务或测试时使用）"""
+        while self._writes:
+            await asyncio.gather(*self._writes, return_exceptions=True)
+
+    def _add(self, key: str, size: int):
+        if key in self._index:
+            self._total -= self._index.pop(key)
+        self._index[key] = size
+        self._total += size
+        self._evict()
+
+    def _evict(self):
+        while self._total > self.max_bytes and len(self._index) > 1:
+            key, size = self._index.popitem(last=False)
+            self._total -= size
+            self.stats["evictions"] += 1
+            try:
+                os.remove(self.path(key))
+            except FileNotFoundError:
+                pass
+
+    def usage(self) -> dict:
+        return {"files": len(self._index), "bytes": self._total, "max_bytes": self.max_bytes, **self.stats}
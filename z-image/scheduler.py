@@ -0,0 +1,250 @@
+"""
+Z-Image 推理调度器：把扩散推理移出事件循环，排队并对兼容请求动态批处理。
+
+- 请求进入 asyncio 队列，由后台调度任务取出；
+- 调度任务等待最多 max_wait_ms，把尺寸、步数相同的请求合并为一次批量 pipeline 调用；
+- 推理在专用的单线程执行器中运行，不阻塞事件循环；
+- stats() 提供队列深度、等待时间、批大小等指标；
+- 请求可设置 on_step 回调，每个去噪步结束时在推理线程中调用，用于进度推送；
+- workers > 1 时每个 worker 持有一条独立的 pipeline，并行消费同一个队列；
+  某条 pipeline 加载失败时，它取到的请求放回队列交给其他 worker，自己暂停取任务，
+  每隔 unhealthy_retry 秒重试加载；全部 pipeline 都不可用时请求直接失败；
+- stop() 后排队中和尚未返回结果的请求都以 RuntimeError("调度器已停止") 失败，不会一直挂起。
+
+pipeline 只需支持 diffusers 风格的调用：pipe(prompt=[...], generator=[...], ...).images
+"""
+
+import asyncio
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Optional
+
+
+@dataclass
+class GenerationJob:
+    prompt: str
+    width: int
+    height: int
+    steps: int
+    seed: int
+    future: Optional[asyncio.Future] = field(default=None, repr=False)
+    enqueued_at: float = field(default_factory=time.perf_counter)
+    # 进度回调：on_step(step, total_steps)，在推理线程中调用
+    on_step: Optional[Callable[[int, int], None]] = field(default=None, repr=False)
+
+    @property
+    def batch_key(self) -> tuple:
+        """同一批次内的请求必须尺寸和步数一致"""
+        return (self.width, self.height, self.steps)
+
+
+class GenerationScheduler:
+    def __init__(
+        self,
+        pipe_provider: Callable[[int], Any],
+        make_generator: Callable[[int], Any],
+        max_batch_size: int = 4,
+        max_wait_ms: float = 20.0,
+        history: int = 1000,
+        workers: int = 1,
+        wait_ready: Optional[Callable[[int], Awaitable[Any]]] = None,
+        unhealthy_retry: float = 30.0,
+    ):
+        # pipe_provider(worker) 返回该 worker 使用的 pipeline；
+        # wait_ready(worker) 在每批推理前等待该 pipeline 就绪（可触发懒加载），加载失败时抛出异常
+        self.pipe_provider = pipe_provider
+        self.wait_ready = wait_ready
+        self.unhealthy_retry = unhealthy_retry
+        self.workers = workers
+        self.make_generator = make_generator
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._queue: asyncio.Queue = asyncio.Queue()
+        # 取出后与当前批次不兼容的请求，优先于队列处理，保持先来先服务
+        self._pending: deque = deque()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="zimage-infer")
+        self._tasks: list[asyncio.Task] = []
+        # 各 worker 已取出、尚未返回结果的批次，stop() 时让它们失败
+        self._active: dict[int, list[GenerationJob]] = {}
+        # pipeline 加载失败的 worker；还有其他 worker 可用时暂停取任务
+        self._unhealthy: set[int] = set()
+        self._wait_times: deque = deque(maxlen=history)
+        self._batch_sizes: deque = deque(maxlen=history)
+        self._running = 0
+        self._completed = 0
+        self._failed = 0
+
+    def start(self):
+        if not self._tasks:
+            self._tasks = [
+                asyncio.create_task(self._loop(worker), name=f"zimage-scheduler-{worker}")
+                for worker in range(self.workers)
+            ]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._executor.shutdown(wait=False)
+        # 排队中、已取出未推理完的请求都不会再有结果，让等待方立即失败
+        waiting = [job for batch in self._active.values() for job in batch]
+        self._active.clear()
+        waiting.extend(self._pending)
+        self._pending.clear()
+        while not self._queue.empty():
+            waiting.append(self._queue.get_nowait())
+        self._fail(waiting, RuntimeError("调度器已停止"))
+
+    async def submit(self, job: GenerationJob):
+        """提交请求并等待生成结果（PIL Image）"""
+        if not self._tasks:
+            raise RuntimeError("调度器未运行")
+        job.future = asyncio.get_running_loop().create_future()
+        job.enqueued_at = time.perf_counter()
+        await self._queue.put(job)
+        return await job.future
+
+    def queue_depth(self) -> int:
+        return self._queue.qsize() + len(self._pending)
+
+    def stats(self) -> dict:
+        waits = list(self._wait_times)
+        sizes = list(self._batch_sizes)
+        return {
+            "queue_depth": self.queue_depth(),
+            "running": self._running,
+            "workers": self.workers,
+            "unhealthy_workers": sorted(self._unhealthy),
+            "completed": self._completed,
+            "failed": self._failed,
+            "batches": len(sizes),
+            "avg_batch_size": sum(sizes) / len(sizes) if sizes else 0.0,
+            "avg_wait_ms": sum(waits) / len(waits) * 1000 if waits else 0.0,
+            "max_wait_ms": max(waits) * 1000 if waits else 0.0,
+        }
+
+    async def _next_job(self, timeout: Optional[float] = None) -> Optional[GenerationJob]:
+        if self._pending:
+            return self._pending.popleft()
+        if timeout is None:
+            return await self._queue.get()
+        try:
+            return await asyncio.wait_for(self._queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    async def _collect_batch(self) -> list[GenerationJob]:
+        first = await self._next_job()
+        batch = [first]
+        skipped = []
+        deadline = time.perf_counter() + self.max_wait
+        try:
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                job = await self._next_job(remaining)
+                if job is None:
+                    break
+                if job.batch_key == first.batch_key:
+                    batch.append(job)
+                else:
+                    skipped.append(job)
+        except asyncio.CancelledError:
+            # 停止时已取出的请求放回队首，由 stop() 统一处理
+            self._pending.extendleft(reversed(batch + skipped))
+            raise
+        # 不兼容的请求放回队首，下一轮优先处理
+        self._pending.extendleft(reversed(skipped))
+        return batch
+
+    def _fail(self, batch: list[GenerationJob], error: Exception):
+        for job in batch:
+            if not job.future.done():
+                self._failed += 1
+                job.future.set_exception(error)
+
+    async def _loop(self, worker: int = 0):
+        loop = asyncio.get_running_loop()
+        while True:
+            if worker in self._unhealthy and len(self._unhealthy) < self.workers:
+                await self._recover(worker)
+                continue
+            batch = await self._collect_batch()
+            self._active[worker] = batch
+            if self.wait_ready is not None:
+                # 懒加载模式下第一批请求到达时才触发加载
+                try:
+                    await self.wait_ready(worker)
+                except Exception as e:
+                    self._unhealthy.add(worker)
+                    if len(self._unhealthy) < self.workers:
+                        # 还有可用的 pipeline：请求放回队列交给其他 worker。
+                        # 空闲的 worker 阻塞在 _queue.get() 上，放进 _pending 不会唤醒它们
+                        for job in batch:
+                            if not job.future.done():
+                                self._queue.put_nowait(job)
+                    else:
+                        # 全部不可用：本批直接失败，下一批会重新尝试加载
+                        self._fail(batch, e)
+                    self._active.pop(worker, None)
+                    continue
+                self._unhealthy.discard(worker)
+            batch = [job for job in batch if not job.future.done()]  # 跳过已取消的请求
+            if not batch:
+                continue
+            started = time.perf_counter()
+            for job in batch:
+                self._wait_times.append(started - job.enqueued_at)
+            self._batch_sizes.append(len(batch))
+            self._running += len(batch)
+            try:
+                images = await loop.run_in_executor(self._executor, self._run_batch, batch, worker)
+            except Exception as e:
+                self._fail(batch, e)
+            else:
+                self._completed += len(batch)
+                for job, image in zip(batch, images):
+                    if not job.future.done():
+                        job.future.set_result(image)
+            finally:
+                self._running -= len(batch)
+            # 被取消时不清理，留给 stop() 让这批请求失败
+            self._active.pop(worker, None)
+
+    async def _recover(self, worker: int):
+        """暂停取任务，等待一段时间后重试加载该 worker 的 pipeline"""
+        await asyncio.sleep(self.unhealthy_retry)
+        try:
+            await self.wait_ready(worker)
+        except Exception:
+            return
+        self._unhealthy.discard(worker)
+
+    def _run_batch(self, batch: list[GenerationJob], worker: int = 0):
+        """在推理线程中执行一次批量 pipeline 调用"""
+        pipe = self.pipe_provider(worker)
+        if pipe is None:
+            raise RuntimeError("模型未加载完成")
+        first = batch[0]
+        kwargs = {}
+        if any(job.on_step for job in batch):
+            def on_step_end(pipeline, step, timestep, callback_kwargs):
+                for job in batch:
+                    if job.on_step:
+                        job.on_step(step + 1, first.steps)
+                return callback_kwargs
+            kwargs["callback_on_step_end"] = on_step_end
+        return pipe(
+            prompt=[job.prompt for job in batch],
+            height=first.height,
+            width=first.width,
+            num_inference_steps=first.steps,
+            # Z-Image-Turbo 特性：guidance_scale 固定为 0.0
+            guidance_scale=0.0,
+            generator=[self.make_generator(job.seed) for job in batch],
+            **kwargs,
+        ).images